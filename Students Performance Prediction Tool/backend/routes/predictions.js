@@ -1,10 +1,76 @@
 import express from 'express';
 import axios from 'axios';
 import Prediction from '../models/Prediction.js';
+import Student from '../models/Student.js';
 import { authMiddleware } from '../middleware/auth.js';
 
 const router = express.Router();
 const ML_BASE_URL = process.env.ML_SERVICE_URL || 'http://localhost:8000';
+// Predictions written per insertMany call while a cohort job streams in.
+const COHORT_INSERT_BATCH = 1000;
+
+const mlUrl = (path) => `${ML_BASE_URL.replace(/\/$/, '')}${path}`;
+
+// Map form/Student fields onto the FastAPI StudentInput schema.
+const toMlInput = (payload) => {
+  const normalizedGender =
+    (payload.gender || '').toLowerCase() === 'female' ? 'Female' : 'Male';
+  const normalizedDepartment = (payload.department || 'CSE').toUpperCase();
+  const normalizedPartTime = payload.hasPartTimeJob === 'yes' ? 'Yes' : 'No';
+  const semester = Math.min(8, Math.max(1, Math.round(payload.currentGPA || 1)));
+
+  return {
+    Student_Name: payload.studentName,
+    Enrollment_No: payload.enrollmentNumber,
+    Semester: semester,
+    Department: normalizedDepartment,
+    Age: payload.age,
+    Gender: normalizedGender,
+    G1_Internal: payload.midsem1Marks,
+    G2_Internal: payload.midsem2Marks,
+    Final_Exam_Score: payload.comprehensiveExamMarks,
+    Attendance_Percentage: payload.attendancePercentage,
+    Study_Hours_Per_Week: payload.studyHoursPerWeek,
+    Backlogs: payload.totalBacklogs,
+    Part_Time_Work: normalizedPartTime,
+    Previous_CGPA: payload.currentGPA,
+    // Student documents have no parentEducationLevel; use the ML service's
+    // StudentInput default explicitly so inputData records what was scored.
+    Parent_Education_Level: payload.parentEducationLevel || 'Graduate',
+    Academic_Risk_Level: 'Medium'
+  };
+};
+
+const toInputData = (mlInput) => ({
+  semester: mlInput.Semester,
+  department: mlInput.Department,
+  age: mlInput.Age,
+  gender: mlInput.Gender,
+  attendance_percentage: mlInput.Attendance_Percentage,
+  study_hours_per_week: mlInput.Study_Hours_Per_Week,
+  backlogs: mlInput.Backlogs,
+  part_time_work: mlInput.Part_Time_Work,
+  previous_cgpa: mlInput.Previous_CGPA,
+  avg_exam_marks: (mlInput.G1_Internal + mlInput.G2_Internal + mlInput.Final_Exam_Score) / 3,
+  g1_internal: mlInput.G1_Internal,
+  g2_internal: mlInput.G2_Internal,
+  final_exam_score: mlInput.Final_Exam_Score,
+  parent_education_level: mlInput.Parent_Education_Level
+});
+
+// Yield parsed NDJSON objects from a readable stream as lines arrive.
+async function* ndjsonLines(stream) {
+  let buffered = '';
+  for await (const chunk of stream) {
+    buffered += chunk.toString('utf8');
+    const lines = buffered.split('\n');
+    buffered = lines.pop();
+    for (const line of lines) {
+      if (line.trim()) yield JSON.parse(line);
+    }
+  }
+  if (buffered.trim()) yield JSON.parse(buffered);
+}
 
 // Get all predictions for a faculty
 router.get('/', authMiddleware, async (req, res) => {
@@ -77,60 +143,17 @@ router.post('/', authMiddleware, async (req, res) => {
       });
     }
 
-    // Calculate average exam marks
-    const avgExamMarks =
-      (payload.midsem1Marks + payload.midsem2Marks + payload.comprehensiveExamMarks) / 3;
-
     // Prepare data for ML service (match FastAPI schema)
-    const normalizedGender =
-      (payload.gender || '').toLowerCase() === 'female' ? 'Female' : 'Male';
-    const normalizedDepartment = (payload.department || 'CSE').toUpperCase();
-    const normalizedPartTime = payload.hasPartTimeJob === 'yes' ? 'Yes' : 'No';
-    const semester = Math.min(8, Math.max(1, Math.round(payload.currentGPA || 1)));
-    const normalizedParentEducation = payload.parentEducationLevel;
-
-    const mlInput = {
-      Student_Name: payload.studentName,
-      Enrollment_No: payload.enrollmentNumber,
-      Semester: semester,
-      Department: normalizedDepartment,
-      Age: payload.age,
-      Gender: normalizedGender,
-      G1_Internal: payload.midsem1Marks,
-      G2_Internal: payload.midsem2Marks,
-      Final_Exam_Score: payload.comprehensiveExamMarks,
-      Attendance_Percentage: payload.attendancePercentage,
-      Study_Hours_Per_Week: payload.studyHoursPerWeek,
-      Backlogs: payload.totalBacklogs,
-      Part_Time_Work: normalizedPartTime,
-      Previous_CGPA: payload.currentGPA,
-      Parent_Education_Level: normalizedParentEducation,
-      Academic_Risk_Level: 'Medium'
-    };
+    const mlInput = toMlInput(payload);
 
     // Call ML microservice
-    const mlResponse = await axios.post(`${ML_BASE_URL.replace(/\/$/, '')}/predict`, mlInput);
+    const mlResponse = await axios.post(mlUrl('/predict'), mlInput);
 
     // Save prediction to database
     const prediction = new Prediction({
       facultyId: req.facultyId,
       studentName: studentName,
-      inputData: {
-        semester: mlInput.Semester,
-        department: mlInput.Department,
-        age: mlInput.Age,
-        gender: mlInput.Gender,
-        attendance_percentage: mlInput.Attendance_Percentage,
-        study_hours_per_week: mlInput.Study_Hours_Per_Week,
-        backlogs: mlInput.Backlogs,
-        part_time_work: mlInput.Part_Time_Work,
-        previous_cgpa: mlInput.Previous_CGPA,
-        avg_exam_marks: avgExamMarks,
-        g1_internal: mlInput.G1_Internal,
-        g2_internal: mlInput.G2_Internal,
-        final_exam_score: mlInput.Final_Exam_Score,
-        parent_education_level: mlInput.Parent_Education_Level
-      },
+      inputData: toInputData(mlInput),
       predictedCGPA: mlResponse.data.predicted_CGPA ?? mlResponse.data.predicted_cgpa,
       academicRiskLevel: mlResponse.data.academic_risk_level || mlResponse.data.academicRiskLevel,
       confidence: mlResponse.data.confidence || mlResponse.data.confidence_score || 0.75
@@ -159,6 +182,76 @@ router.post('/', authMiddleware, async (req, res) => {
   }
 });
 
+// Score all of the faculty's students (or the given studentIds) in one ML
+// cohort job and bulk-insert the predictions as the results stream in.
+router.post('/cohort', authMiddleware, async (req, res) => {
+  try {
+    const query = { facultyId: req.facultyId };
+    if (Array.isArray(req.body.studentIds)) {
+      query._id = { $in: req.body.studentIds };
+    }
+    const students = await Student.find(query).lean();
+    if (!students.length) {
+      return res.json({ message: 'No students to score', inserted: 0, failed: [] });
+    }
+
+    const mlInputs = students.map(toMlInput);
+    const mlResponse = await axios.post(
+      mlUrl('/cohort/score'),
+      { students: mlInputs },
+      { responseType: 'stream' }
+    );
+
+    let pending = [];
+    let inserted = 0;
+    let summary = null;
+    const failed = [];
+    const flush = async () => {
+      if (!pending.length) return;
+      const docs = pending;
+      pending = [];
+      await Prediction.insertMany(docs, { ordered: false });
+      inserted += docs.length;
+    };
+
+    for await (const line of ndjsonLines(mlResponse.data)) {
+      if (line.type === 'result') {
+        const student = students[line.index];
+        if (line.error) {
+          failed.push({ studentId: student._id, enrollmentNumber: student.enrollmentNumber, error: line.error });
+          continue;
+        }
+        pending.push({
+          facultyId: req.facultyId,
+          studentId: student._id,
+          studentName: student.studentName,
+          inputData: toInputData(mlInputs[line.index]),
+          predictedCGPA: line.predicted_CGPA,
+          academicRiskLevel: line.academic_risk_level
+        });
+        if (pending.length >= COHORT_INSERT_BATCH) await flush();
+      } else if (line.type === 'done' || line.type === 'failed') {
+        summary = line;
+      }
+    }
+    await flush();
+
+    if (!summary || summary.type === 'failed') {
+      return res.status(502).json({ error: 'Cohort scoring failed', detail: summary, inserted, failed });
+    }
+    res.status(201).json({
+      message: 'Cohort scored',
+      jobId: summary.job_id,
+      inserted,
+      failed,
+      rowsPerSecond: summary.rows_per_second
+    });
+  } catch (error) {
+    console.error('Cohort prediction error:', error.message);
+    res.status(500).json({ error: 'Cohort prediction failed', detail: error.message });
+  }
+});
+
 // Get prediction by ID
 router.get('/:id', authMiddleware, async (req, res) => {
   try {
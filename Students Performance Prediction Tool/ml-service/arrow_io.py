@@ -0,0 +1,31 @@
+"""Arrow IPC stream encoding for the columnar bulk endpoint."""
+import pandas as pd
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+except ImportError:  # The Arrow endpoint is optional.
+    pyarrow = None
+
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+
+def read_stream(body: bytes) -> pd.DataFrame:
+    """Decode an Arrow IPC stream into a DataFrame; raises ValueError if it is not one."""
+    try:
+        table = pyarrow.ipc.open_stream(pyarrow.py_buffer(body)).read_all()
+    except pyarrow.ArrowInvalid as e:
+        raise ValueError(f"Body is not an Arrow IPC stream: {e}") from e
+    return table.to_pandas()
+
+
+def write_stream(df: pd.DataFrame) -> bytes:
+    table = pyarrow.Table.from_pandas(df, preserve_index=False)
+    sink = pyarrow.BufferOutputStream()
+    with pyarrow.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def is_numeric_column(df: pd.DataFrame, col: str) -> bool:
+    return pd.api.types.is_numeric_dtype(df[col]) or df[col].isna().all()
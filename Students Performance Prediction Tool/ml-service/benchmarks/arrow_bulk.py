@@ -0,0 +1,59 @@
+"""Compare scoring a cohort through /predict/batch (JSON) and /predict/arrow (Arrow IPC).
+
+Sends the same synthetic cohort both ways in-process and reports the client's
+wall time next to the server's validation/decoding time, which is what the
+columnar path removes: the JSON path builds a StudentInput per row. The
+prediction cache is disabled so both paths run the models.
+
+Run from the ml-service directory:
+
+    python -m benchmarks.arrow_bulk --rows 10000
+"""
+import argparse
+import logging
+import time
+
+from fastapi.testclient import TestClient
+
+import ml_api
+from arrow_io import ARROW_STREAM_MEDIA_TYPE, write_stream
+from benchmarks.synthetic import synthetic_students
+
+
+def validation_seconds() -> float:
+    return ml_api.stage_seconds.labels("validation").snapshot()["sum"]
+
+
+def timed(fn):
+    before = validation_seconds()
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start, validation_seconds() - before
+
+
+def run(rows: int):
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    ml_api.prediction_cache.max_entries = 0
+    client = TestClient(ml_api.app)
+    df = synthetic_students(rows)
+
+    def post_json():
+        records = df.astype(object).where(df.notna(), None).to_dict(orient="records")
+        client.post("/predict/batch", json={"students": records}).raise_for_status()
+
+    def post_arrow():
+        body = write_stream(df)
+        response = client.post("/predict/arrow", content=body, headers={"content-type": ARROW_STREAM_MEDIA_TYPE})
+        response.raise_for_status()
+
+    print(f"rows: {rows}")
+    print(f"{'path':<8}{'total s':>9}{'validation s':>14}")
+    for name, fn in (("json", post_json), ("arrow", post_arrow)):
+        total, validation = timed(fn)
+        print(f"{name:<8}{total:>9.3f}{validation:>14.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10000)
+    run(parser.parse_args().rows)
@@ -0,0 +1,86 @@
+"""Compare worker startup time and memory for compressed vs mmap model artifacts.
+
+Starts N worker processes per format at the same time, has each load the
+models through the registry, and reports load time plus RSS and PSS once all
+workers are resident. PSS splits shared pages between the processes mapping
+them, so it shows what each extra worker really costs.
+
+Run from the ml-service directory:
+
+    python -m benchmarks.artifact_startup --workers 4
+"""
+import argparse
+import multiprocessing as mp
+import os
+import statistics
+import time
+
+import joblib
+
+from model_registry import ARTIFACTS, MODEL_DIR, ModelRegistry, mmap_filename, process_rss_bytes
+
+
+def process_pss_bytes() -> int:
+    try:
+        with open("/proc/self/smaps_rollup") as fh:
+            for line in fh:
+                if line.startswith("Pss:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return 0
+
+
+def ensure_mmap_artifacts():
+    """Write *.mmap.pkl copies of artifacts trained before the format existed."""
+    for name in ("gpa", "dropout"):
+        filename, _ = ARTIFACTS[name]
+        mmap_path = os.path.join(MODEL_DIR, mmap_filename(filename))
+        if not os.path.exists(mmap_path):
+            print(f"writing {mmap_path}")
+            joblib.dump(joblib.load(os.path.join(MODEL_DIR, filename)), mmap_path)
+
+
+def _worker(artifact_format, loaded, done, results):
+    start = time.perf_counter()
+    ModelRegistry(artifact_format=artifact_format).bundle()
+    load_seconds = time.perf_counter() - start
+    loaded.wait()
+    results.put((load_seconds, process_rss_bytes(), process_pss_bytes()))
+    done.wait()
+
+
+def measure(artifact_format: str, workers: int):
+    ctx = mp.get_context("spawn")
+    loaded, done = ctx.Barrier(workers), ctx.Barrier(workers + 1)
+    results = ctx.Queue()
+    procs = [ctx.Process(target=_worker, args=(artifact_format, loaded, done, results)) for _ in range(workers)]
+    for p in procs:
+        p.start()
+    rows = [results.get() for _ in procs]
+    done.wait()
+    for p in procs:
+        p.join()
+    return rows
+
+
+def run(workers: int):
+    ensure_mmap_artifacts()
+    mib = 1024 * 1024
+    print(f"workers: {workers}")
+    print(f"{'format':<12}{'load p50 (s)':>14}{'load max (s)':>14}{'RSS/worker':>14}{'PSS/worker':>14}{'PSS total':>14}")
+    for artifact_format in ("compressed", "mmap"):
+        rows = measure(artifact_format, workers)
+        loads = [r[0] for r in rows]
+        rss = statistics.mean(r[1] for r in rows) / mib
+        pss = [r[2] / mib for r in rows]
+        print(
+            f"{artifact_format:<12}{statistics.median(loads):>14.2f}{max(loads):>14.2f}"
+            f"{rss:>11.0f}MiB{statistics.mean(pss):>11.0f}MiB{sum(pss):>11.0f}MiB"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=4)
+    run(parser.parse_args().workers)
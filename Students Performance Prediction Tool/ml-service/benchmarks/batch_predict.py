@@ -0,0 +1,65 @@
+"""Compare looping over /predict with a single /predict/batch call.
+
+Run from the ml-service directory:
+
+    python -m benchmarks.batch_predict --rows 2000
+"""
+import argparse
+import logging
+import time
+
+from fastapi.testclient import TestClient
+
+from load_data import load_dataset
+from ml_api import app, prediction_cache
+
+
+def sample_students(rows: int, seed: int = 0):
+    df = load_dataset()
+    if df is None:
+        raise RuntimeError("Dataset not found")
+    sample = df.drop(columns=["predicted_CGPA"]).sample(n=rows, replace=rows > len(df), random_state=seed)
+    # Missing cells (NaN, or NA in the nullable columns) are not valid JSON; send them as null.
+    sample = sample.astype(object).where(sample.notna(), None)
+    return sample.to_dict(orient="records")
+
+
+def outputs(result):
+    """A result's predictions, or None for a row that was rejected."""
+    if result is None or "predicted_CGPA" not in result:
+        return None
+    return result["predicted_CGPA"], result["academic_risk_level"]
+
+
+def run(rows: int):
+    # Keep per-request INFO logging out of both measurements.
+    logging.getLogger("ml_api").setLevel(logging.WARNING)
+    # Otherwise the batch call would be served from what the loop just cached.
+    prediction_cache.max_entries = 0
+    client = TestClient(app)
+    students = sample_students(rows)
+
+    start = time.perf_counter()
+    single = [client.post("/predict", json=s).json() for s in students]
+    loop_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = client.post("/predict/batch", json={"students": students}).json()
+    batch_seconds = time.perf_counter() - start
+
+    # Rows with nulls in required fields are rejected by both; compare by row index.
+    batched = {r["index"]: r for r in batch["results"]}
+    mismatches = sum(outputs(a) != outputs(batched.get(i)) for i, a in enumerate(single))
+
+    print(f"rows:              {rows}")
+    print(f"loop /predict:     {loop_seconds:.3f}s  ({rows / loop_seconds:,.0f} rows/s)")
+    print(f"/predict/batch:    {batch_seconds:.3f}s  ({rows / batch_seconds:,.0f} rows/s)")
+    print(f"speedup:           {loop_seconds / batch_seconds:.1f}x")
+    print(f"mismatched rows:   {mismatches}")
+    print(f"rejected rows:     {len(batch['errors'])}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000)
+    run(parser.parse_args().rows)
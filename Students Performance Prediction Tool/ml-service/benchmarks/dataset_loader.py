@@ -0,0 +1,75 @@
+"""Compare loading the student dataset from CSV against the typed Parquet cache.
+
+The dataset is replicated ``--scale`` times into a temporary directory, then
+loaded four ways: plain ``pd.read_csv`` with inferred dtypes (the old loader),
+``read_csv`` with the explicit schema, a cold ``load_table`` call that builds
+the Parquet cache, and a warm one that reads it. Reports the best of
+``--repeats`` wall times and the frame's deep memory usage.
+
+Run from the ml-service directory:
+
+    python -m benchmarks.dataset_loader --scale 50
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import pandas as pd
+
+from load_data import DATASET_DIR, load_table, pyarrow, read_csv_typed
+
+
+def best_of(fn, repeats: int):
+    best, result = float("inf"), None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def run(scale: int, repeats: int):
+    if pyarrow is None:
+        raise SystemExit("This benchmark needs pyarrow (pip install pyarrow).")
+    source = os.path.join(DATASET_DIR, "StudentData.csv")
+    tmp = tempfile.mkdtemp(prefix="dataset-loader-")
+    try:
+        path = os.path.join(tmp, "StudentData.csv")
+        with open(source) as src, open(path, "w") as dst:
+            header, *lines = src.readlines()
+            dst.write(header)
+            for _ in range(scale):
+                dst.writelines(lines)
+        cache_dir = os.path.join(tmp, "cache")
+
+        def cold():
+            shutil.rmtree(cache_dir, ignore_errors=True)
+            return load_table(path, cache_dir)
+
+        cases = [
+            ("csv, inferred dtypes", lambda: pd.read_csv(path)),
+            ("csv, typed schema", lambda: read_csv_typed(path)),
+            ("parquet cache, cold", cold),
+            ("parquet cache, warm", lambda: load_table(path, cache_dir)),
+        ]
+        print(f"rows: {len(lines) * scale:,}   csv size: {os.path.getsize(path) / 2**20:.1f} MiB")
+        print(f"{'loader':<24} {'seconds':>8} {'memory MiB':>11}")
+        baseline = None
+        for name, fn in cases:
+            seconds, df = best_of(fn, repeats)
+            memory = df.memory_usage(deep=True).sum() / 2**20
+            baseline = baseline or seconds
+            print(f"{name:<24} {seconds:>8.3f} {memory:>11.1f}   ({baseline / seconds:.1f}x)")
+        print(f"parquet file: {os.path.getsize(os.path.join(cache_dir, 'StudentData.parquet')) / 2**20:.1f} MiB")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=int, default=20, help="copies of the dataset to load")
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+    run(args.scale, args.repeats)
@@ -0,0 +1,59 @@
+"""Measure what per-feature explanations cost relative to plain prediction.
+
+Scores synthetic cohorts of several sizes with the active models, once with
+``pipeline.run`` and once with the explainer (both models' contributions,
+formatted per row), checks that every explanation adds up to its
+prediction, and reports the time of each and their ratio. The one-off cost
+of building the explainer for a model version is reported separately.
+
+Run from the ml-service directory:
+
+    python -m benchmarks.explanations --rows 1 100 1000 10000
+"""
+import argparse
+import time
+
+import explain
+from benchmarks.synthetic import synthetic_students
+from model_registry import registry
+
+
+def best_of(fn, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def run(row_counts, repeat: int):
+    models = registry.bundle()
+    explain.forget()
+    start = time.perf_counter()
+    explainer = explain.explainer_for(models)
+    print(f"model version: {models.version} (engine: {models.engine})")
+    print(f"explainer build: {(time.perf_counter() - start) * 1e3:.1f} ms, once per version")
+
+    print(f"{'rows':>8}{'predict ms':>12}{'explain ms':>12}{'ratio':>8}{'max |sum - pred|':>18}")
+    for rows in row_counts:
+        X, _ = models.plan.encode_frame(synthetic_students(rows))
+        predicted_cgpa, _ = models.pipeline.run(X)
+        explanations = explainer.explain(X)
+        # Contributions are rounded to 4 places, so allow for that per feature.
+        drift = max(
+            abs(e["predicted_CGPA"]["base_value"] + sum(e["predicted_CGPA"]["contributions"].values()) - cgpa)
+            for e, cgpa in zip(explanations, predicted_cgpa)
+        )
+
+        predict = best_of(lambda: models.pipeline.run(X), repeat)
+        explained = best_of(lambda: explainer.explain(X), repeat)
+        print(f"{rows:>8}{predict * 1e3:>12.2f}{explained * 1e3:>12.2f}{explained / predict:>7.1f}x{drift:>18.4f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1, 100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per size; the best is reported")
+    args = parser.parse_args()
+    run(args.rows, args.repeat)
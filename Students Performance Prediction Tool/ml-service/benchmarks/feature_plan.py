@@ -0,0 +1,99 @@
+"""Microbenchmark the per-request pandas preprocessing against FeaturePlan.
+
+Run from the ml-service directory:
+
+    python -m benchmarks.feature_plan --rows 2000
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from load_data import load_dataset
+from ml_api import StudentInput
+from model_registry import registry
+
+models = registry.bundle()
+feature_plan = models.plan
+label_encoders = models.label_encoders
+expected_gpa_features = models.gpa_features
+expected_dropout_features = models.dropout_features
+
+CATEGORICAL_FIELDS = ["Gender", "Department", "Part_Time_Work", "Parent_Education_Level", "Semester", "Academic_Risk_Level"]
+
+
+def legacy_preprocess(data: dict) -> pd.DataFrame:
+    """The DataFrame-per-request path ml_api used before FeaturePlan, kept as the baseline."""
+    df = pd.DataFrame([data])
+
+    for col in CATEGORICAL_FIELDS:
+        encoder = label_encoders.get(col)
+        if encoder is None:
+            continue
+        default_value = (
+            "Medium" if col == "Academic_Risk_Level" and "Medium" in encoder.classes_ else encoder.classes_[0]
+        )
+        if col not in df.columns or df[col].isna().all():
+            df[col] = encoder.transform([default_value])[0]
+            continue
+        df[col] = df[col].replace({None: default_value, "": default_value}).fillna(default_value)
+        df[col] = encoder.transform(df[col].astype(str))
+
+    df.fillna(0, inplace=True)
+    for col in df.columns:
+        if df[col].dtype == object:
+            df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0)
+
+    for col in set(expected_gpa_features + expected_dropout_features):
+        if col not in df.columns:
+            df[col] = 0
+        df[col] = df[col].fillna(0)
+    return df
+
+
+def legacy_matrices(data: dict):
+    df = legacy_preprocess(data)
+    X_gpa = df.reindex(columns=expected_gpa_features, fill_value=0).astype(float)
+    X_dropout = df.reindex(columns=expected_dropout_features, fill_value=0).astype(float)
+    return X_gpa.to_numpy(), X_dropout.to_numpy()
+
+
+def plan_matrices(data: dict):
+    X = feature_plan.encode_row(data)[np.newaxis, :]
+    return feature_plan.gpa_matrix(X), feature_plan.dropout_matrix(X)
+
+
+def time_per_row(fn, rows) -> float:
+    start = time.perf_counter()
+    for row in rows:
+        fn(row)
+    return (time.perf_counter() - start) / len(rows) * 1e6
+
+
+def run(rows: int):
+    df = load_dataset()
+    if df is None:
+        raise RuntimeError("Dataset not found")
+    records = df.drop(columns=["predicted_CGPA"]).sample(n=rows, replace=rows > len(df), random_state=0)
+    students = [StudentInput.model_validate(r).model_dump() for r in records.to_dict(orient="records")]
+
+    mismatches = 0
+    for s in students:
+        (a_gpa, a_drop), (b_gpa, b_drop) = legacy_matrices(s), plan_matrices(s)
+        mismatches += not (np.array_equal(a_gpa, b_gpa) and np.array_equal(a_drop, b_drop))
+
+    before = time_per_row(legacy_matrices, students)
+    after = time_per_row(plan_matrices, students)
+
+    print(f"rows:                {rows}")
+    print(f"pandas preprocess:   {before:,.1f} us/row")
+    print(f"FeaturePlan:         {after:,.1f} us/row")
+    print(f"speedup:             {before / after:.1f}x")
+    print(f"mismatched rows:     {mismatches}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000)
+    run(parser.parse_args().rows)
@@ -0,0 +1,63 @@
+"""Compare the fused InferencePipeline against the two-stage matrix path it replaced.
+
+The old path copied the GPA columns out of the encoded matrix, predicted,
+copied the dropout columns into a second matrix and predicted again, each
+copy in float64 that the forest then converted to float32. Checks that both
+give identical outputs on the dataset, then reports p50 latency per batch size.
+
+Run from the ml-service directory:
+
+    python -m benchmarks.fused_pipeline --repeats 300
+"""
+import argparse
+import time
+
+import numpy as np
+
+from load_data import load_dataset
+from model_registry import ModelBundle, registry
+
+
+def two_stage(models: ModelBundle, X: np.ndarray):
+    predicted_cgpa = models.gpa_model.predict(models.plan.gpa_matrix(X))
+    X_dropout = models.plan.dropout_matrix(X, predicted_cgpa)
+    return predicted_cgpa, models.pipeline.decode(models.dropout_model.predict(X_dropout))
+
+
+def p50_ms(fn, X: np.ndarray, batch: int, repeats: int) -> float:
+    rng = np.random.default_rng(0)
+    samples = np.empty(repeats)
+    for i in range(repeats):
+        rows = X[rng.integers(0, len(X), size=batch)]
+        start = time.perf_counter()
+        fn(rows)
+        samples[i] = time.perf_counter() - start
+    return float(np.median(samples) * 1e3)
+
+
+def run(repeats: int, batches):
+    df = load_dataset()
+    if df is None:
+        raise RuntimeError("Dataset not found")
+    models = registry.bundle()
+    X, _ = models.plan.encode_frame(df)
+
+    old_cgpa, old_labels = two_stage(models, X)
+    new_cgpa, new_labels = models.pipeline.run(X)
+    mismatched = int(np.sum(old_cgpa != new_cgpa)) + sum(a != b for a, b in zip(old_labels, new_labels))
+    print(f"engine: {models.engine}   shared buffer: {models.pipeline.shared_buffer}")
+    print(f"mismatched outputs on {len(X)} rows: {mismatched}")
+
+    print(f"{'batch':>6} {'two-stage ms':>13} {'pipeline ms':>12}")
+    for batch in batches:
+        before = p50_ms(lambda rows: two_stage(models, rows), X, batch, repeats)
+        after = p50_ms(models.pipeline.run, X, batch, repeats)
+        print(f"{batch:>6} {before:>13.3f} {after:>12.3f}   ({before / after:.2f}x)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeats", type=int, default=300)
+    parser.add_argument("--batches", type=int, nargs="+", default=[1, 16, 256, 4096])
+    args = parser.parse_args()
+    run(args.repeats, args.batches)
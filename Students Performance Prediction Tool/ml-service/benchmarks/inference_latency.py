@@ -0,0 +1,75 @@
+"""Validate the flat forest engine against sklearn and compare scoring latency.
+
+First checks that both engines agree bit-for-bit on every row of
+dataset/StudentData.csv (GPA predictions, risk predictions and risk
+probabilities), then reports p50/p99 latency of the full GPA -> risk chain
+for single rows and small batches.
+
+Run from the ml-service directory:
+
+    python -m benchmarks.inference_latency --repeats 500
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from forest_engine import mismatches
+from load_data import load_dataset
+from model_registry import ModelBundle, ModelRegistry, registry
+
+
+def validate(models: ModelBundle, flat: ModelBundle, X: np.ndarray) -> int:
+    X_gpa = models.plan.gpa_matrix(X)
+    X_dropout = models.plan.dropout_matrix(X, models.gpa_model.predict(X_gpa))
+    checks = [
+        ("gpa predict", mismatches(models.gpa_model, flat.gpa_model, X_gpa)),
+        ("risk predict", mismatches(models.dropout_model, flat.dropout_model, X_dropout)),
+        ("risk predict_proba", mismatches(models.dropout_model, flat.dropout_model, X_dropout, "predict_proba")),
+    ]
+    for name, count in checks:
+        print(f"{name:<20} {count} mismatched rows of {len(X)}")
+    return sum(count for _, count in checks)
+
+
+def latencies(bundle: ModelBundle, X: np.ndarray, batch: int, repeats: int) -> np.ndarray:
+    rng = np.random.default_rng(0)
+    samples = np.empty(repeats)
+    for i in range(repeats):
+        rows = X[rng.integers(0, len(X), size=batch)]
+        start = time.perf_counter()
+        bundle.score(rows)
+        samples[i] = time.perf_counter() - start
+    return samples * 1e3
+
+
+def run(repeats: int, batches):
+    df = load_dataset()
+    if df is None:
+        raise RuntimeError("Dataset not found")
+    models = registry.bundle()
+    # A registry of its own: the shared one only keeps flat copies under the flat engine.
+    source = ModelRegistry(engine="sklearn")
+    gpa_model, dropout_model, encoders = (source.get(n, models.version) for n in ("gpa", "dropout", "encoders"))
+    flat = ModelBundle(models.version, gpa_model, dropout_model, encoders, engine="flat")
+    sklearn = ModelBundle(models.version, gpa_model, dropout_model, encoders, engine="sklearn")
+    X, _ = models.plan.encode_frame(df)
+
+    if validate(sklearn, flat, X):
+        print("flat engine does not match sklearn; not benchmarking")
+        sys.exit(1)
+
+    print(f"\n{'engine':<10}{'rows':>6}{'p50 (ms)':>12}{'p99 (ms)':>12}")
+    for batch in batches:
+        for name, bundle in (("sklearn", sklearn), ("flat", flat)):
+            ms = latencies(bundle, X, batch, repeats if name == "flat" else max(repeats // 10, 20))
+            print(f"{name:<10}{batch:>6}{np.percentile(ms, 50):>12.3f}{np.percentile(ms, 99):>12.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeats", type=int, default=500)
+    parser.add_argument("--batches", type=int, nargs="+", default=[1, 16])
+    args = parser.parse_args()
+    run(args.repeats, args.batches)
@@ -0,0 +1,72 @@
+"""Load-test /predict with and without the micro-batcher under concurrency.
+
+Drives the app in-process over ASGI with N concurrent clients, each sending
+requests back to back, and reports throughput and latency percentiles. The
+prediction cache is disabled so every request reaches the models.
+
+Run from the ml-service directory:
+
+    python -m benchmarks.microbatch_load --requests 2000 --concurrency 1 16 64 256
+"""
+import argparse
+import asyncio
+import logging
+import time
+
+import httpx
+import numpy as np
+
+import ml_api
+from benchmarks.synthetic import synthetic_students
+from config import MICRO_BATCH_MAX_SIZE, MICRO_BATCH_MAX_WAIT_MS
+from micro_batcher import MicroBatcher
+
+
+async def drive(payloads, concurrency: int):
+    latencies = []
+    queue = iter(payloads)
+    transport = httpx.ASGITransport(app=ml_api.app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://ml") as client:
+
+        async def worker():
+            for payload in queue:
+                start = time.perf_counter()
+                response = await client.post("/predict", json=payload)
+                latencies.append(time.perf_counter() - start)
+                response.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return elapsed, np.array(latencies) * 1e3
+
+
+def run(requests: int, levels, max_batch_size: int, max_wait_ms: float):
+    logging.getLogger("ml_api").setLevel(logging.WARNING)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    ml_api.prediction_cache.max_entries = 0
+    payloads = synthetic_students(requests).to_dict(orient="records")
+    batcher = MicroBatcher(ml_api.score_rows, max_batch_size, max_wait_ms)
+
+    print(f"requests: {requests}  max batch: {max_batch_size}  max wait: {max_wait_ms} ms")
+    print(f"{'mode':<10}{'clients':>8}{'req/s':>10}{'p50 (ms)':>10}{'p99 (ms)':>10}")
+    for concurrency in levels:
+        for mode, active in (("direct", None), ("batched", batcher)):
+            ml_api.micro_batcher = active
+            elapsed, ms = asyncio.run(drive(payloads, concurrency))
+            print(
+                f"{mode:<10}{concurrency:>8}{requests / elapsed:>10,.0f}"
+                f"{np.percentile(ms, 50):>10.1f}{np.percentile(ms, 99):>10.1f}"
+            )
+    print("\nbatch sizes:", batcher.stats()["batch_size"]["buckets"])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 64, 256])
+    parser.add_argument("--max-batch-size", type=int, default=MICRO_BATCH_MAX_SIZE)
+    parser.add_argument("--max-wait-ms", type=float, default=MICRO_BATCH_MAX_WAIT_MS)
+    args = parser.parse_args()
+    run(args.requests, args.concurrency, args.max_batch_size, args.max_wait_ms)
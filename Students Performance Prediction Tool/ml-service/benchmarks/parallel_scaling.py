@@ -0,0 +1,48 @@
+"""Measure ScoringPool throughput from 1 to N worker processes.
+
+Builds a synthetic dataset (default 1M rows) from the distributions in
+StudentData.csv and scores it with an increasing number of workers.
+
+Run from the ml-service directory:
+
+    python -m benchmarks.parallel_scaling --rows 1000000 --max-workers 8
+"""
+import argparse
+import os
+import time
+
+from benchmarks.synthetic import synthetic_students
+from bulk_score import ScoringPool
+
+
+def worker_counts(max_workers: int):
+    counts, n = [], 1
+    while n < max_workers:
+        counts.append(n)
+        n *= 2
+    return counts + [max_workers]
+
+
+def run(rows: int, max_workers: int, chunk_size: int):
+    df = synthetic_students(rows)
+    print(f"rows: {rows:,}  chunk size: {chunk_size:,}  cpus: {os.cpu_count()}")
+    print(f"{'workers':>8}{'seconds':>10}{'rows/s':>12}{'speedup':>10}")
+
+    baseline = None
+    for workers in worker_counts(max_workers):
+        with ScoringPool(workers, chunk_size) as pool:
+            start = time.perf_counter()
+            scored = pool.score(df)
+            seconds = time.perf_counter() - start
+        assert len(scored) == rows and (scored["Enrollment_No"].to_numpy() == df["Enrollment_No"].to_numpy()).all()
+        baseline = baseline or seconds
+        print(f"{workers:>8}{seconds:>10.2f}{rows / seconds:>12,.0f}{baseline / seconds:>9.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=20_000)
+    args = parser.parse_args()
+    run(args.rows, args.max_workers, args.chunk_size)
@@ -0,0 +1,257 @@
+"""Regression benchmark suite for the ML service.
+
+Measures, on synthetic students drawn from dataset/StudentData.csv:
+
+* /predict throughput and p50/p95/p99 latency at several concurrency levels,
+  against the app in-process over ASGI or under a local uvicorn server;
+* ``preprocess_input`` per-call time;
+* model load time and resident memory, in a fresh process.
+
+Results are written as JSON. Given ``--baseline``, every metric is compared
+with the saved run and the suite exits non-zero when any of them is worse by
+more than ``--threshold``. The prediction cache is disabled so every request
+reaches the models.
+
+Run from the ml-service directory:
+
+    python -m benchmarks.suite --save-baseline .cache/benchmarks/baseline.json
+    python -m benchmarks.suite --baseline .cache/benchmarks/baseline.json
+    python -m benchmarks.suite --server uvicorn --concurrency 1 8 32
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import logging
+import multiprocessing as mp
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+import numpy as np
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(SERVICE_DIR, ".cache", "benchmarks")
+
+
+def metric(value: float, unit: str, better: str) -> dict:
+    return {"value": round(float(value), 4), "unit": unit, "better": better}
+
+
+async def drive(client: httpx.AsyncClient, payloads, concurrency: int):
+    latencies = []
+    queue = iter(payloads)
+
+    async def worker():
+        for payload in queue:
+            start = time.perf_counter()
+            response = await client.post("/predict", json=payload)
+            latencies.append(time.perf_counter() - start)
+            response.raise_for_status()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return time.perf_counter() - start, np.array(latencies) * 1e3
+
+
+async def load_test(client: httpx.AsyncClient, payloads, levels, warmup: int) -> dict:
+    await drive(client, payloads[:warmup], 1)
+    results = {}
+    for concurrency in levels:
+        elapsed, ms = await drive(client, payloads, concurrency)
+        p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+        results[f"predict.c{concurrency}.throughput"] = metric(len(payloads) / elapsed, "req/s", "higher")
+        results[f"predict.c{concurrency}.p50"] = metric(p50, "ms", "lower")
+        results[f"predict.c{concurrency}.p95"] = metric(p95, "ms", "lower")
+        results[f"predict.c{concurrency}.p99"] = metric(p99, "ms", "lower")
+    return results
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_uvicorn(port: int, timeout: float = 120.0) -> subprocess.Popen:
+    env = {**os.environ, "ML_CACHE_MAX_ENTRIES": "0"}
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "ml_api:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=SERVICE_DIR,
+        env=env,
+    )
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"uvicorn exited with code {proc.returncode}")
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/").status_code == 200:
+                return proc
+        except httpx.TransportError:
+            pass
+        time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError("uvicorn did not come up in time")
+
+
+def bench_predict(server: str, payloads, levels, warmup: int) -> dict:
+    async def run_against(**client_args):
+        async with httpx.AsyncClient(timeout=60.0, **client_args) as client:
+            return await load_test(client, payloads, levels, warmup)
+
+    if server == "inprocess":
+        import ml_api
+
+        ml_api.prediction_cache.max_entries = 0
+        return asyncio.run(run_against(transport=httpx.ASGITransport(app=ml_api.app), base_url="http://ml"))
+
+    port = free_port()
+    proc = start_uvicorn(port)
+    try:
+        return asyncio.run(run_against(base_url=f"http://127.0.0.1:{port}"))
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def bench_preprocess(payloads, repeats: int) -> dict:
+    import ml_api
+
+    plan = ml_api.registry.bundle().plan
+    rows = [ml_api.StudentInput.model_validate(p).model_dump() for p in payloads]
+    samples = np.empty(repeats * len(rows))
+    i = 0
+    for _ in range(repeats):
+        for row in rows:
+            start = time.perf_counter()
+            ml_api.preprocess_input(row, plan)
+            samples[i] = time.perf_counter() - start
+            i += 1
+    us = samples * 1e6
+    return {
+        "preprocess_input.mean": metric(us.mean(), "us", "lower"),
+        "preprocess_input.p50": metric(np.percentile(us, 50), "us", "lower"),
+    }
+
+
+def _load_in_child(results):
+    from model_registry import ModelRegistry, process_rss_bytes
+
+    before = process_rss_bytes()
+    start = time.perf_counter()
+    ModelRegistry().bundle()
+    results.put((time.perf_counter() - start, process_rss_bytes() - before, process_rss_bytes()))
+
+
+def bench_model_load(repeats: int) -> dict:
+    # A fresh spawned process per run, so nothing is already imported or cached.
+    ctx = mp.get_context("spawn")
+    runs = []
+    for _ in range(repeats):
+        results = ctx.Queue()
+        proc = ctx.Process(target=_load_in_child, args=(results,))
+        proc.start()
+        runs.append(results.get())
+        proc.join()
+    seconds, delta, rss = (min(values) for values in zip(*runs))
+    return {
+        "model_load.seconds": metric(seconds, "s", "lower"),
+        "model_load.rss_delta": metric(delta / 2**20, "MiB", "lower"),
+        "model_load.process_rss": metric(rss / 2**20, "MiB", "lower"),
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float):
+    """Print each metric against the baseline; return the names that regressed past ``threshold``."""
+    regressions = []
+    if baseline.get("config") != current["config"] or baseline.get("host") != current["host"]:
+        print("\nnote: the baseline was recorded with a different config or host; expect noise")
+    print(f"\n{'metric':<30}{'baseline':>12}{'current':>12}{'change':>9}")
+    for name, entry in current["metrics"].items():
+        base = baseline["metrics"].get(name)
+        if base is None or base["value"] == 0:
+            print(f"{name:<30}{'-':>12}{entry['value']:>12.3f}")
+            continue
+        change = (entry["value"] - base["value"]) / base["value"]
+        worse = change if entry["better"] == "lower" else -change
+        flag = "  REGRESSION" if worse > threshold else ""
+        if flag:
+            regressions.append(name)
+        print(f"{name:<30}{base['value']:>12.3f}{entry['value']:>12.3f}{change:>+9.1%}{flag}")
+    return regressions
+
+
+def write_json(path: str, data: dict):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as fh:
+        json.dump(data, fh, indent=2)
+
+
+def run(args) -> int:
+    logging.getLogger("ml_api").setLevel(logging.WARNING)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    from benchmarks.synthetic import synthetic_students
+
+    payloads = synthetic_students(args.requests, seed=args.seed).to_dict(orient="records")
+
+    metrics = {}
+    print(f"/predict ({args.server}, {args.requests} requests per level)...", file=sys.stderr)
+    metrics.update(bench_predict(args.server, payloads, args.concurrency, args.warmup))
+    print("preprocess_input...", file=sys.stderr)
+    metrics.update(bench_preprocess(payloads[: args.preprocess_rows], args.preprocess_repeats))
+    print("model load...", file=sys.stderr)
+    metrics.update(bench_model_load(args.load_repeats))
+
+    result = {
+        "created": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "host": {"python": platform.python_version(), "machine": platform.machine(), "cpus": os.cpu_count()},
+        "config": {
+            "server": args.server,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "model_version": os.getenv("ML_MODEL_VERSION") or None,
+            "inference_engine": os.getenv("ML_INFERENCE_ENGINE", "sklearn"),
+        },
+        "metrics": metrics,
+    }
+
+    print(f"\n{'metric':<30}{'value':>12}  unit")
+    for name, entry in metrics.items():
+        print(f"{name:<30}{entry['value']:>12.3f}  {entry['unit']}")
+
+    write_json(args.output, result)
+    print(f"\nresults written to {args.output}")
+    if args.save_baseline:
+        write_json(args.save_baseline, result)
+        print(f"baseline saved to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline) as fh:
+            baseline = json.load(fh)
+        regressions = compare(result, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} metric(s) regressed by more than {args.threshold:.0%}: {', '.join(regressions)}")
+            return 1
+        print(f"\nno regressions beyond {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--server", choices=["inprocess", "uvicorn"], default="inprocess")
+    parser.add_argument("--requests", type=int, default=1000, help="/predict requests per concurrency level")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--preprocess-rows", type=int, default=500)
+    parser.add_argument("--preprocess-repeats", type=int, default=10)
+    parser.add_argument("--load-repeats", type=int, default=3, help="fresh processes timed; the best is kept")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=os.path.join(RESULTS_DIR, "latest.json"))
+    parser.add_argument("--baseline", help="earlier results to compare against")
+    parser.add_argument("--save-baseline", metavar="PATH", help="also save these results as a baseline")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed relative slowdown per metric")
+    sys.exit(run(parser.parse_args()))
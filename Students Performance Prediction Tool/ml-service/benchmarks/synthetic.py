@@ -0,0 +1,36 @@
+"""Synthetic student records drawn from the distributions in StudentData.csv."""
+import numpy as np
+import pandas as pd
+
+from load_data import load_dataset
+
+ID_COLUMNS = ["Student_Name", "Enrollment_No"]
+TARGET_COLUMNS = ["predicted_CGPA", "Academic_Risk_Level"]
+
+
+def synthetic_students(rows: int, seed: int = 0, jitter: float = 0.05) -> pd.DataFrame:
+    """``rows`` records resampled from the dataset with small noise on numeric columns.
+
+    Categorical columns keep their observed frequencies; numeric columns get
+    Gaussian noise scaled to ``jitter`` x their standard deviation, clipped to
+    the observed range and rounded back to integers where the source is integral.
+    """
+    source = load_dataset()
+    if source is None:
+        raise RuntimeError("Dataset not found")
+    rng = np.random.default_rng(seed)
+    df = source.drop(columns=TARGET_COLUMNS).iloc[rng.integers(0, len(source), size=rows)].reset_index(drop=True)
+
+    for col in df.columns:
+        if col in ID_COLUMNS or not pd.api.types.is_numeric_dtype(source[col]):
+            continue
+        values = df[col].to_numpy(dtype=np.float64)
+        values = values + rng.normal(0.0, jitter * source[col].std(), size=rows)
+        values = np.clip(values, source[col].min(), source[col].max())
+        if pd.api.types.is_integer_dtype(source[col]):
+            df[col] = np.rint(values).astype(source[col].dtype)
+        else:
+            df[col] = np.round(values, 2)
+
+    df["Enrollment_No"] = [f"SYN{i:07d}" for i in range(rows)]
+    return df
@@ -0,0 +1,65 @@
+"""Compare one /predict/what-if grid call against a /predict round trip per grid point.
+
+Varies Attendance_Percentage and Study_Hours_Per_Week for one synthetic
+student over an N x M grid, checks that both ways give the same surface,
+and reports wall time for each. The prediction cache is disabled.
+
+Run from the ml-service directory:
+
+    python -m benchmarks.what_if --grid 50 40
+"""
+import argparse
+import logging
+import time
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+import ml_api
+from benchmarks.synthetic import synthetic_students
+
+
+def run(rows: int, cols: int, loop_points: int):
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    ml_api.prediction_cache.max_entries = 0
+    client = TestClient(ml_api.app)
+    student = synthetic_students(1).astype(object).to_dict(orient="records")[0]
+    # Whole numbers, so every grid point is also a valid /predict request.
+    attendance = np.rint(np.linspace(50, 100, rows)).astype(int).tolist()
+    hours = np.rint(np.linspace(0, 39, cols)).astype(int).tolist()
+    body = {
+        "student": student,
+        "axes": [
+            {"feature": "Attendance_Percentage", "values": attendance},
+            {"feature": "Study_Hours_Per_Week", "values": hours},
+        ],
+    }
+
+    start = time.perf_counter()
+    surface = client.post("/predict/what-if", json=body).json()
+    grid_seconds = time.perf_counter() - start
+
+    # Time a sample of per-point requests and extrapolate to the full grid.
+    rng = np.random.default_rng(0)
+    sample = [(int(i), int(j)) for i, j in zip(rng.integers(0, rows, loop_points), rng.integers(0, cols, loop_points))]
+    mismatched = 0
+    start = time.perf_counter()
+    for i, j in sample:
+        point = {**student, "Attendance_Percentage": attendance[i], "Study_Hours_Per_Week": hours[j]}
+        result = client.post("/predict", json=point).json()
+        mismatched += result["predicted_CGPA"] != surface["predicted_CGPA"][i][j]
+        mismatched += result["academic_risk_level"] != surface["academic_risk_level"][i][j]
+    loop_seconds = (time.perf_counter() - start) / loop_points * rows * cols
+
+    print(f"grid: {rows} x {cols} = {rows * cols} points")
+    print(f"mismatches on {loop_points} sampled points: {mismatched}")
+    print(f"one what-if call:     {grid_seconds * 1e3:10.1f} ms")
+    print(f"per-point /predict:   {loop_seconds * 1e3:10.1f} ms (extrapolated)   ({loop_seconds / grid_seconds:.0f}x)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--grid", type=int, nargs=2, default=[50, 40], metavar=("ROWS", "COLS"))
+    parser.add_argument("--loop-points", type=int, default=100, help="per-point requests actually timed")
+    args = parser.parse_args()
+    run(*args.grid, args.loop_points)
@@ -0,0 +1,84 @@
+"""Process-pool scoring for bulk jobs.
+
+Rows are sharded into chunks and scored by a pool of worker processes. The
+models are never sent with the tasks: workers either inherit the parent's
+already-loaded registry through fork (copy-on-write), or, where only spawn is
+available, load it once in the pool initializer (set ML_MODEL_FORMAT=mmap so
+those loads share the page cache). Results come back in input order.
+"""
+import multiprocessing as mp
+import os
+from collections import deque
+from typing import Iterable, Iterator, Optional
+
+import pandas as pd
+
+from model_registry import registry
+from scoring import ID_COLUMNS, score_frame
+
+_worker_state = {}
+
+
+def _init_worker(version: Optional[str], keep_columns, include_proba: bool):
+    _worker_state["models"] = registry.bundle(version)
+    _worker_state["keep_columns"] = keep_columns
+    _worker_state["include_proba"] = include_proba
+
+
+def _score_chunk(chunk: pd.DataFrame) -> pd.DataFrame:
+    return score_frame(
+        _worker_state["models"], chunk, _worker_state["keep_columns"], _worker_state["include_proba"]
+    )
+
+
+class ScoringPool:
+    """Score DataFrames across ``workers`` processes, ``chunk_size`` rows per task."""
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        chunk_size: int = 20_000,
+        version: Optional[str] = None,
+        keep_columns=None,
+        include_proba: bool = False,
+    ):
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.version = version
+        self.keep_columns = ID_COLUMNS if keep_columns is None else keep_columns
+        self.include_proba = include_proba
+        self._pool = None
+
+    def __enter__(self):
+        methods = mp.get_all_start_methods()
+        ctx = mp.get_context("fork" if "fork" in methods else "spawn")
+        if ctx.get_start_method() == "fork":
+            # Load before forking so every worker shares these pages instead of reloading.
+            registry.bundle(self.version)
+        self._pool = ctx.Pool(
+            self.workers, initializer=_init_worker, initargs=(self.version, self.keep_columns, self.include_proba)
+        )
+        return self
+
+    def __exit__(self, *exc):
+        if exc[0] is None:
+            self._pool.close()
+        else:
+            self._pool.terminate()
+        self._pool.join()
+        self._pool = None
+
+    def imap(self, chunks: Iterable[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+        """Score ``chunks`` in order, keeping at most two tasks per worker in flight."""
+        pending = deque()
+        for chunk in chunks:
+            pending.append(self._pool.apply_async(_score_chunk, (chunk,)))
+            if len(pending) >= 2 * self.workers:
+                yield pending.popleft().get()
+        while pending:
+            yield pending.popleft().get()
+
+    def score(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Score a whole frame; the result has one row per input row, in input order."""
+        chunks = (df.iloc[start : start + self.chunk_size] for start in range(0, len(df), self.chunk_size))
+        return pd.concat(list(self.imap(chunks)), ignore_index=True)
@@ -0,0 +1,99 @@
+import numpy as np
+from sklearn.isotonic import IsotonicRegression
+from sklearn.linear_model import LogisticRegression
+
+
+class ProbabilityCalibrator:
+    """One-vs-rest calibration of a fitted classifier's ``predict_proba`` output.
+
+    Fitted once at training time on probabilities the model produced for rows
+    it did not train on (the forest's out-of-bag estimates), so the forest
+    itself is untouched and stays trained on every row. Each class column is
+    mapped through its own isotonic (or sigmoid) curve and the result is
+    renormalised to sum to one, as sklearn's CalibratedClassifierCV does.
+    """
+
+    def __init__(self, method: str = "isotonic"):
+        if method not in ("isotonic", "sigmoid"):
+            raise ValueError(f"Unknown calibration method: '{method}'")
+        self.method = method
+        self.calibrators_ = []
+
+    def fit(self, proba: np.ndarray, y: np.ndarray, classes: np.ndarray) -> "ProbabilityCalibrator":
+        usable = ~np.isnan(proba).any(axis=1)
+        proba, y = proba[usable], np.asarray(y)[usable]
+        self.classes_ = np.asarray(classes)
+        self.calibrators_ = []
+        for i, cls in enumerate(self.classes_):
+            target = (y == cls).astype(np.float64)
+            if self.method == "isotonic":
+                curve = IsotonicRegression(y_min=0.0, y_max=1.0, out_of_bounds="clip").fit(proba[:, i], target)
+            else:
+                curve = LogisticRegression(C=1e6).fit(proba[:, [i]], target)
+            self.calibrators_.append(curve)
+        return self
+
+    def transform(self, proba: np.ndarray) -> np.ndarray:
+        calibrated = np.empty_like(proba, dtype=np.float64)
+        for i, curve in enumerate(self.calibrators_):
+            if self.method == "isotonic":
+                calibrated[:, i] = curve.predict(proba[:, i])
+            else:
+                calibrated[:, i] = curve.predict_proba(proba[:, [i]])[:, 1]
+        totals = calibrated.sum(axis=1, keepdims=True)
+        # A row every curve maps to zero keeps the model's own distribution.
+        empty = totals[:, 0] == 0
+        calibrated[empty] = proba[empty]
+        totals[empty] = 1.0
+        return calibrated / totals
+
+
+def fit_oob_calibrator(model, y, method: str = "isotonic") -> ProbabilityCalibrator:
+    """Calibrate a forest fitted with ``oob_score=True`` from its out-of-bag probabilities."""
+    return ProbabilityCalibrator(method).fit(model.oob_decision_function_, y, model.classes_)
+
+
+def oob_masks(model, n_samples: int, first_tree: int = 0) -> np.ndarray:
+    """(n_trees, n_samples) mask of the training rows each tree's bootstrap sample left out.
+
+    Only trees from ``first_tree`` on are included. A bootstrap is replayed
+    from the tree's seed and ``n_samples``, so it is only right for trees that
+    were fitted on exactly these ``n_samples`` rows.
+    """
+    from sklearn.ensemble._forest import _generate_unsampled_indices, _get_n_samples_bootstrap
+
+    if not getattr(model, "bootstrap", False):
+        raise ValueError("Out-of-bag rows need a bootstrapped forest")
+    estimators = model.estimators_[first_tree:]
+    n_bootstrap = _get_n_samples_bootstrap(n_samples, model.max_samples)
+    masks = np.zeros((len(estimators), n_samples), dtype=bool)
+    for i, est in enumerate(estimators):
+        masks[i, _generate_unsampled_indices(est.random_state, n_samples, n_bootstrap)] = True
+    return masks
+
+
+def fit_replayed_oob_calibrator(model, X, y, first_tree: int = 0, method: str = "isotonic") -> ProbabilityCalibrator:
+    """Calibrate a forest from the out-of-bag probabilities of its trees from ``first_tree`` on.
+
+    ``X``/``y`` are the rows those trees were fitted on, in the same order.
+    For a warm-started forest pass the first new tree: the older trees were
+    fitted on other rows, and sklearn's own ``oob_decision_function_``
+    replays their bootstraps anyway, counting rows they trained on as
+    out-of-bag. A pruned forest keeps its trees' seeds, so it can be
+    calibrated over all of them.
+    """
+    X = np.asarray(X, dtype=np.float32)
+    masks = oob_masks(model, len(X), first_tree)
+    sums = np.zeros((len(X), len(model.classes_)))
+    for est, mask in zip(model.estimators_[first_tree:], masks):
+        sums[mask] += est.predict_proba(X[mask])
+    counts = masks.sum(axis=0)[:, np.newaxis]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        proba = sums / counts
+    return ProbabilityCalibrator(method).fit(proba, y, model.classes_)
+
+
+def brier_score(proba: np.ndarray, y, classes) -> float:
+    """Multi-class Brier score: mean squared distance to the one-hot labels (lower is better)."""
+    one_hot = np.asarray(y)[:, np.newaxis] == np.asarray(classes)[np.newaxis, :]
+    return float(np.mean(np.sum((proba - one_hot) ** 2, axis=1)))
@@ -0,0 +1,301 @@
+"""Cohort scoring jobs: score a whole class list in vectorized chunks.
+
+A job reads students from a source as DataFrame chunks, scores each chunk
+with ``score_frame`` (the same column-at-a-time path as score_csv and
+/predict/arrow) and yields the results chunk by chunk, so they can be
+streamed back as NDJSON while progress and throughput are tracked.
+
+Sources:
+
+* ``FrameSource``: an in-memory DataFrame: the records sent with a request,
+  or the training dataset standing in for the database locally and in tests.
+* ``MongoSource``: the backend's ``students`` collection (needs pymongo).
+"""
+import functools
+import itertools
+import math
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from config import COHORT_SOURCE, MONGO_STUDENT_COLLECTION, MONGO_URI
+from load_data import load_dataset
+from model_registry import ModelBundle
+from scoring import ID_COLUMNS, score_frame
+
+TARGET_COLUMNS = ["predicted_CGPA", "Academic_Risk_Level"]
+
+
+def _filter_mask(df: pd.DataFrame, filter: Dict[str, Any]) -> np.ndarray:
+    """Equality match per column; a list value matches any of its items."""
+    mask = np.ones(len(df), dtype=bool)
+    for col, value in filter.items():
+        if col not in df.columns:
+            raise ValueError(f"Unknown filter column: '{col}'")
+        values = value if isinstance(value, list) else [value]
+        mask &= df[col].isin(values).to_numpy()
+    return mask
+
+
+class FrameSource:
+    def __init__(self, df: pd.DataFrame):
+        self.df = df.drop(columns=[c for c in TARGET_COLUMNS if c in df.columns])
+
+    def count(self, filter: Dict[str, Any]) -> int:
+        return int(_filter_mask(self.df, filter).sum()) if filter else len(self.df)
+
+    def chunks(self, filter: Dict[str, Any], chunk_rows: int) -> Iterator[pd.DataFrame]:
+        selected = self.df[_filter_mask(self.df, filter)] if filter else self.df
+        for start in range(0, len(selected), chunk_rows):
+            yield selected.iloc[start : start + chunk_rows]
+
+
+def student_document_to_record(doc: dict) -> dict:
+    """Map a backend Student document to StudentInput fields, as routes/predictions.js does."""
+    current_gpa = doc.get("currentGPA")
+    return {
+        "Student_Name": doc.get("studentName"),
+        "Enrollment_No": doc.get("enrollmentNumber") or str(doc.get("_id", "")),
+        # Math.round semantics (halves round up), not Python's round-half-even.
+        "Semester": min(8, max(1, math.floor((current_gpa or 1) + 0.5))),
+        "Department": (doc.get("department") or "CSE").upper(),
+        "Age": doc.get("age"),
+        "Gender": "Female" if (doc.get("gender") or "").lower() == "female" else "Male",
+        "G1_Internal": doc.get("midsem1Marks"),
+        "G2_Internal": doc.get("midsem2Marks"),
+        "Final_Exam_Score": doc.get("comprehensiveExamMarks"),
+        "Attendance_Percentage": doc.get("attendancePercentage"),
+        "Study_Hours_Per_Week": doc.get("studyHoursPerWeek"),
+        "Backlogs": doc.get("totalBacklogs"),
+        "Part_Time_Work": "Yes" if doc.get("hasPartTimeJob") == "yes" else "No",
+        "Previous_CGPA": current_gpa,
+        # Not stored on Student documents; StudentInput's default.
+        "Parent_Education_Level": doc.get("parentEducationLevel") or "Graduate",
+    }
+
+
+# Matches no document; for filter values no mapped record could take.
+_NOTHING = {"_id": {"$in": []}}
+
+
+def _equals(field: str, convert):
+    return lambda value: {field: convert(value)}
+
+
+def _one_of(value, allowed: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    return allowed.get(value, _NOTHING)
+
+
+def _semester(value) -> Dict[str, Any]:
+    # Semester is currentGPA rounded half up and clamped to 1..8, with a
+    # missing or zero currentGPA counting as 1.
+    semester = float(value)
+    if semester != int(semester) or not 1 <= semester <= 8:
+        return _NOTHING
+    bounds = {}
+    if semester > 1:
+        bounds["$gte"] = semester - 0.5
+    if semester < 8:
+        bounds["$lt"] = semester + 0.5
+    if semester == 1:
+        return {"$or": [{"currentGPA": bounds}, {"currentGPA": {"$in": [None, 0]}}]}
+    return {"currentGPA": bounds}
+
+
+def _department(value) -> Dict[str, Any]:
+    # Stored departments are upper-cased when read, and a missing one is CSE.
+    department = str(value)
+    if department != department.upper():
+        return _NOTHING
+    condition = {"department": re.compile(f"^{re.escape(department)}$", re.IGNORECASE)}
+    if department == "CSE":
+        return {"$or": [condition, {"department": {"$in": [None, ""]}}]}
+    return condition
+
+
+_FEMALE = re.compile("^female$", re.IGNORECASE)
+
+# How a filter value for each StudentInput column is matched on Student
+# documents, mirroring student_document_to_record so that a filter selects
+# the same students as FrameSource would on the mapped records.
+MONGO_FILTER_FIELDS = {
+    "Student_Name": _equals("studentName", str),
+    "Enrollment_No": _equals("enrollmentNumber", str),
+    "Semester": _semester,
+    "Department": _department,
+    "Age": _equals("age", float),
+    "Gender": lambda v: _one_of(v, {"Female": {"gender": _FEMALE}, "Male": {"gender": {"$not": _FEMALE}}}),
+    "G1_Internal": _equals("midsem1Marks", float),
+    "G2_Internal": _equals("midsem2Marks", float),
+    "Final_Exam_Score": _equals("comprehensiveExamMarks", float),
+    "Attendance_Percentage": _equals("attendancePercentage", float),
+    "Study_Hours_Per_Week": _equals("studyHoursPerWeek", float),
+    "Backlogs": _equals("totalBacklogs", float),
+    "Part_Time_Work": lambda v: _one_of(
+        v, {"Yes": {"hasPartTimeJob": "yes"}, "No": {"hasPartTimeJob": {"$ne": "yes"}}}
+    ),
+    "Previous_CGPA": _equals("currentGPA", float),
+    "Parent_Education_Level": lambda v: (
+        {"parentEducationLevel": {"$in": ["Graduate", None, ""]}} if v == "Graduate" else {"parentEducationLevel": str(v)}
+    ),
+}
+
+
+def mongo_query(filter: Dict[str, Any]) -> Dict[str, Any]:
+    """Translate a cohort filter into a Mongo query with FrameSource's semantics.
+
+    Only the columns in ``MONGO_FILTER_FIELDS`` are accepted and values must be
+    scalars or lists of scalars; the query is built from them here, so
+    operators such as ``$where`` never reach the database.
+    """
+    conditions = []
+    for col, value in filter.items():
+        if col not in MONGO_FILTER_FIELDS:
+            raise ValueError(f"Unknown filter column: '{col}'")
+        values = value if isinstance(value, list) else [value]
+        for v in values:
+            if not isinstance(v, (str, int, float)) or isinstance(v, bool):
+                raise ValueError(f"Filter values for '{col}' must be strings or numbers")
+        try:
+            matches = [MONGO_FILTER_FIELDS[col](v) for v in values]
+        except ValueError as e:
+            raise ValueError(f"Invalid filter value for '{col}': {e}") from e
+        if not matches:
+            # Like an empty isin(): nothing matches.
+            matches = [_NOTHING]
+        conditions.append(matches[0] if len(matches) == 1 else {"$or": matches})
+    if not conditions:
+        return {}
+    return conditions[0] if len(conditions) == 1 else {"$and": conditions}
+
+
+class MongoSource:
+    """Students read straight from MongoDB; ``filter`` matches StudentInput columns as in FrameSource."""
+
+    def __init__(self, uri: str, collection: str):
+        try:
+            from pymongo import MongoClient
+        except ImportError as e:
+            raise RuntimeError("The Mongo cohort source requires pymongo (pip install pymongo).") from e
+        self.collection = MongoClient(uri).get_default_database()[collection]
+
+    def count(self, filter: Dict[str, Any]) -> int:
+        return self.collection.count_documents(mongo_query(filter))
+
+    def chunks(self, filter: Dict[str, Any], chunk_rows: int) -> Iterator[pd.DataFrame]:
+        cursor = self.collection.find(mongo_query(filter), batch_size=chunk_rows)
+        while True:
+            docs = list(itertools.islice(cursor, chunk_rows))
+            if not docs:
+                return
+            yield pd.DataFrame.from_records([student_document_to_record(doc) for doc in docs])
+
+
+@functools.lru_cache(maxsize=1)
+def default_source():
+    """The student source picked by ML_COHORT_SOURCE, opened once."""
+    if COHORT_SOURCE == "mongo":
+        return MongoSource(MONGO_URI, MONGO_STUDENT_COLLECTION)
+    if COHORT_SOURCE != "dataset":
+        raise ValueError(f"Unknown cohort source: {COHORT_SOURCE!r}")
+    df = load_dataset()
+    if df is None:
+        raise RuntimeError("Dataset not found")
+    return FrameSource(df)
+
+
+class CohortJob:
+    def __init__(self, total: Optional[int]):
+        self.id = uuid.uuid4().hex[:12]
+        self.state = "running"
+        self.total = total
+        self.scored = 0
+        self.failed = 0
+        self.error: Optional[str] = None
+        self.started = time.time()
+        self.finished: Optional[float] = None
+
+    def fail(self, error: Exception) -> None:
+        """Mark the job failed, keeping the first error if it already has one."""
+        if self.state != "failed":
+            self.state = "failed"
+            self.error = str(error)
+        self.finished = self.finished or time.time()
+
+    def progress(self) -> dict:
+        elapsed = (self.finished or time.time()) - self.started
+        processed = self.scored + self.failed
+        return {
+            "job_id": self.id,
+            "state": self.state,
+            "total": self.total,
+            "processed": processed,
+            "scored": self.scored,
+            "failed": self.failed,
+            "elapsed_seconds": round(elapsed, 3),
+            "rows_per_second": round(processed / elapsed, 1) if elapsed > 0 else None,
+            "error": self.error,
+        }
+
+
+class JobTracker:
+    """Recent cohort jobs by id; the oldest finished ones are forgotten past ``history``."""
+
+    def __init__(self, history: int):
+        self.history = history
+        self._jobs: "OrderedDict[str, CohortJob]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def start(self, total: Optional[int]) -> CohortJob:
+        job = CohortJob(total)
+        with self._lock:
+            self._jobs[job.id] = job
+            finished = [key for key, j in self._jobs.items() if j.state != "running"]
+            for key in finished[: max(0, len(self._jobs) - self.history)]:
+                del self._jobs[key]
+        return job
+
+    def get(self, job_id: str) -> Optional[CohortJob]:
+        return self._jobs.get(job_id)
+
+    def list(self) -> List[dict]:
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return [job.progress() for job in reversed(jobs)]
+
+
+def run_job(
+    job: CohortJob,
+    models: ModelBundle,
+    source,
+    filter: Dict[str, Any],
+    chunk_rows: int,
+    include_proba: bool = False,
+    required=(),
+) -> Iterator[pd.DataFrame]:
+    """Score ``source`` chunk by chunk, yielding each scored chunk with an ``index`` column."""
+    offset = 0
+    try:
+        for chunk in source.chunks(filter, chunk_rows):
+            scored = score_frame(models, chunk, ID_COLUMNS, include_proba, required)
+            scored.insert(0, "index", np.arange(offset, offset + len(scored)))
+            offset += len(scored)
+            failed = int(scored["error"].notna().sum())
+            job.failed += failed
+            job.scored += len(scored) - failed
+            yield scored
+        job.state = "done"
+    except GeneratorExit:
+        job.state = "cancelled"
+        raise
+    except Exception as e:
+        job.fail(e)
+        raise
+    finally:
+        job.finished = time.time()
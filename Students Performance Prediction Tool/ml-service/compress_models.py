@@ -0,0 +1,349 @@
+"""Shrink the trained forests into a cheaper serving version.
+
+Three optional stages, applied to both the GPA and the risk model:
+
+* prune: greedy forward selection of trees. Each step adds the tree that
+  most improves the running average's metric on out-of-bag training rows
+  (each row averaged over the chosen trees that did not see it). It stops at
+  the smallest subset whose out-of-bag MAE / accuracy is within the tolerance
+  of the full forest's. The test split is never used for selection, so the
+  metrics reported on it are not optimistic.
+* depth cap: cut every kept tree at ``--max-depth``. Nodes at that depth
+  become leaves (sklearn stores each internal node's mean, so they predict
+  what their subtree averaged to), and unreachable nodes are dropped.
+* distill: fit a HistGradientBoosting student on the forest's own training
+  predictions instead of the forest.
+
+The chosen variant is written as models/<output-version>/ with the encoders,
+a risk calibrator refitted on the kept trees' out-of-bag rows (pruned only),
+and a manifest recording the source version, the compression settings and
+the dataset it was trained on.
+Serve it like any other version: ML_MODEL_VERSION=<output-version>, or
+POST /admin/models/reload. A table of size, load time, one-row latency and
+test metrics is printed for every variant.
+
+Run from the ml-service directory:
+
+    python compress_models.py --output-version compact
+    python compress_models.py --max-depth 12 --save pruned --output-version compact-d12
+    python compress_models.py --save distilled --output-version distilled
+"""
+import argparse
+import copy
+import json
+import os
+import pickle
+import shutil
+import tempfile
+import time
+import warnings
+
+import joblib
+import numpy as np
+from sklearn.ensemble import HistGradientBoostingClassifier, HistGradientBoostingRegressor
+from sklearn.metrics import accuracy_score, mean_absolute_error
+
+from calibration import fit_replayed_oob_calibrator, oob_masks
+from train_models import (
+    CALIBRATOR_FILE,
+    DROP_MODEL_FILE,
+    ENCODER_FILE,
+    FEATURES,
+    GPA_MODEL_FILE,
+    MODEL_DIR,
+    model_params,
+    save_model,
+)
+from training_data import PhaseTimer, dataset_hash, dataset_path, load_splits, read_manifest, write_manifest
+from tune_models import predict_latency_ms
+
+# Measurements run on plain arrays, as the API does; see feature_plan.
+warnings.filterwarnings("ignore", message="X does not have valid feature names")
+
+# Share of training rows that must have an out-of-bag prediction from the
+# chosen trees before a subset may stop; tiny subsets cover too few rows.
+MIN_OOB_COVERAGE = 0.95
+
+
+def per_tree_outputs(model, X: np.ndarray) -> np.ndarray:
+    """(n_trees, n_rows) predictions for regressors, (n_trees, n_rows, n_classes) probabilities for classifiers."""
+    if hasattr(model, "classes_"):
+        return np.stack([est.predict_proba(X) for est in model.estimators_])
+    return np.stack([est.predict(X) for est in model.estimators_])
+
+
+def _oob_scores(sums, counts, y, classifier: bool):
+    """Score of each candidate's out-of-bag averages over the rows it covers, and that coverage."""
+    covered = counts > 0
+    mean = sums / np.maximum(counts, 1)[..., np.newaxis]
+    if classifier:
+        hits = np.argmax(mean, axis=-1) == y
+    else:
+        hits = -np.abs(mean[..., 0] - y)
+    # Higher is better for both: accuracy, or negated MAE.
+    return (hits * covered).sum(axis=-1) / np.maximum(covered.sum(axis=-1), 1), covered.mean(axis=-1)
+
+
+def select_trees(model, X_train: np.ndarray, y_train: np.ndarray, tolerance: float, reference=None):
+    """Indices of the smallest greedily grown tree subset scoring within ``tolerance`` of the full forest.
+
+    Scores are out-of-bag: ``X_train``/``y_train`` must be the rows the forest
+    was fitted on, in the same order, so each tree's bootstrap can be replayed.
+    ``reference`` is the forest whose score sets the bar (default: ``model`` itself).
+    """
+    classifier = hasattr(model, "classes_")
+    y = np.asarray(y_train)
+    if classifier:
+        # Trees predict class positions; compare against positions too.
+        y = np.searchsorted(model.classes_, y)
+    outputs = per_tree_outputs(model, X_train)
+    if not classifier:
+        outputs = outputs[..., np.newaxis]
+    masks = oob_masks(model, len(X_train))
+    weighted = outputs * masks[..., np.newaxis]
+
+    if reference is None:
+        reference_weighted = weighted
+    else:
+        reference_outputs = per_tree_outputs(reference, X_train)
+        if not classifier:
+            reference_outputs = reference_outputs[..., np.newaxis]
+        reference_weighted = reference_outputs * oob_masks(reference, len(X_train))[..., np.newaxis]
+    reference_score, _ = _oob_scores(reference_weighted.sum(axis=0), masks.sum(axis=0), y, classifier)
+    target = reference_score - tolerance
+
+    chosen, remaining = [], list(range(len(outputs)))
+    sums = np.zeros_like(outputs[0])
+    counts = np.zeros(len(X_train), dtype=np.int64)
+    while remaining:
+        scores, coverage = _oob_scores(
+            sums[np.newaxis] + weighted[remaining], counts[np.newaxis] + masks[remaining], y, classifier
+        )
+        best = int(np.argmax(scores))
+        tree = remaining.pop(best)
+        chosen.append(tree)
+        sums += weighted[tree]
+        counts += masks[tree]
+        if scores[best] >= target and coverage[best] >= MIN_OOB_COVERAGE:
+            break
+    return chosen
+
+
+def prune(model, X, y, tolerance: float, reference=None):
+    pruned = copy.deepcopy(model)
+    pruned.estimators_ = [pruned.estimators_[i] for i in select_trees(model, X, y, tolerance, reference)]
+    pruned.n_estimators = len(pruned.estimators_)
+    return pruned
+
+
+def truncate_tree(tree, max_depth: int) -> None:
+    """Cut a fitted sklearn ``Tree`` in place at ``max_depth``, renumbering the nodes that remain."""
+    state = tree.__getstate__()
+    nodes, values = state["nodes"], state["values"]
+    keep, depth, stack = [], {0: 0}, [0]
+    while stack:
+        node = stack.pop()
+        keep.append(node)
+        if nodes[node]["left_child"] != -1 and depth[node] < max_depth:
+            for child in (nodes[node]["right_child"], nodes[node]["left_child"]):
+                depth[child] = depth[node] + 1
+                stack.append(child)
+    keep.sort()
+    new_index = {old: new for new, old in enumerate(keep)}
+
+    new_nodes = nodes[keep].copy()
+    for i, old in enumerate(keep):
+        if nodes[old]["left_child"] == -1 or depth[old] >= max_depth:
+            new_nodes[i]["left_child"] = new_nodes[i]["right_child"] = -1
+            new_nodes[i]["feature"] = -2
+            new_nodes[i]["threshold"] = -2.0
+            new_nodes[i]["missing_go_to_left"] = 0
+        else:
+            new_nodes[i]["left_child"] = new_index[nodes[old]["left_child"]]
+            new_nodes[i]["right_child"] = new_index[nodes[old]["right_child"]]
+    tree.__setstate__(
+        {
+            "max_depth": min(state["max_depth"], max_depth),
+            "node_count": len(keep),
+            "nodes": new_nodes,
+            "values": np.ascontiguousarray(values[keep]),
+        }
+    )
+
+
+def cap_depth(model, max_depth: int):
+    capped = copy.deepcopy(model)
+    for est in capped.estimators_:
+        truncate_tree(est.tree_, max_depth)
+    return capped
+
+
+def distill(teacher, X_train):
+    """A HistGradientBoosting model fitted to mimic ``teacher`` on the training rows.
+
+    ``X_train`` should be a DataFrame so the student keeps ``feature_names_in_``,
+    which the registry uses to lay out its inputs.
+    """
+    if hasattr(teacher, "classes_"):
+        student = HistGradientBoostingClassifier(random_state=42)
+    else:
+        student = HistGradientBoostingRegressor(random_state=42)
+    return student.fit(X_train, teacher.predict(X_train))
+
+
+def measure(model, X_test: np.ndarray, y_test, classifier: bool) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "model.pkl")
+        joblib.dump(model, path, compress=3)
+        started = time.perf_counter()
+        joblib.load(path)
+        load_seconds = time.perf_counter() - started
+        file_bytes = os.path.getsize(path)
+    predictions = model.predict(X_test)
+    metric = accuracy_score(y_test, predictions) if classifier else mean_absolute_error(y_test, predictions)
+    return {
+        "accuracy" if classifier else "mae": float(metric),
+        "n_trees": len(getattr(model, "estimators_", [])) or None,
+        "memory_bytes": len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL)),
+        "file_bytes": file_bytes,
+        "load_seconds": load_seconds,
+        "latency_ms": predict_latency_ms(model, X_test),
+    }
+
+
+def print_table(name, rows):
+    metric = "accuracy" if "accuracy" in next(iter(rows.values())) else "mae"
+    print(f"\n{name}")
+    print(f"  {'variant':<12} {metric:>8} {'trees':>6} {'memory MiB':>10} {'file MiB':>9} {'load s':>7} {'p50 ms':>7}")
+    for variant, r in rows.items():
+        print(
+            f"  {variant:<12} {r[metric]:>8.4f} {r['n_trees'] or '-':>6} {r['memory_bytes'] / 2**20:>10.2f} "
+            f"{r['file_bytes'] / 2**20:>9.2f} {r['load_seconds']:>7.3f} {r['latency_ms']:>7.3f}"
+        )
+
+
+def check_training_rows(manifest, X_train, X_test) -> None:
+    """Exit unless ``X_train`` is exactly the rows, in order, that the manifest's version was fitted on.
+
+    Trees are selected on out-of-bag rows, which means replaying each tree's
+    bootstrap over the rows it was fitted on; on any other rows the "out-of-bag"
+    scores would include rows the trees trained on.
+    """
+    if manifest is None:
+        raise SystemExit("No training manifest; retrain with train_models.py so the training rows can be checked.")
+    if manifest.get("mode") != "full":
+        raise SystemExit("Tree selection needs a fully trained version; grown versions were fitted on other rows.")
+    path = dataset_path()
+    if os.path.getsize(path) != manifest["dataset_bytes"] or dataset_hash(path) != manifest["dataset_hash"]:
+        raise SystemExit(f"{os.path.basename(path)} has changed since this version was trained; retrain it first.")
+    train_rows = manifest["dataset_rows"] - len(manifest["test_rows"])
+    if len(X_train) != train_rows or sorted(X_test.index) != manifest["test_rows"]:
+        raise SystemExit(
+            f"The training split has {len(X_train)} rows but the version was trained on {train_rows}; retrain it first."
+        )
+
+
+def compact_manifest(manifest, args, chosen, report) -> dict:
+    """The source version's manifest, updated for the saved variant."""
+    forests = all(hasattr(m, "estimators_") for m in chosen.values())
+    compact = {
+        **{k: v for k, v in manifest.items() if k not in ("n_estimators", "params")},
+        "mode": "compressed",
+        "trained_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "source_version": args.version or "current",
+        "compression": {
+            "variant": args.save,
+            "mae_tolerance": args.mae_tolerance,
+            "accuracy_tolerance": args.accuracy_tolerance,
+            "max_depth": args.max_depth,
+        },
+        "metrics": {
+            "mae": report["gpa"][args.save]["mae"],
+            "accuracy": report["risk"][args.save]["accuracy"],
+        },
+    }
+    if forests:
+        # Distilled models are not forests, so they have no recipe to record.
+        compact["n_estimators"] = {"gpa": len(chosen["gpa"].estimators_), "dropout": len(chosen["risk"].estimators_)}
+        compact["params"] = {"gpa": model_params(chosen["gpa"]), "dropout": model_params(chosen["risk"])}
+    return compact
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--version", help="model version to compress (default: models/)")
+    parser.add_argument("--output-version", default="compact", help="saved as models/<output-version>/")
+    parser.add_argument("--mae-tolerance", type=float, default=0.005, help="allowed GPA MAE increase")
+    parser.add_argument("--accuracy-tolerance", type=float, default=0.005, help="allowed risk accuracy drop")
+    parser.add_argument("--max-depth", type=int, help="also cut the pruned trees at this depth")
+    parser.add_argument("--distill", action="store_true", help="also fit HistGradientBoosting students")
+    parser.add_argument("--save", choices=["pruned", "distilled", "none"], default="pruned")
+    parser.add_argument("--output", help="write the size/latency/accuracy table as JSON")
+    args = parser.parse_args(argv)
+
+    model_dir = MODEL_DIR if args.version is None else os.path.join(MODEL_DIR, args.version)
+    timer = PhaseTimer()
+    manifest = read_manifest(model_dir)
+    with timer.phase("load"):
+        X_train, X_test, y_reg_train, y_reg_test, y_clf_train, y_clf_test, _ = load_splits()[0]
+        check_training_rows(manifest, X_train, X_test)
+        X_train = X_train[FEATURES]
+        X_train_array = X_train.to_numpy(dtype=np.float64)
+        X_test = X_test[FEATURES].to_numpy(dtype=np.float64)
+        models = {
+            "gpa": (joblib.load(os.path.join(model_dir, GPA_MODEL_FILE)), y_reg_train, y_reg_test, args.mae_tolerance),
+            "risk": (
+                joblib.load(os.path.join(model_dir, DROP_MODEL_FILE)),
+                y_clf_train,
+                y_clf_test,
+                args.accuracy_tolerance,
+            ),
+        }
+
+    report, chosen = {}, {}
+    for name, (model, y_train, y_test, tolerance) in models.items():
+        classifier = hasattr(model, "classes_")
+        variants = {"original": model}
+        base = model
+        if args.max_depth:
+            # Cap before selecting trees so the tolerance accounts for the shallower trees.
+            with timer.phase(f"{name}_depth_cap"):
+                base = variants["capped"] = cap_depth(model, args.max_depth)
+        with timer.phase(f"{name}_prune"):
+            variants["pruned"] = prune(base, X_train_array, np.asarray(y_train), tolerance, reference=model)
+        if args.distill or args.save == "distilled":
+            with timer.phase(f"{name}_distill"):
+                variants["distilled"] = distill(model, X_train)
+        with timer.phase(f"{name}_measure"):
+            report[name] = {v: measure(m, X_test, y_test, classifier) for v, m in variants.items()}
+        print_table(name, report[name])
+        chosen[name] = variants.get(args.save)
+
+    if args.save != "none":
+        output_dir = os.path.join(MODEL_DIR, args.output_version)
+        os.makedirs(output_dir, exist_ok=True)
+        with timer.phase("save"):
+            save_model(chosen["gpa"], GPA_MODEL_FILE, output_dir)
+            save_model(chosen["risk"], DROP_MODEL_FILE, output_dir)
+            shutil.copy(os.path.join(model_dir, ENCODER_FILE), os.path.join(output_dir, ENCODER_FILE))
+            calibrator_path = os.path.join(output_dir, CALIBRATOR_FILE)
+            if args.save == "pruned":
+                # The kept trees keep their seeds, so their out-of-bag rows replay exactly.
+                calibrator = fit_replayed_oob_calibrator(chosen["risk"], X_train_array, np.asarray(y_clf_train))
+                joblib.dump(calibrator, calibrator_path)
+            else:
+                # A distilled model has no out-of-bag rows to calibrate on.
+                if os.path.exists(calibrator_path):
+                    os.remove(calibrator_path)
+                print("Distilled risk model saved without a calibrator; include_proba serves its raw probabilities.")
+            write_manifest(output_dir, compact_manifest(manifest, args, chosen, report))
+        print(f"\nSaved {args.save} models as version '{args.output_version}' in {output_dir}")
+
+    print(timer.report("\nCompression time"))
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump(report, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
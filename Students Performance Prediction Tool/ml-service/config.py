@@ -1,2 +1,70 @@
 # Configuration file for backend
-# Add constants or paths here if needed in the future.
\ No newline at end of file
+# Add constants or paths here if needed in the future.
+import os
+
+# Upper bound on the number of students accepted by /predict/batch in one call.
+BATCH_MAX_ROWS = int(os.getenv("ML_BATCH_MAX_ROWS", "10000"))
+
+# Upper bound on the number of students /predict/rank will rank in one call.
+RANK_MAX_ROWS = int(os.getenv("ML_RANK_MAX_ROWS", "100000"))
+
+# Upper bound on the number of rows in one Arrow stream sent to /predict/arrow.
+ARROW_MAX_ROWS = int(os.getenv("ML_ARROW_MAX_ROWS", "100000"))
+
+# Upper bound on the number of grid points one /predict/what-if call scores.
+WHATIF_MAX_POINTS = int(os.getenv("ML_WHATIF_MAX_POINTS", "10000"))
+
+# Cohort scoring jobs (/cohort/score): rows scored per chunk, the most records
+# one request may carry, and how many finished jobs /cohort/jobs remembers.
+COHORT_CHUNK_ROWS = int(os.getenv("ML_COHORT_CHUNK_ROWS", "5000"))
+COHORT_MAX_ROWS = int(os.getenv("ML_COHORT_MAX_ROWS", "100000"))
+COHORT_JOB_HISTORY = int(os.getenv("ML_COHORT_JOB_HISTORY", "100"))
+
+# Where filter-based cohort jobs read students from: "dataset" serves
+# dataset/StudentData.csv from memory; "mongo" reads the backend's students
+# collection (requires pymongo).
+COHORT_SOURCE = os.getenv("ML_COHORT_SOURCE", "dataset")
+MONGO_URI = os.getenv("ML_MONGO_URI", os.getenv("MONGODB_URI", "mongodb://localhost:27017/student-forecasting"))
+MONGO_STUDENT_COLLECTION = os.getenv("ML_MONGO_STUDENT_COLLECTION", "students")
+
+# Memory-mapped store of encoded student rows and last predictions, one
+# subdirectory per model version (built with `python feature_store.py build`).
+FEATURE_STORE_DIR = os.getenv(
+    "ML_FEATURE_STORE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "feature_store")
+)
+# Also record every /predict request that carries an Enrollment_No in the store.
+FEATURE_STORE_WRITE_THROUGH = os.getenv("ML_FEATURE_STORE_WRITE_THROUGH", "0").lower() in ("1", "true", "yes")
+
+# "compressed" loads the joblib compress=3 artifacts; "mmap" prefers the
+# uncompressed *.mmap.pkl copies and memory-maps their arrays read-only.
+MODEL_ARTIFACT_FORMAT = os.getenv("ML_MODEL_FORMAT", "compressed")
+
+# "sklearn" calls the fitted forests directly; "flat" serves them through
+# forest_engine's flattened node arrays, which match sklearn bit-for-bit.
+INFERENCE_ENGINE = os.getenv("ML_INFERENCE_ENGINE", "sklearn")
+
+# In-process cache of /predict results; ML_CACHE_MAX_ENTRIES=0 disables it.
+CACHE_MAX_ENTRIES = int(os.getenv("ML_CACHE_MAX_ENTRIES", "10000"))
+CACHE_TTL_SECONDS = float(os.getenv("ML_CACHE_TTL_SECONDS", "3600"))
+
+# Coalesce concurrent /predict calls into one model call per batch.
+MICRO_BATCH_ENABLED = os.getenv("ML_MICRO_BATCH", "0").lower() in ("1", "true", "yes")
+MICRO_BATCH_MAX_SIZE = int(os.getenv("ML_MICRO_BATCH_MAX_SIZE", "64"))
+MICRO_BATCH_MAX_WAIT_MS = float(os.getenv("ML_MICRO_BATCH_MAX_WAIT_MS", "5"))
+
+# Log raw request payloads and encoded feature rows at DEBUG level (the ml_api
+# logger is lowered to DEBUG when set). Off by default: serializing them on
+# every request is measurable hot-path cost.
+LOG_PAYLOADS = os.getenv("ML_LOG_PAYLOADS", "0").lower() in ("1", "true", "yes")
+
+# Allow clients to request a sampling profile of one /predict call with the
+# X-Profile: 1 header. Keep off in production.
+PROFILING_ENABLED = os.getenv("ML_PROFILING", "0").lower() in ("1", "true", "yes")
+
+# Model version to serve at startup (a subdirectory of models/, or "current"
+# for the files directly in models/). Falls back to models/ACTIVE.
+MODEL_VERSION = os.getenv("ML_MODEL_VERSION", "")
+
+# Seconds between checks of models/ACTIVE and the active artifacts' mtimes;
+# 0 disables the watcher and leaves reloads to POST /admin/models/reload.
+MODEL_WATCH_INTERVAL = float(os.getenv("ML_MODEL_WATCH_INTERVAL", "0"))
@@ -1,71 +1,286 @@
+"""Evaluate the GPA and dropout risk models.
+
+By default this cross-validates the training recipe: the dataset is encoded
+once, memory-mapped for the worker processes, split into stratified folds,
+and each fold fits and scores both models in one task, with folds running in
+parallel. Fold metrics are summarised as mean, standard deviation and a 95%
+t-interval, and written with per-fold fit/predict times as a JSON report.
+The models' hyperparameters are taken from the version's training manifest,
+so reports can be compared across versions.
+
+``--holdout`` instead scores the saved models on the fixed test split.
+
+Run from the ml-service directory:
+
+    python evaluate_models.py --folds 5 --jobs -1
+    python evaluate_models.py --model-version v2 --output cv_v2.json
+    python evaluate_models.py --holdout
+"""
+import argparse
+import json
+import math
 import os
+import tempfile
+import time
+
 import joblib
 import numpy as np
-from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score, accuracy_score, classification_report
-
-from .load_data import load_dataset
-from .preprocess import preprocess_data
-
-MODEL_DIR = os.path.join(os.path.dirname(__file__), "models")
-GPA_MODEL_FILE = "gpa_prediction_model.pkl"
-DROP_MODEL_FILE = "dropout_risk_model.pkl"
-
-
-def evaluate():
-    df = load_dataset()
-    if df is None:
-        raise RuntimeError("Dataset not found")
-
-    (
-        X_train,
-        X_test,
-        y_reg_train,
-        y_reg_test,
-        y_clf_train,
-        y_clf_test,
-        encoders,
-    ) = preprocess_data(df)
-
-    gpa_model = joblib.load(os.path.join(MODEL_DIR, GPA_MODEL_FILE))
-    drop_model = joblib.load(os.path.join(MODEL_DIR, DROP_MODEL_FILE))
-
-    features = [
-        "Attendance_Percentage",
-        "Study_Hours_Per_Week",
-        "Previous_CGPA",
-        "G1_Internal",
-        "G2_Internal",
-        "Final_Exam_Score",
-        "Age",
-        "Backlogs",
-        "Semester",
-        "Parent_Education_Level",
-        "Gender",
-        "Department",
-        "Part_Time_Work",
-    ]
-
-    X_test_f = X_test.reindex(columns=features, fill_value=0)
-
-    # Regression metrics
-    y_pred_reg = gpa_model.predict(X_test_f)
-    mae = mean_absolute_error(y_reg_test, y_pred_reg)
-    mse = mean_squared_error(y_reg_test, y_pred_reg)
-    r2 = r2_score(y_reg_test, y_pred_reg)
+import pandas as pd
+from scipy import stats
+from sklearn.base import clone
+from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+from sklearn.metrics import (
+    accuracy_score,
+    classification_report,
+    mean_absolute_error,
+    mean_squared_error,
+    precision_recall_fscore_support,
+    r2_score,
+)
+from sklearn.model_selection import StratifiedKFold
 
-    print("Regression metrics on test set:")
-    print(f"  MAE: {mae:.4f}")
-    print(f"  MSE: {mse:.4f}")
-    print(f"  R2:  {r2:.4f}")
+from model_registry import DEFAULT_VERSION, DROP_MODEL_FILE, FEATURES, GPA_MODEL_FILE, registry
+from training_data import PhaseTimer, dataset_hash, dataset_path, load_splits, read_manifest
+
+CV_REPORT_FILE = "cv_report.json"
+
+# Used when a version has no recorded settings (trained before they were recorded).
+DEFAULT_PARAMS = {
+    "gpa": {"random_state": 42, "n_estimators": 200},
+    "dropout": {"random_state": 42, "n_estimators": 200, "class_weight": "balanced"},
+}
+
+
+def compute_metrics(gpa_model, drop_model, X_test, y_reg_test, y_clf_test, timer=None):
+    """Test-set metrics for both models as a flat dict (also stored in training manifests)."""
+    timer = timer or PhaseTimer()
+    X_test_f = X_test.reindex(columns=FEATURES, fill_value=0)
 
-    # Classification metrics
-    y_pred_clf = drop_model.predict(X_test_f)
-    acc = accuracy_score(y_clf_test, y_pred_clf)
+    with timer.phase("predict_gpa"):
+        y_pred_reg = gpa_model.predict(X_test_f)
+    with timer.phase("predict_dropout"):
+        y_pred_clf = drop_model.predict(X_test_f)
+
+    return {
+        "mae": float(mean_absolute_error(y_reg_test, y_pred_reg)),
+        "mse": float(mean_squared_error(y_reg_test, y_pred_reg)),
+        "r2": float(r2_score(y_reg_test, y_pred_reg)),
+        "accuracy": float(accuracy_score(y_clf_test, y_pred_clf)),
+        "classification_report": classification_report(y_clf_test, y_pred_clf),
+    }
+
+
+def evaluate(version=None):
+    directory = model_dir(version)
+    timer = PhaseTimer()
+    with timer.phase("load_preprocess"):
+        # Reuses the splits cached by train_models when the dataset is unchanged.
+        (
+            X_train,
+            X_test,
+            y_reg_train,
+            y_reg_test,
+            y_clf_train,
+            y_clf_test,
+            encoders,
+        ) = load_splits()[0]
+
+    with timer.phase("load_models"):
+        gpa_model = joblib.load(os.path.join(directory, GPA_MODEL_FILE))
+        drop_model = joblib.load(os.path.join(directory, DROP_MODEL_FILE))
+
+    metrics = compute_metrics(gpa_model, drop_model, X_test, y_reg_test, y_clf_test, timer)
+
+    print(f"Model version {version or DEFAULT_VERSION}")
+    print("Regression metrics on test set:")
+    print(f"  MAE: {metrics['mae']:.4f}")
+    print(f"  MSE: {metrics['mse']:.4f}")
+    print(f"  R2:  {metrics['r2']:.4f}")
 
     print("\nClassification metrics on test set:")
-    print(f"  Accuracy: {acc:.4f}")
-    print("  Classification report:\n", classification_report(y_clf_test, y_pred_clf))
+    print(f"  Accuracy: {metrics['accuracy']:.4f}")
+    print("  Classification report:\n", metrics["classification_report"])
+    print(timer.report("\nEvaluation time"))
+
+
+def model_dir(version=None) -> str:
+    """Directory of ``version``'s artifacts; exits if the version has no models there."""
+    directory = registry.version_dir(version or DEFAULT_VERSION)
+    if not all(os.path.exists(os.path.join(directory, f)) for f in (GPA_MODEL_FILE, DROP_MODEL_FILE)):
+        raise SystemExit(f"No models for version '{version or DEFAULT_VERSION}' in {directory}")
+    return directory
+
+
+def model_templates(version=None):
+    """Unfitted, single-threaded models with a version's recorded settings, and where they came from.
+
+    The settings come from the training manifest, so the forests themselves
+    are never loaded. A version without them gets train_models' defaults,
+    and the source says so ("defaults" rather than "manifest").
+    """
+    params = (read_manifest(model_dir(version)) or {}).get("params")
+    source = "manifest"
+    if params is None:
+        params, source = DEFAULT_PARAMS, "defaults"
+    templates = [RandomForestRegressor(**params["gpa"]), RandomForestClassifier(**params["dropout"])]
+    for model in templates:
+        # Folds already use every core; OOB scores are not needed for held-out metrics.
+        model.set_params(n_jobs=1, oob_score=False)
+    return templates, source
+
+
+def summarize(values) -> dict:
+    """Mean, sample standard deviation and 95% t-interval of per-fold values."""
+    values = np.asarray(values, dtype=np.float64)
+    mean = float(values.mean())
+    if len(values) < 2:
+        return {"mean": mean, "std": None, "ci95": None, "folds": values.tolist()}
+    std = float(values.std(ddof=1))
+    half = float(stats.t.ppf(0.975, len(values) - 1)) * std / math.sqrt(len(values))
+    return {"mean": mean, "std": std, "ci95": [mean - half, mean + half], "folds": values.tolist()}
+
+
+def run_fold(gpa_template, risk_template, X, y_reg, y_clf, train, test, classes) -> dict:
+    """Fit and score both models on one fold."""
+    scores = {}
+    timings = {}
+    for name, template, y in (("gpa", gpa_template, y_reg), ("risk", risk_template, y_clf)):
+        model = clone(template)
+        start = time.perf_counter()
+        model.fit(X[train], y[train])
+        timings[f"fit_{name}"] = time.perf_counter() - start
+        start = time.perf_counter()
+        predicted = model.predict(X[test])
+        timings[f"predict_{name}"] = time.perf_counter() - start
+        scores[name] = predicted
+
+    y_reg_test, y_clf_test = y_reg[test], y_clf[test]
+    precision, recall, _, support = precision_recall_fscore_support(
+        y_clf_test, scores["risk"], labels=classes, zero_division=0
+    )
+    return {
+        "rows": {"train": len(train), "test": len(test)},
+        "mae": float(mean_absolute_error(y_reg_test, scores["gpa"])),
+        "rmse": float(math.sqrt(mean_squared_error(y_reg_test, scores["gpa"]))),
+        "r2": float(r2_score(y_reg_test, scores["gpa"])),
+        "accuracy": float(accuracy_score(y_clf_test, scores["risk"])),
+        "precision": precision.tolist(),
+        "recall": recall.tolist(),
+        "support": support.tolist(),
+        "seconds": timings,
+    }
+
+
+def cross_validate(folds=5, n_jobs=-1, version=None, seed=42, use_cache=True) -> dict:
+    """k-fold metrics for both models of ``version``, folds stratified by risk level."""
+    timer = PhaseTimer()
+    with timer.phase("load_preprocess"):
+        X_train, X_test, y_reg_train, y_reg_test, y_clf_train, y_clf_test, encoders = load_splits(
+            use_cache=use_cache
+        )[0]
+        X = np.ascontiguousarray(pd.concat([X_train, X_test])[FEATURES].to_numpy(dtype=np.float64))
+        y_reg = np.concatenate([np.asarray(y_reg_train), np.asarray(y_reg_test)]).astype(np.float64)
+        y_clf = np.concatenate([np.asarray(y_clf_train), np.asarray(y_clf_test)])
+    classes = np.unique(y_clf)
+    risk_encoder = encoders.get("Academic_Risk_Level")
+    labels = [str(c) for c in (classes if risk_encoder is None else risk_encoder.inverse_transform(classes))]
+    (gpa_template, risk_template), recipe = model_templates(version)
+    splits = list(StratifiedKFold(n_splits=folds, shuffle=True, random_state=seed).split(X, y_clf))
+
+    with tempfile.TemporaryDirectory(prefix="cv-") as tmp, timer.phase("folds (wall)"):
+        # One on-disk copy of the encoded data; every worker maps it read-only
+        # instead of receiving its own pickled copy per fold.
+        shared = {}
+        for name, array in (("X", X), ("y_reg", y_reg), ("y_clf", y_clf)):
+            path = os.path.join(tmp, f"{name}.joblib")
+            joblib.dump(array, path)
+            shared[name] = joblib.load(path, mmap_mode="r")
+        results = joblib.Parallel(n_jobs=n_jobs)(
+            joblib.delayed(run_fold)(
+                gpa_template, risk_template, shared["X"], shared["y_reg"], shared["y_clf"], train, test, classes
+            )
+            for train, test in splits
+        )
+
+    path = dataset_path()
+    return {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "model_version": version or DEFAULT_VERSION,
+        # "defaults": the version records no settings, so this is train_models'
+        # default recipe, not necessarily the one the version was trained with.
+        "recipe": recipe,
+        "dataset": os.path.basename(path),
+        "dataset_hash": dataset_hash(path),
+        "rows": len(X),
+        "folds": folds,
+        "seed": seed,
+        "params": {
+            "gpa": {k: v for k, v in gpa_template.get_params().items() if k != "n_jobs"},
+            "risk": {k: v for k, v in risk_template.get_params().items() if k != "n_jobs"},
+        },
+        "gpa": {metric: summarize([r[metric] for r in results]) for metric in ("mae", "rmse", "r2")},
+        "risk": {
+            "accuracy": summarize([r["accuracy"] for r in results]),
+            "per_class": {
+                label: {
+                    "precision": summarize([r["precision"][i] for r in results]),
+                    "recall": summarize([r["recall"][i] for r in results]),
+                    "support": int(sum(r["support"][i] for r in results)),
+                }
+                for i, label in enumerate(labels)
+            },
+        },
+        "seconds": {
+            **{phase: summarize([r["seconds"][phase] for r in results]) for phase in results[0]["seconds"]},
+            **timer.phases,
+        },
+    }
+
+
+def print_report(report: dict) -> None:
+    def fmt(s):
+        ci = "" if s["ci95"] is None else f"  [{s['ci95'][0]:.4f}, {s['ci95'][1]:.4f}]"
+        return f"{s['mean']:.4f}{ci}"
+
+    recipe = "" if report["recipe"] == "manifest" else " (train_models' default recipe; the version records none)"
+    print(
+        f"{report['folds']}-fold CV of version {report['model_version']}{recipe} "
+        f"on {report['rows']} rows (mean, 95% CI):"
+    )
+    for metric in ("mae", "rmse", "r2"):
+        print(f"  GPA {metric.upper():<5} {fmt(report['gpa'][metric])}")
+    print(f"  Risk accuracy {fmt(report['risk']['accuracy'])}")
+    for label, per_class in report["risk"]["per_class"].items():
+        print(f"  {label:<8} precision {fmt(per_class['precision'])}   recall {fmt(per_class['recall'])}")
+    seconds = report["seconds"]
+    for phase in ("fit_gpa", "predict_gpa", "fit_risk", "predict_risk"):
+        print(f"  {phase:<13} {seconds[phase]['mean']:8.3f}s per fold")
+    print(f"  folds (wall)  {seconds['folds (wall)']:8.3f}s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--jobs", type=int, default=-1, help="folds fitted in parallel (-1: all cores)")
+    parser.add_argument("--model-version", default=None, help="version whose hyperparameters are evaluated")
+    parser.add_argument("--seed", type=int, default=42, help="fold shuffling seed")
+    parser.add_argument("--output", default=None, help=f"JSON report path (default: {CV_REPORT_FILE} in the version's directory)")
+    parser.add_argument("--no-cache", action="store_true", help="re-read and re-encode the dataset")
+    parser.add_argument("--holdout", action="store_true", help="score the saved models on the fixed test split instead")
+    args = parser.parse_args(argv)
+
+    if args.holdout:
+        evaluate(args.model_version)
+        return
+    if args.folds < 2:
+        parser.error("--folds must be at least 2")
+    report = cross_validate(args.folds, args.jobs, args.model_version, args.seed, not args.no_cache)
+    output = args.output or os.path.join(model_dir(args.model_version), CV_REPORT_FILE)
+    with open(output, "w") as fh:
+        json.dump(report, fh, indent=2)
+    print_report(report)
+    print(f"Report written to {output}")
 
 
 if __name__ == "__main__":
-    evaluate()
+    main()
@@ -0,0 +1,99 @@
+"""Per-feature explanations of the GPA and risk predictions.
+
+Contributions are path-based (Saabas' method) and computed by the flat
+forest engine in one vectorized pass per batch: every split on a row's path
+through a tree credits the change in node value to the split's feature, and
+the credits are averaged over trees. For each output,
+
+    base_value + sum(contributions.values()) == prediction
+
+The risk explanation is for the forest's own probability of the predicted
+level, before any calibration.
+"""
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from forest_engine import FlatForest, flatten
+from model_registry import ModelBundle
+
+
+def _flat(model, name: str) -> FlatForest:
+    flat = model if isinstance(model, FlatForest) else flatten(model)
+    if not isinstance(flat, FlatForest):
+        raise ValueError(f"Explanations need a random forest {name}; got {type(model).__name__}")
+    return flat
+
+
+class Explainer:
+    """Flat copies of one bundle's models and the feature names their columns carry."""
+
+    def __init__(self, models: ModelBundle):
+        # Bundles served by the flat engine already hold these; reuse them.
+        self.gpa = _flat(models.gpa_model, "GPA model")
+        self.dropout = _flat(models.dropout_model, "dropout model")
+        self.gpa_features = models.plan.gpa_features
+        self.dropout_features = models.plan.dropout_features
+        self.pipeline = models.pipeline
+
+    def contributions(self, X: np.ndarray):
+        """``(gpa_bias, gpa_contributions, risk_bias, risk_contributions)`` for every row and risk class."""
+        pipeline = self.pipeline
+        X_gpa = np.take(X, pipeline.gpa_index, axis=1)
+        gpa_bias, gpa_contrib = self.gpa.contributions(X_gpa)
+        if pipeline.shared_buffer:
+            X_dropout = X_gpa
+        else:
+            X_dropout = np.take(X, pipeline.dropout_index, axis=1)
+            if pipeline.cgpa_slot is not None:
+                X_dropout[:, pipeline.cgpa_slot] = pipeline.gpa_model.predict(X_gpa.astype(pipeline.gpa_dtype))
+        risk_bias, risk_contrib = self.dropout.contributions(X_dropout)
+        return gpa_bias, gpa_contrib, risk_bias, risk_contrib
+
+    def explain(self, X: np.ndarray) -> List[dict]:
+        """One explanation per row of a matrix laid out as ``plan.columns``."""
+        pipeline = self.pipeline
+        gpa_bias, gpa_contrib, risk_bias, risk_contrib = self.contributions(X)
+        # The predicted level is the argmax of the summed (uncalibrated) probabilities.
+        predicted = np.argmax(risk_bias + risk_contrib.sum(axis=1), axis=1)
+        labels = pipeline.decode(self.dropout.classes_.take(predicted))
+
+        gpa_contrib = np.round(gpa_contrib[:, :, 0], 4).tolist()
+        risk_contrib = np.round(risk_contrib[np.arange(len(X)), :, predicted], 4).tolist()
+        gpa_base = round(float(gpa_bias[0]), 4)
+        risk_base = np.round(risk_bias, 4).tolist()
+        return [
+            {
+                "predicted_CGPA": {"base_value": gpa_base, "contributions": dict(zip(self.gpa_features, g))},
+                "academic_risk_level": {
+                    "label": label,
+                    "base_value": risk_base[k],
+                    "contributions": dict(zip(self.dropout_features, r)),
+                },
+            }
+            for g, r, k, label in zip(gpa_contrib, risk_contrib, predicted.tolist(), labels)
+        ]
+
+
+_explainers: Dict[str, Explainer] = {}
+_explainers_lock = threading.Lock()
+
+
+def explainer_for(models: ModelBundle) -> Explainer:
+    """The explainer for this bundle's revision, built on first use; raises ValueError for non-forest models."""
+    explainer = _explainers.get(models.revision)
+    if explainer is None:
+        with _explainers_lock:
+            explainer = _explainers.get(models.revision)
+            if explainer is None:
+                explainer = _explainers[models.revision] = Explainer(models)
+    return explainer
+
+
+def forget(version: Optional[str] = None) -> None:
+    """Drop cached explainers for ``version`` (all when None) so reloaded models get fresh ones."""
+    with _explainers_lock:
+        for revision in list(_explainers):
+            if version is None or revision.split("#")[0] == version:
+                del _explainers[revision]
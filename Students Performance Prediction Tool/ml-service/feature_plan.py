@@ -0,0 +1,159 @@
+import math
+import warnings
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Identify a student but are never meaningful model inputs.
+ID_FIELDS = ["Student_Name", "Enrollment_No"]
+
+CATEGORICAL_FIELDS = [
+    "Gender",
+    "Department",
+    "Part_Time_Work",
+    "Parent_Education_Level",
+    "Semester",
+    "Academic_Risk_Level",
+]
+
+# The plan always hands the models columns in their training order, so the
+# "fitted with feature names" check is redundant noise on every ndarray predict.
+warnings.filterwarnings("ignore", message="X does not have valid feature names")
+
+
+def _to_float(value) -> float:
+    """Mirror pd.to_numeric(errors="coerce").fillna(0) for a single value."""
+    if value is None:
+        return 0.0
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return 0.0
+    return 0.0 if math.isnan(number) else number
+
+
+class FeaturePlan:
+    """Precompiled encoder from raw student records to model feature rows.
+
+    Built once from the fitted label encoders and the feature order of both
+    models. Categorical values are resolved through plain dict lookups and
+    written straight into a float64 buffer laid out as ``columns``; the GPA
+    and dropout matrices are column selections of that buffer.
+    """
+
+    def __init__(self, label_encoders: dict, gpa_features: Sequence[str], dropout_features: Sequence[str]):
+        self.gpa_features = list(gpa_features)
+        self.dropout_features = list(dropout_features)
+        self.columns = self.gpa_features + [c for c in self.dropout_features if c not in self.gpa_features]
+        position = {col: i for i, col in enumerate(self.columns)}
+
+        self.gpa_index = np.array([position[c] for c in self.gpa_features], dtype=np.intp)
+        self.dropout_index = np.array([position[c] for c in self.dropout_features], dtype=np.intp)
+        # Columns that determine the prediction; used to key cached results.
+        self.key_index = np.array([i for i, c in enumerate(self.columns) if c not in ID_FIELDS], dtype=np.intp)
+        # Where the GPA stage's output goes in the dropout matrix, if the dropout model uses it.
+        self.dropout_cgpa_pos: Optional[int] = (
+            self.dropout_features.index("predicted_CGPA") if "predicted_CGPA" in self.dropout_features else None
+        )
+
+        # col -> (column position, {label: code}, default code, classes for error messages)
+        self.categorical: Dict[str, Tuple[int, Dict[str, int], int, List[str]]] = {}
+        for col in CATEGORICAL_FIELDS:
+            encoder = label_encoders.get(col)
+            if encoder is None or col not in position:
+                continue
+            classes = [str(c) for c in encoder.classes_]
+            default_value = "Medium" if col == "Academic_Risk_Level" and "Medium" in classes else classes[0]
+            lookup = {label: code for code, label in enumerate(classes)}
+            self.categorical[col] = (position[col], lookup, lookup[default_value], classes)
+
+        self.numeric = [(position[col], col) for col in self.columns if col not in self.categorical]
+
+    def _encode_into(self, data: dict, out: np.ndarray) -> None:
+        for col, (slot, lookup, default_code, classes) in self.categorical.items():
+            value = data.get(col)
+            if value is None or value == "" or (isinstance(value, float) and math.isnan(value)):
+                out[slot] = default_code
+                continue
+            code = lookup.get(str(value))
+            if code is None:
+                raise ValueError(f"Unknown value for '{col}': '{value}'. Expected one of: {classes}")
+            out[slot] = code
+
+        for slot, col in self.numeric:
+            out[slot] = _to_float(data.get(col))
+
+    def encode_row(self, data: dict, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Encode one record into ``out`` (or a fresh buffer) in ``columns`` order.
+
+        Raises ValueError for a categorical value the encoders have never seen.
+        """
+        if out is None:
+            out = np.empty(len(self.columns), dtype=np.float64)
+        self._encode_into(data, out)
+        return out
+
+    def encode_rows(self, rows: Sequence[dict]):
+        """Encode many records into one preallocated matrix.
+
+        Returns ``(X, errors)`` where ``X`` holds one row per record that encoded
+        cleanly (in input order) and ``errors`` maps the input position of each
+        rejected record to its message.
+        """
+        X = np.empty((len(rows), len(self.columns)), dtype=np.float64)
+        errors = {}
+        filled = 0
+        for pos, data in enumerate(rows):
+            try:
+                self._encode_into(data, X[filled])
+            except ValueError as ve:
+                errors[pos] = str(ve)
+                continue
+            filled += 1
+        return X[:filled], errors
+
+    def encode_frame(self, df: pd.DataFrame):
+        """Column-at-a-time variant of ``encode_rows`` for tabular inputs.
+
+        Returns ``(X, errors)`` with the same meaning as ``encode_rows``; error
+        keys are row positions in ``df``.
+        """
+        n_rows = len(df)
+        X = np.empty((n_rows, len(self.columns)), dtype=np.float64)
+        invalid = np.zeros(n_rows, dtype=bool)
+        errors = {}
+
+        for col, (slot, lookup, default_code, classes) in self.categorical.items():
+            if col not in df.columns:
+                X[:, slot] = default_code
+                continue
+            raw = df[col]
+            missing = (raw.isna() | (raw == "")).to_numpy()
+            codes = raw.astype(str).map(lookup).to_numpy(dtype=np.float64, na_value=np.nan)
+            codes[missing] = default_code
+
+            unknown = np.isnan(codes) & ~invalid
+            for pos in np.flatnonzero(unknown):
+                errors[int(pos)] = f"Unknown value for '{col}': '{raw.iat[pos]}'. Expected one of: {classes}"
+            invalid |= unknown
+            X[:, slot] = np.nan_to_num(codes, nan=0.0)
+
+        for slot, col in self.numeric:
+            if col not in df.columns:
+                X[:, slot] = 0.0
+                continue
+            values = pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+            X[:, slot] = np.nan_to_num(values, nan=0.0, posinf=np.inf, neginf=-np.inf)
+
+        return X[~invalid], errors
+
+    def gpa_matrix(self, X: np.ndarray) -> np.ndarray:
+        return X[:, self.gpa_index]
+
+    def dropout_matrix(self, X: np.ndarray, predicted_cgpa=None) -> np.ndarray:
+        """Select the dropout model's columns, filling in the GPA stage's output if it is a feature."""
+        X_dropout = X[:, self.dropout_index]
+        if predicted_cgpa is not None and self.dropout_cgpa_pos is not None:
+            X_dropout[:, self.dropout_cgpa_pos] = predicted_cgpa
+        return X_dropout
@@ -0,0 +1,254 @@
+"""On-disk store of encoded student feature vectors and their last predictions.
+
+One directory per model version under FEATURE_STORE_DIR:
+
+    meta.json     columns, risk labels, model version and artifact mtimes
+    features.npy  float64 (capacity, len(columns)) rows laid out as plan.columns
+    cgpa.npy      float32 (capacity,) last predicted CGPA
+    risk.npy      int8 (capacity,) last risk level, an index into meta["risk_labels"]
+    keys.txt      Enrollment_No of row i on line i, appended as students are added
+
+The arrays are memory-mapped, so opening a store costs one pass over
+keys.txt to build the Enrollment_No -> row dict; after that a lookup is a
+dict probe plus a row read, with no encoding. A store is tied to the model
+artifacts it was built with and is ignored once they change.
+
+Run from the ml-service directory:
+
+    python feature_store.py build
+    python feature_store.py get ENR2025102
+"""
+import argparse
+import json
+import logging
+import os
+import shutil
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+from numpy.lib.format import open_memmap
+
+from config import FEATURE_STORE_DIR
+from model_registry import ModelBundle, registry
+
+logger = logging.getLogger(__name__)
+
+META_FILE = "meta.json"
+KEYS_FILE = "keys.txt"
+ARRAYS = {"features": np.float64, "cgpa": np.float32, "risk": np.int8}
+SCORE_CHUNK_ROWS = 4096
+MIN_CAPACITY = 1024
+
+
+def _stamp(models: ModelBundle) -> list:
+    return list(registry.artifact_mtimes(models.version))
+
+
+class FeatureStore:
+    def __init__(self, directory: str, meta: dict, keys: List[str]):
+        self.directory = directory
+        self.meta = meta
+        self.columns = meta["columns"]
+        self.risk_labels = meta["risk_labels"]
+        self._risk_codes = {label: code for code, label in enumerate(self.risk_labels)}
+        self.index: Dict[str, int] = {key: row for row, key in enumerate(keys)}
+        self.rows = len(keys)
+        self._lock = threading.Lock()
+        self._map_arrays()
+
+    def _map_arrays(self):
+        for name in ARRAYS:
+            setattr(self, name, np.load(os.path.join(self.directory, f"{name}.npy"), mmap_mode="r+"))
+        self.capacity = self.features.shape[0]
+
+    @classmethod
+    def build(cls, directory: str, models: ModelBundle, df) -> "FeatureStore":
+        """Encode and score every row of ``df`` into a fresh store.
+
+        The dataset holds one record per student per semester; each
+        Enrollment_No keeps its latest semester (its last row, among equals).
+        """
+        if "Semester" in df.columns:
+            df = df.sort_values("Semester", kind="stable")
+        X, errors = models.plan.encode_frame(df)
+        valid = np.ones(len(df), dtype=bool)
+        valid[list(errors)] = False
+        ids = df["Enrollment_No"].astype(str).to_numpy()[valid]
+        last = {key: i for i, key in enumerate(ids)}
+        keep = np.fromiter(last.values(), dtype=np.intp, count=len(last))
+        X, ids = X[keep], ids[keep]
+
+        meta = {
+            "model_version": models.version,
+            "artifact_mtimes": _stamp(models),
+            "columns": models.plan.columns,
+            "risk_labels": models.pipeline.proba_labels,
+        }
+        tmp = f"{directory}.{os.getpid()}.tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        capacity = max(MIN_CAPACITY, len(X) + len(X) // 4)
+        arrays = {
+            name: open_memmap(
+                os.path.join(tmp, f"{name}.npy"),
+                mode="w+",
+                dtype=dtype,
+                shape=(capacity, X.shape[1]) if name == "features" else (capacity,),
+            )
+            for name, dtype in ARRAYS.items()
+        }
+        codes = {label: code for code, label in enumerate(meta["risk_labels"])}
+        arrays["features"][: len(X)] = X
+        for start in range(0, len(X), SCORE_CHUNK_ROWS):
+            cgpa, labels = models.pipeline.run(X[start : start + SCORE_CHUNK_ROWS])
+            arrays["cgpa"][start : start + len(cgpa)] = cgpa
+            arrays["risk"][start : start + len(cgpa)] = [codes[label] for label in labels]
+        for array in arrays.values():
+            array.flush()
+        del arrays
+        with open(os.path.join(tmp, KEYS_FILE), "w") as fh:
+            fh.writelines(f"{key}\n" for key in ids)
+        with open(os.path.join(tmp, META_FILE), "w") as fh:
+            json.dump(meta, fh)
+
+        shutil.rmtree(directory, ignore_errors=True)
+        os.replace(tmp, directory)
+        return cls(directory, meta, list(ids))
+
+    @classmethod
+    def open(cls, directory: str, models: ModelBundle) -> Optional["FeatureStore"]:
+        """The store in ``directory`` if it exists and matches ``models``; otherwise None."""
+        try:
+            with open(os.path.join(directory, META_FILE)) as fh:
+                meta = json.load(fh)
+            with open(os.path.join(directory, KEYS_FILE)) as fh:
+                # A line without its newline was cut short by a crash mid-append.
+                keys = [line[:-1] for line in fh if line.endswith("\n")]
+        except FileNotFoundError:
+            return None
+        if meta["artifact_mtimes"] != _stamp(models) or meta["columns"] != models.plan.columns:
+            logger.warning("Feature store in %s is stale for model version %s; rebuild it", directory, models.version)
+            return None
+        return cls(directory, meta, keys)
+
+    def lookup(self, enrollment_no: str) -> Optional[int]:
+        return self.index.get(enrollment_no)
+
+    def outputs(self, row: int) -> dict:
+        return {
+            "predicted_CGPA": round(float(self.cgpa[row]), 2),
+            "academic_risk_level": self.risk_labels[self.risk[row]],
+        }
+
+    def set_outputs(self, row: int, cgpa: float, label: str) -> None:
+        self.cgpa[row] = cgpa
+        self.risk[row] = self._risk_codes[label]
+
+    def upsert(self, enrollment_no: str, x: np.ndarray, cgpa: float, label: str) -> int:
+        """Write a student's encoded row and outputs, appending a row for a new Enrollment_No."""
+        with self._lock:
+            row = self.index.get(enrollment_no)
+            if row is None:
+                if self.rows == self.capacity:
+                    self._grow()
+                row = self.rows
+            self.features[row] = x
+            self.set_outputs(row, cgpa, label)
+            if enrollment_no not in self.index:
+                # The row is written before its key, so a crash never exposes a blank row.
+                with open(os.path.join(self.directory, KEYS_FILE), "a") as fh:
+                    fh.write(f"{enrollment_no}\n")
+                self.index[enrollment_no] = row
+                self.rows += 1
+        return row
+
+    def _grow(self):
+        capacity = self.capacity * 2
+        for name, dtype in ARRAYS.items():
+            old = getattr(self, name)
+            path = os.path.join(self.directory, f"{name}.npy")
+            grown = open_memmap(f"{path}.tmp", mode="w+", dtype=dtype, shape=(capacity,) + old.shape[1:])
+            grown[: self.rows] = old[: self.rows]
+            grown.flush()
+            del grown
+            os.replace(f"{path}.tmp", path)
+        # Readers still holding the old maps keep valid (if soon outdated) data.
+        self._map_arrays()
+
+    def flush(self) -> None:
+        for name in ARRAYS:
+            getattr(self, name).flush()
+
+    def stats(self) -> dict:
+        return {
+            "directory": self.directory,
+            "model_version": self.meta["model_version"],
+            "rows": self.rows,
+            "capacity": self.capacity,
+            "bytes_on_disk": sum(getattr(self, name).nbytes for name in ARRAYS),
+        }
+
+
+def store_dir(version: str) -> str:
+    return os.path.join(FEATURE_STORE_DIR, version)
+
+
+_stores: Dict[str, Optional[FeatureStore]] = {}
+_stores_lock = threading.Lock()
+
+
+def store_for(models: ModelBundle) -> Optional[FeatureStore]:
+    """The open store for this bundle's revision, opened on first use; None if there is none."""
+    store = _stores.get(models.revision)
+    if store is None and models.revision not in _stores:
+        with _stores_lock:
+            if models.revision not in _stores:
+                _stores[models.revision] = FeatureStore.open(store_dir(models.version), models)
+            store = _stores[models.revision]
+    return store
+
+
+def forget(version: Optional[str] = None) -> None:
+    """Drop open stores so the next access re-checks them against the (re)loaded models."""
+    with _stores_lock:
+        for revision in list(_stores):
+            store = _stores[revision]
+            if store is not None:
+                store.flush()
+            if version is None or revision.split("#")[0] == version:
+                del _stores[revision]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="encode and score a dataset CSV into the store")
+    build.add_argument("--dataset", default="StudentData.csv", help="file in the dataset directory")
+    build.add_argument("--model-version", default=None, help="defaults to the active version")
+    get = sub.add_parser("get", help="print a student's stored prediction")
+    get.add_argument("enrollment_no")
+    get.add_argument("--model-version", default=None)
+    args = parser.parse_args(argv)
+
+    models = registry.bundle(args.model_version)
+    if args.command == "build":
+        from load_data import load_dataset
+
+        df = load_dataset(args.dataset)
+        if df is None:
+            raise SystemExit(1)
+        store = FeatureStore.build(store_dir(models.version), models, df)
+        print(json.dumps(store.stats(), indent=2))
+    else:
+        store = FeatureStore.open(store_dir(models.version), models)
+        if store is None:
+            raise SystemExit(f"No feature store for version '{models.version}'; run: python feature_store.py build")
+        row = store.lookup(args.enrollment_no)
+        if row is None:
+            raise SystemExit(f"Unknown Enrollment_No: {args.enrollment_no}")
+        print(json.dumps({"Enrollment_No": args.enrollment_no, "row": row, **store.outputs(row)}))
+
+
+if __name__ == "__main__":
+    main()
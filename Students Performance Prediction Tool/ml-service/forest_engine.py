@@ -0,0 +1,166 @@
+from typing import Optional, Tuple
+
+import numpy as np
+
+# Rows traversed per step; bounds the (rows x trees) index arrays on big batches.
+CHUNK_ROWS = 4096
+
+
+class FlatForest:
+    """A fitted sklearn forest re-laid out as contiguous node arrays.
+
+    Every tree's nodes are concatenated into shared ``feature``/``threshold``/
+    ``left``/``right`` arrays with absolute child indices. Leaves point back at
+    themselves with an infinite threshold, so one vectorized step advances
+    every (row, tree) pair at once and rows that reached a leaf stay put.
+
+    Inputs are compared as float32, and per-tree outputs are summed in tree
+    order before dividing, exactly as sklearn does, so results are identical
+    to the wrapped model's.
+    """
+
+    def __init__(self, model):
+        trees = [est.tree_ for est in model.estimators_]
+        sizes = np.array([t.node_count for t in trees], dtype=np.intp)
+        offsets = np.concatenate(([0], np.cumsum(sizes)[:-1])).astype(np.intp)
+
+        self.n_trees = len(trees)
+        self.roots = offsets
+        self.max_depth = max(t.max_depth for t in trees)
+        self.feature_names_in_ = getattr(model, "feature_names_in_", None)
+        self.n_features_in_ = model.n_features_in_
+
+        feature, threshold, left, right, missing_left, value = [], [], [], [], [], []
+        for tree, offset in zip(trees, offsets):
+            n = tree.node_count
+            leaf = tree.children_left[:n] == -1
+            own = np.arange(n, dtype=np.intp) + offset
+            feature.append(np.where(leaf, 0, tree.feature[:n]))
+            threshold.append(np.where(leaf, np.inf, tree.threshold[:n]))
+            left.append(np.where(leaf, own, tree.children_left[:n] + offset))
+            right.append(np.where(leaf, own, tree.children_right[:n] + offset))
+            missing_left.append(tree.missing_go_to_left[:n].astype(bool) & ~leaf)
+            value.append(tree.value[:n, 0, :])
+
+        self.feature = np.ascontiguousarray(np.concatenate(feature), dtype=np.intp)
+        self.threshold = np.ascontiguousarray(np.concatenate(threshold), dtype=np.float64)
+        self.left = np.ascontiguousarray(np.concatenate(left), dtype=np.intp)
+        self.right = np.ascontiguousarray(np.concatenate(right), dtype=np.intp)
+        self.missing_left = np.concatenate(missing_left)
+        self.is_leaf = self.left == np.arange(len(self.left))
+        self.value = np.ascontiguousarray(np.concatenate(value), dtype=np.float64)
+
+    @property
+    def nbytes(self) -> int:
+        arrays = (self.feature, self.threshold, self.left, self.right, self.missing_left, self.is_leaf, self.value)
+        return sum(a.nbytes for a in arrays)
+
+    def apply(self, X) -> np.ndarray:
+        """Absolute leaf index reached by every row in every tree, shape (n_rows, n_trees)."""
+        X = np.asarray(X, dtype=np.float32)
+        leaves = np.empty((X.shape[0], self.n_trees), dtype=np.intp)
+        for start in range(0, X.shape[0], CHUNK_ROWS):
+            leaves[start : start + CHUNK_ROWS] = self._apply_chunk(X[start : start + CHUNK_ROWS])
+        return leaves
+
+    def _apply_chunk(self, X: np.ndarray) -> np.ndarray:
+        nodes = np.tile(self.roots, (X.shape[0], 1))
+        rows = np.arange(X.shape[0])[:, np.newaxis]
+        for _ in range(self.max_depth):
+            if self.is_leaf[nodes].all():
+                break
+            x = X[rows, self.feature[nodes]]
+            go_left = x <= self.threshold[nodes]
+            go_left |= np.isnan(x) & self.missing_left[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return nodes
+
+    def contributions(self, X) -> Tuple[np.ndarray, np.ndarray]:
+        """Path-based per-feature contributions, as ``(bias, contributions)``.
+
+        Along each tree's decision path, the change in node value from a split
+        to the child taken is credited to the split's feature (Saabas' method).
+        ``bias`` is the mean root value, shape (n_outputs,); ``contributions``
+        has shape (n_rows, n_features, n_outputs), and ``bias`` plus a row's
+        contributions summed over features is that row's prediction.
+        """
+        X = np.asarray(X, dtype=np.float32)
+        out = np.empty((X.shape[0], self.n_features_in_, self.value.shape[1]))
+        for start in range(0, X.shape[0], CHUNK_ROWS):
+            out[start : start + CHUNK_ROWS] = self._contributions_chunk(X[start : start + CHUNK_ROWS])
+        return self.value[self.roots].mean(axis=0), out
+
+    def _contributions_chunk(self, X: np.ndarray) -> np.ndarray:
+        n_rows, n_features = X.shape[0], self.n_features_in_
+        n_outputs = self.value.shape[1]
+        totals = np.zeros(n_rows * n_features * n_outputs)
+        outputs = np.arange(n_outputs)
+        # Only (row, tree) pairs still above a leaf are carried to the next
+        # level, along with their current node's value so it is gathered once.
+        # Tree-major order keeps each tree's nodes together in memory.
+        nodes = np.repeat(self.roots, n_rows)
+        rows = np.tile(np.arange(n_rows), self.n_trees)
+        values = self.value[nodes]
+        for _ in range(self.max_depth):
+            active = ~self.is_leaf[nodes]
+            if not active.all():
+                nodes, rows, values = nodes[active], rows[active], values[active]
+            if not len(nodes):
+                break
+            feature = self.feature[nodes]
+            x = X[rows, feature]
+            go_left = x <= self.threshold[nodes]
+            go_left |= np.isnan(x) & self.missing_left[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+            child_values = self.value[nodes]
+            slots = ((rows * n_features + feature) * n_outputs)[:, np.newaxis] + outputs
+            totals += np.bincount(slots.ravel(), weights=(child_values - values).ravel(), minlength=len(totals))
+            values = child_values
+        return (totals / self.n_trees).reshape(n_rows, n_features, n_outputs)
+
+    def _mean_leaf_value(self, X) -> np.ndarray:
+        # cumsum accumulates strictly in tree order, matching sklearn's running
+        # sum; np.sum would switch to pairwise summation and drift in the last bit.
+        leaf_values = self.value[self.apply(X)]
+        return np.cumsum(leaf_values, axis=1)[:, -1] / self.n_trees
+
+
+class FlatForestRegressor(FlatForest):
+    def predict(self, X) -> np.ndarray:
+        return self._mean_leaf_value(X)[:, 0]
+
+
+class FlatForestClassifier(FlatForest):
+    def __init__(self, model):
+        super().__init__(model)
+        self.classes_ = model.classes_
+
+    def predict_proba(self, X) -> np.ndarray:
+        return self._mean_leaf_value(X)
+
+    def predict(self, X) -> np.ndarray:
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1), axis=0)
+
+
+def flatten(model):
+    """Return a flat engine for single-output sklearn random forests, else the model unchanged."""
+    from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+
+    if getattr(model, "n_outputs_", 1) != 1:
+        return model
+    if isinstance(model, RandomForestRegressor):
+        return FlatForestRegressor(model)
+    if isinstance(model, RandomForestClassifier):
+        return FlatForestClassifier(model)
+    return model
+
+
+def mismatches(model, engine, X, method: Optional[str] = None) -> int:
+    """Number of rows where ``engine`` and ``model`` disagree bit-for-bit."""
+    method = method or "predict"
+    expected = getattr(model, method)(X)
+    actual = getattr(engine, method)(X)
+    differs = expected != actual
+    if differs.ndim > 1:
+        differs = differs.any(axis=1)
+    return int(differs.sum())
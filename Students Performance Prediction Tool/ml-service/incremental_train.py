@@ -0,0 +1,209 @@
+"""Grow the trained forests with rows appended to the dataset since the last run.
+
+train_models writes a manifest next to the artifacts recording how many rows
+and bytes of dataset/StudentData.csv they were trained on. When the file has
+only grown since then (its first ``dataset_bytes`` still hash the same), the
+existing forests are extended with ``warm_start``: the old trees are kept and
+only the extra trees are fitted, on the old and new training rows together.
+The manifest records which rows were held out for testing. Old rows keep
+that split and only the new rows are split, so across any chain of runs no
+tree is evaluated on rows it was fitted on.
+
+The saved label encoders are reused unless the new rows contain a category
+they have never seen. New codes would shift the meaning of every existing
+split threshold, so in that case, and whenever the old rows were edited, it
+falls back to a full retrain.
+
+Run from the ml-service directory:
+
+    python incremental_train.py
+    python incremental_train.py --extra-trees 40 --compare-full
+"""
+import argparse
+import math
+import os
+import time
+import warnings
+
+import joblib
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+from sklearn.model_selection import train_test_split
+
+from calibration import fit_replayed_oob_calibrator
+from evaluate_models import compute_metrics
+from load_data import load_dataset
+from preprocess import RANDOM_STATE, TEST_SIZE, apply_encoders, preprocess_data, unseen_categories
+from train_models import (
+    CALIBRATOR_FILE,
+    DROP_MODEL_FILE,
+    ENCODER_FILE,
+    FEATURES,
+    GPA_MODEL_FILE,
+    MODEL_DIR,
+    build_manifest,
+    save_model,
+    train_models,
+)
+from training_data import PhaseTimer, dataset_hash, dataset_path, read_manifest, write_manifest
+
+# Fewest trees added per run, however few rows arrived.
+MIN_EXTRA_TREES = 10
+
+
+def _split_new_rows(new_df: pd.DataFrame):
+    if len(new_df) < 2:
+        return new_df, new_df.iloc[:0]
+    return train_test_split(new_df, test_size=TEST_SIZE, random_state=RANDOM_STATE)
+
+
+def _old_test_rows(manifest, old_df):
+    """Row positions of the old rows' test split, or None if it cannot be recovered."""
+    if "test_rows" in manifest:
+        return manifest["test_rows"]
+    if manifest["mode"] == "full":
+        # Manifests from before test_rows was recorded: a full run split with
+        # preprocess_data's fixed seed, so the same call reproduces it.
+        return preprocess_data(old_df)[1].index.tolist()
+    return None
+
+
+def _grow(model, extra_trees, X, y, n_jobs):
+    model.set_params(warm_start=True, n_estimators=len(model.estimators_) + extra_trees, n_jobs=n_jobs)
+    with warnings.catch_warnings():
+        # sklearn warns that "balanced" weights drift when warm-started on a
+        # subset; the extra trees here always see the whole training set.
+        warnings.filterwarnings("ignore", message="class_weight presets")
+        model.fit(X, y)
+    model.set_params(warm_start=False, n_jobs=None)
+    return model
+
+
+def _full_fit(X, y_reg, y_clf, n_jobs):
+    gpa = RandomForestRegressor(random_state=RANDOM_STATE, n_estimators=200, n_jobs=n_jobs).fit(X, y_reg)
+    dropout = RandomForestClassifier(
+        random_state=RANDOM_STATE, n_estimators=200, class_weight="balanced", n_jobs=n_jobs
+    ).fit(X, y_clf)
+    return gpa, dropout
+
+
+def _print_drift(label, before, after):
+    print(f"{label}:")
+    for name in ("mae", "mse", "r2", "accuracy"):
+        print(f"  {name:<8} {before[name]:.4f} -> {after[name]:.4f}  ({after[name] - before[name]:+.4f})")
+
+
+def incremental_train(version=None, output_version=None, extra_trees=None, n_jobs=-1, compare_full=False):
+    """Add trees for newly appended rows to ``version``, saving to ``output_version`` (default: in place)."""
+    model_dir = MODEL_DIR if version is None else os.path.join(MODEL_DIR, version)
+    output_version = version if output_version is None else output_version
+    output_dir = MODEL_DIR if output_version is None else os.path.join(MODEL_DIR, output_version)
+    path = dataset_path()
+
+    manifest = read_manifest(model_dir)
+    if manifest is None:
+        print("No training manifest found; running a full retrain.")
+        return train_models(output_version, n_jobs=n_jobs)
+    if os.path.getsize(path) < manifest["dataset_bytes"] or dataset_hash(
+        path, manifest["dataset_bytes"]
+    ) != manifest["dataset_hash"]:
+        print("Previously trained rows have changed; running a full retrain.")
+        return train_models(output_version, n_jobs=n_jobs)
+
+    timer = PhaseTimer()
+    with timer.phase("load_preprocess"):
+        df = load_dataset()
+        old_df, new_df = df.iloc[: manifest["dataset_rows"]], df.iloc[manifest["dataset_rows"] :]
+        if new_df.empty:
+            print("No new rows since the last training run; nothing to do.")
+            return None
+
+        encoders = joblib.load(os.path.join(model_dir, ENCODER_FILE))
+        unseen = unseen_categories(new_df, encoders)
+        if unseen:
+            print(f"New categories {unseen}; refitting encoders with a full retrain.")
+            return train_models(output_version, n_jobs=n_jobs)
+
+        old_test_rows = _old_test_rows(manifest, old_df)
+        if old_test_rows is None:
+            print("Manifest does not record its test split; running a full retrain.")
+            return train_models(output_version, n_jobs=n_jobs)
+
+        # Old rows keep the split recorded in the manifest; only new rows are split.
+        held_out = old_df.index.isin(old_test_rows)
+        new_train, new_test = _split_new_rows(new_df)
+        train_df = pd.concat([old_df[~held_out], new_train])
+        test_df = pd.concat([old_df[held_out], new_test])
+        X_train, y_reg_train, y_clf_train = apply_encoders(train_df, encoders)
+        X_train = X_train[FEATURES]
+        X_test, y_reg_test, y_clf_test = apply_encoders(test_df, encoders)
+
+    with timer.phase("load_models"):
+        gpa_model = joblib.load(os.path.join(model_dir, GPA_MODEL_FILE))
+        dropout_model = joblib.load(os.path.join(model_dir, DROP_MODEL_FILE))
+    before = compute_metrics(gpa_model, dropout_model, X_test, y_reg_test, y_clf_test)
+
+    if extra_trees is None:
+        # Keep the new rows' share of trees roughly in line with their share of the data.
+        extra_trees = max(MIN_EXTRA_TREES, math.ceil(manifest["n_estimators"]["gpa"] * len(new_df) / len(old_df)))
+    print(f"{len(new_df)} new rows; adding {extra_trees} trees to each forest.")
+
+    old_trees = len(dropout_model.estimators_)
+    with timer.phase("fit"):
+        _grow(gpa_model, extra_trees, X_train, y_reg_train, n_jobs)
+        _grow(dropout_model, extra_trees, X_train, y_clf_train, n_jobs)
+    fit_seconds = timer.phases["fit"]
+
+    with timer.phase("evaluate"):
+        after = compute_metrics(gpa_model, dropout_model, X_test, y_reg_test, y_clf_test)
+
+    with timer.phase("save"):
+        os.makedirs(output_dir, exist_ok=True)
+        save_model(gpa_model, GPA_MODEL_FILE, output_dir)
+        save_model(dropout_model, DROP_MODEL_FILE, output_dir)
+        if output_dir != model_dir:
+            joblib.dump(encoders, os.path.join(output_dir, ENCODER_FILE))
+        if getattr(dropout_model, "oob_score", False):
+            # sklearn's oob_decision_function_ replays the old trees' bootstraps
+            # over this run's rows, so it counts rows they trained on as
+            # out-of-bag; only the new trees' estimates are honest.
+            calibrator = fit_replayed_oob_calibrator(dropout_model, X_train, y_clf_train, old_trees)
+            joblib.dump(calibrator, os.path.join(output_dir, CALIBRATOR_FILE))
+        new_manifest = build_manifest(
+            "incremental", path, len(df), gpa_model, dropout_model, encoders, fit_seconds, after, test_df.index
+        )
+        # Carry the last full fit time forward; it is what a full retrain is compared against.
+        new_manifest["full_fit_seconds"] = manifest.get("full_fit_seconds", manifest["fit_seconds"])
+        new_manifest["full_fit_rows"] = manifest.get("full_fit_rows", manifest["dataset_rows"])
+        write_manifest(output_dir, new_manifest)
+
+    print(timer.report("Incremental training time"))
+    _print_drift("Test metrics, previous model -> grown model", before, after)
+
+    if compare_full:
+        started = time.perf_counter()
+        full_gpa, full_dropout = _full_fit(X_train, y_reg_train, y_clf_train, n_jobs)
+        full_seconds = time.perf_counter() - started
+        full = compute_metrics(full_gpa, full_dropout, X_test, y_reg_test, y_clf_test)
+        _print_drift("Test metrics, full retrain -> grown model", full, after)
+        label = "measured"
+    else:
+        # Forest fit time grows roughly linearly with the number of rows.
+        full_seconds = new_manifest["full_fit_seconds"] * len(df) / new_manifest["full_fit_rows"]
+        label = "estimated"
+    print(
+        f"Fit time: {fit_seconds:.2f}s incremental vs {full_seconds:.2f}s full retrain ({label}); "
+        f"saved {full_seconds - fit_seconds:.2f}s"
+    )
+    return new_manifest
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--version", help="model version to grow (default: models/)")
+    parser.add_argument("--output-version", help="write the grown models here instead of in place")
+    parser.add_argument("--extra-trees", type=int, help="trees added per forest (default: scaled to new rows)")
+    parser.add_argument("--n-jobs", type=int, default=-1, help="threads per forest (-1: all cores)")
+    parser.add_argument("--compare-full", action="store_true", help="also time a full retrain, without saving it")
+    args = parser.parse_args()
+    incremental_train(args.version, args.output_version, args.extra_trees, args.n_jobs, args.compare_full)
@@ -1,17 +1,154 @@
-import pandas as pd
+import hashlib
+import json
 import os
 
-def load_dataset(filename="StudentData.csv"):
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # Parquet cache and Arrow-backed strings are optional.
+    pyarrow = None
+
+DATASET_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "dataset")
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "dataset")
+
+# Bump when SCHEMA changes so existing caches are rebuilt.
+SCHEMA_VERSION = 2
+
+_STRING = "string[pyarrow]" if pyarrow is not None else "string"
+
+# Integer columns are nullable so a blank cell loads as <NA> instead of
+# failing the whole file, as the untyped pandas read used to accept.
+SCHEMA = {
+    "Student_Name": _STRING,
+    "Enrollment_No": _STRING,
+    "Semester": "Int8",
+    "Department": "category",
+    "Age": "Int8",
+    "Gender": "category",
+    "G1_Internal": "Int16",
+    "G2_Internal": "Int16",
+    "Final_Exam_Score": "Int16",
+    "Attendance_Percentage": "Int16",
+    "Study_Hours_Per_Week": "Int8",
+    "Backlogs": "Int8",
+    "Parent_Education_Level": "category",
+    "Part_Time_Work": "category",
+    "Previous_CGPA": "float32",
+    "predicted_CGPA": "float32",
+    "Academic_Risk_Level": "category",
+}
+
+
+def dataset_hash(path: str, limit: int = None, block_size: int = 1 << 20) -> str:
+    """Hash of the file, or of its first ``limit`` bytes."""
+    digest = hashlib.blake2b(digest_size=16)
+    remaining = os.path.getsize(path) if limit is None else limit
+    with open(path, "rb") as fh:
+        while remaining > 0:
+            block = fh.read(min(block_size, remaining))
+            if not block:
+                break
+            digest.update(block)
+            remaining -= len(block)
+    return digest.hexdigest()
+
+
+NUMERIC_COLUMNS = [col for col, dtype in SCHEMA.items() if dtype[0] in "Iif"]
+
+
+def read_csv_typed(path: str) -> pd.DataFrame:
+    """Read with SCHEMA dtypes; malformed numbers become <NA>/NaN and are reported, not fatal."""
+    try:
+        return pd.read_csv(path, dtype=SCHEMA)
+    except (ValueError, TypeError, OverflowError):
+        pass
+    # Slow path: read the numeric columns untyped, coerce them, and say which rows were bad.
+    df = pd.read_csv(path, dtype={c: t for c, t in SCHEMA.items() if c not in NUMERIC_COLUMNS})
+    for col in NUMERIC_COLUMNS:
+        if col not in df.columns:
+            continue
+        values = pd.to_numeric(df[col], errors="coerce")
+        if SCHEMA[col][0] == "I":
+            # Fractions or out-of-range values do not fit the integer type either.
+            info = np.iinfo(SCHEMA[col].lower())
+            values = values.where((values % 1 == 0) & values.between(info.min, info.max))
+        bad = values.isna() & df[col].notna()
+        if bad.any():
+            rows = (np.flatnonzero(bad) + 2).tolist()  # file line numbers, after the header
+            print(f"WARNING: {int(bad.sum())} malformed value(s) in '{col}' set to missing (lines {rows[:10]})")
+        df[col] = values.astype(SCHEMA[col])
+    return df
+
+
+def load_table(path: str, cache_dir: str = CACHE_DIR, use_cache: bool = True) -> pd.DataFrame:
+    """Read a student CSV with ``SCHEMA`` dtypes, through a Parquet copy when pyarrow is available.
+
+    The copy is reused while the CSV's size and mtime are unchanged, or, if
+    only the mtime moved, while its content hash still matches.
+    """
+    if not use_cache or pyarrow is None:
+        return read_csv_typed(path)
+
+    stem = os.path.splitext(os.path.basename(path))[0]
+    cache_path = os.path.join(cache_dir, f"{stem}.parquet")
+    meta_path = cache_path + ".json"
+    stat = os.stat(path)
+    source = {"schema_version": SCHEMA_VERSION, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+    try:
+        with open(meta_path) as fh:
+            meta = json.load(fh)
+    except (OSError, ValueError):
+        meta = None
+
+    if meta is not None and os.path.exists(cache_path) and meta["schema_version"] == SCHEMA_VERSION:
+        fresh = meta["size"] == source["size"] and meta["mtime_ns"] == source["mtime_ns"]
+        if not fresh and meta["size"] == source["size"] and meta["hash"] == dataset_hash(path):
+            # Touched but not changed (e.g. a fresh checkout); remember the new mtime.
+            meta["mtime_ns"] = source["mtime_ns"]
+            with open(meta_path, "w") as fh:
+                json.dump(meta, fh)
+            fresh = True
+        if fresh:
+            # pandas' stored metadata would rebuild the strings as Python objects;
+            # the Arrow types alone already map to the SCHEMA dtypes.
+            string = pd.StringDtype("pyarrow")
+            table = pyarrow.parquet.read_table(cache_path)
+            return table.to_pandas(
+                ignore_metadata=True,
+                types_mapper={
+                    pyarrow.string(): string,
+                    pyarrow.large_string(): string,
+                    # Keep nullable integers nullable instead of widening them to float.
+                    pyarrow.int8(): pd.Int8Dtype(),
+                    pyarrow.int16(): pd.Int16Dtype(),
+                }.get,
+            )
+
+    df = read_csv_typed(path)
+    os.makedirs(cache_dir, exist_ok=True)
+    # Write then rename so a concurrent reader never sees a partial file.
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    df.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, cache_path)
+    with open(meta_path, "w") as fh:
+        json.dump({**source, "hash": dataset_hash(path)}, fh)
+    return df
+
+
+def load_dataset(filename="StudentData.csv", use_cache=True):
     """
     Loads the dataset from backend/dataset/ folder.
-    Returns a pandas DataFrame.
+    Returns a pandas DataFrame with the dtypes in SCHEMA.
     """
 
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    dataset_path = os.path.join(current_dir, "..", "dataset", filename)
+    dataset_path = os.path.join(DATASET_DIR, filename)
 
     try:
-        df = pd.read_csv(dataset_path)
+        df = load_table(dataset_path, use_cache=use_cache)
         print(f"Dataset loaded successfully! Shape: {df.shape}")
         return df
 
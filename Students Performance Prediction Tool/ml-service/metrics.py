@@ -0,0 +1,94 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Sequence
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus style (``le`` upper bounds)."""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = sorted(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            self._count += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counts, total, count = list(self._counts), self._sum, self._count
+        cumulative, running = {}, 0
+        for bound, n in zip(self.buckets + [float("inf")], counts):
+            running += n
+            cumulative["+Inf" if bound == float("inf") else repr(bound)] = running
+        return {"buckets": cumulative, "sum": total, "count": count}
+
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    inner = ",".join(f'{k}="{str(v)}"' for k, v in labels.items())
+    return "{" + inner + "}"
+
+
+def render_histogram(name: str, documentation: str, series: dict) -> List[str]:
+    """Prometheus text lines for ``{label_tuple: Histogram}``; label tuples are ((name, value), ...)."""
+    lines = [f"# HELP {name} {documentation}", f"# TYPE {name} histogram"]
+    for label_items, histogram in series.items():
+        labels = dict(label_items)
+        snap = histogram.snapshot()
+        for bound, count in snap["buckets"].items():
+            lines.append(f"{name}_bucket{_format_labels({**labels, 'le': bound})} {count}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {snap['sum']}")
+        lines.append(f"{name}_count{_format_labels(labels)} {snap['count']}")
+    return lines
+
+
+def render_scalar(name: str, documentation: str, kind: str, samples: dict) -> List[str]:
+    """Prometheus text lines for a counter or gauge given ``{label_tuple: value}``."""
+    lines = [f"# HELP {name} {documentation}", f"# TYPE {name} {kind}"]
+    for label_items, value in samples.items():
+        lines.append(f"{name}{_format_labels(dict(label_items))} {value}")
+    return lines
+
+
+class LabeledHistogram:
+    """A family of histograms sharing a name and buckets, split by one label."""
+
+    def __init__(self, name: str, documentation: str, label: str, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.label = label
+        self.buckets = buckets
+        self._children: Dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, value: str) -> Histogram:
+        child = self._children.get(value)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(value, Histogram(self.buckets))
+        return child
+
+    @contextmanager
+    def time(self, value: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.labels(value).observe(time.perf_counter() - start)
+
+    def render(self) -> List[str]:
+        series = {((self.label, value),): child for value, child in sorted(self._children.items())}
+        return render_histogram(self.name, self.documentation, series)
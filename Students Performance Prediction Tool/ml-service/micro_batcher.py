@@ -0,0 +1,91 @@
+import asyncio
+import time
+from typing import Any, Callable, List, Optional
+
+import numpy as np
+
+from metrics import Histogram
+
+
+class MicroBatcher:
+    """Coalesce concurrent single-row requests into one scoring call.
+
+    ``submit`` enqueues an encoded feature row and awaits its result. A
+    background task takes the first queued row, keeps collecting until
+    ``max_batch_size`` rows are waiting or ``max_wait_ms`` has passed, stacks
+    them into one matrix and runs ``score_fn(models, X)`` on a worker thread.
+    Rows encoded against different model bundles are scored separately.
+    """
+
+    def __init__(self, score_fn: Callable[[Any, np.ndarray], List[Any]], max_batch_size: int, max_wait_ms: float):
+        self.score_fn = score_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+        sizes = [2 ** i for i in range(max_batch_size.bit_length() + 1)]
+        self.batch_sizes = Histogram(sizes)
+        self.queue_depths = Histogram(sizes)
+        self.queue_wait_seconds = Histogram([0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1])
+
+    def _ensure_started(self):
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            self._queue = asyncio.Queue()
+            self._task = loop.create_task(self._run())
+
+    async def submit(self, models, row: np.ndarray):
+        self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        self.queue_depths.observe(self._queue.qsize())
+        await self._queue.put((models, row, future, time.perf_counter()))
+        return await future
+
+    async def _collect(self) -> list:
+        batch = [await self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            started = time.perf_counter()
+            self.batch_sizes.observe(len(batch))
+
+            groups = {}
+            for item in batch:
+                groups.setdefault(id(item[0]), []).append(item)
+            for items in groups.values():
+                for _, _, _, enqueued in items:
+                    self.queue_wait_seconds.observe(started - enqueued)
+                X = np.stack([row for _, row, _, _ in items])
+                try:
+                    results = await loop.run_in_executor(None, self.score_fn, items[0][0], X)
+                except Exception as e:
+                    for _, _, future, _ in items:
+                        if not future.done():
+                            future.set_exception(e)
+                    continue
+                for (_, _, future, _), result in zip(items, results):
+                    if not future.done():
+                        future.set_result(result)
+
+    def stats(self) -> dict:
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "batch_size": self.batch_sizes.snapshot(),
+            "queue_depth_at_submit": self.queue_depths.snapshot(),
+            "queue_wait_seconds": self.queue_wait_seconds.snapshot(),
+        }
@@ -1,100 +1,83 @@
 import logging
-import os
-from typing import Optional
+import math
+import time
+from contextlib import closing
+from typing import Any, Dict, List, Optional
 
-import joblib
+import numpy as np
+import orjson
 import pandas as pd
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse, PlainTextResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field, ValidationError
+
+from arrow_io import ARROW_STREAM_MEDIA_TYPE, is_numeric_column, pyarrow, read_stream, write_stream
+from cohort import FrameSource, JobTracker, default_source, run_job
+from config import (
+    ARROW_MAX_ROWS,
+    BATCH_MAX_ROWS,
+    CACHE_MAX_ENTRIES,
+    CACHE_TTL_SECONDS,
+    COHORT_CHUNK_ROWS,
+    COHORT_JOB_HISTORY,
+    COHORT_MAX_ROWS,
+    FEATURE_STORE_WRITE_THROUGH,
+    LOG_PAYLOADS,
+    MICRO_BATCH_ENABLED,
+    MICRO_BATCH_MAX_SIZE,
+    MICRO_BATCH_MAX_WAIT_MS,
+    MODEL_WATCH_INTERVAL,
+    PROFILING_ENABLED,
+    RANK_MAX_ROWS,
+    WHATIF_MAX_POINTS,
+)
+import explain
+import feature_store
+from metrics import LabeledHistogram, render_histogram, render_scalar
+from micro_batcher import MicroBatcher
+from model_registry import ModelBundle, process_rss_bytes, registry
+from prediction_cache import PredictionCache
+from profiling import SamplingProfiler
+from scoring import ID_COLUMNS, score_frame
+from whatif import build_grid
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("ml_api")
-
-app = FastAPI(title="Student Performance Prediction API")
-
-MODEL_DIR = os.path.join(os.path.dirname(__file__), "models")
-GPA_MODEL_FILE = "gpa_prediction_model.pkl"
-DROP_MODEL_FILE = "dropout_risk_model.pkl"
-ENCODER_FILE = "label_encoder.pkl"
-
-GPA_DEFAULT_FEATURES = [
-    "Student_Name",
-    "Enrollment_No",
-    "Semester",
-    "Department",
-    "Age",
-    "Gender",
-    "G1_Internal",
-    "G2_Internal",
-    "Final_Exam_Score",
-    "Attendance_Percentage",
-    "Study_Hours_Per_Week",
-    "Backlogs",
-    "Parent_Education_Level",
-    "Part_Time_Work",
-    "Previous_CGPA",
-    "Academic_Risk_Level",
-]
-
-DROPOUT_DEFAULT_FEATURES = [
-    "Student_Name",
-    "Enrollment_No",
-    "Semester",
-    "Department",
-    "Age",
-    "Gender",
-    "G1_Internal",
-    "G2_Internal",
-    "Final_Exam_Score",
-    "Attendance_Percentage",
-    "Study_Hours_Per_Week",
-    "Backlogs",
-    "Parent_Education_Level",
-    "Part_Time_Work",
-    "Previous_CGPA",
-    "predicted_CGPA",
-]
-
-CATEGORICAL_FIELDS = [
-    "Gender",
-    "Department",
-    "Part_Time_Work",
-    "Parent_Education_Level",
-    "Semester",
-    "Academic_Risk_Level",
-]
-
-
-def _load_artifact(filename: str, label: str):
-    path = os.path.join(MODEL_DIR, filename)
-    try:
-        return joblib.load(path)
-    except FileNotFoundError as e:
-        raise RuntimeError(f"Missing {label} file: {path}") from e
-
+if LOG_PAYLOADS:
+    # Payloads are logged at DEBUG; the INFO default above would drop them.
+    logger.setLevel(logging.DEBUG)
+
+app = FastAPI(title="Student Performance Prediction API", default_response_class=ORJSONResponse)
+
+prediction_cache = PredictionCache(CACHE_MAX_ENTRIES, CACHE_TTL_SECONDS)
+registry.add_invalidation_listener(prediction_cache.clear)
+registry.add_invalidation_listener(feature_store.forget)
+registry.add_invalidation_listener(explain.forget)
+cohort_jobs = JobTracker(COHORT_JOB_HISTORY)
+
+stage_seconds = LabeledHistogram(
+    "ml_predict_stage_seconds",
+    "Time spent in each stage of the prediction pipeline.",
+    "stage",
+)
+request_seconds = LabeledHistogram(
+    "ml_http_request_seconds",
+    "End-to-end handling time per route.",
+    "route",
+)
 
 try:
-    gpa_model = _load_artifact(GPA_MODEL_FILE, "GPA model")
-    dropout_model = _load_artifact(DROP_MODEL_FILE, "dropout model")
-    label_encoders = _load_artifact(ENCODER_FILE, "label encoders")
-
-    expected_gpa_features = list(getattr(gpa_model, "feature_names_in_", [])) or GPA_DEFAULT_FEATURES
-    expected_dropout_features = (
-        list(getattr(dropout_model, "feature_names_in_", [])) or DROPOUT_DEFAULT_FEATURES
-    )
-
-    def _assert_predictable(obj, name):
-        if not hasattr(obj, "predict"):
-            raise RuntimeError(f"Loaded '{name}' does not expose predict().")
-
-    _assert_predictable(gpa_model, "gpa_prediction_model")
-    _assert_predictable(dropout_model, "dropout_risk_model")
-
-    print("Models and encoders loaded successfully.")
+    # Load eagerly so a broken deployment fails at startup, not on the first request.
+    registry.bundle()
+    print(f"Models and encoders loaded successfully (version {registry.active_version}).")
 except Exception as e:
     print(f"Error loading/validating models: {e}")
     raise
 
+if MODEL_WATCH_INTERVAL > 0:
+    registry.start_watcher(MODEL_WATCH_INTERVAL)
+
 
 class StudentInput(BaseModel):
     Student_Name: Optional[str] = None
@@ -115,99 +98,327 @@ class StudentInput(BaseModel):
     Academic_Risk_Level: Optional[str] = None
 
 
-def preprocess_input(data: dict) -> pd.DataFrame:
-    """Preprocess input data and encode categorical features."""
-    df = pd.DataFrame([data])
+REQUIRED_FIELDS = [name for name, field in StudentInput.model_fields.items() if field.is_required()]
+NUMERIC_FIELDS = [
+    name
+    for name, field in StudentInput.model_fields.items()
+    if field.annotation in (int, float, Optional[int], Optional[float])
+]
+
+FIELD_DEFAULTS = {
+    name: field.default
+    for name, field in StudentInput.model_fields.items()
+    if not field.is_required() and field.default is not None
+}
+
+
+def fill_defaults(df: pd.DataFrame) -> pd.DataFrame:
+    """Fill absent or null optional columns with StudentInput's defaults, as pydantic would per row."""
+    for col, default in FIELD_DEFAULTS.items():
+        df[col] = df[col].fillna(default) if col in df.columns else default
+    return df
+
+
+class BatchPredictionRequest(BaseModel):
+    # Rows are validated one by one so a single bad record does not reject the batch.
+    students: List[Dict[str, Any]] = Field(..., max_length=BATCH_MAX_ROWS)
+    include_proba: bool = False
+    # Per-feature contributions to each row's CGPA and risk level.
+    explain: bool = False
+
+
+class RankRequest(BaseModel):
+    students: List[Dict[str, Any]] = Field(..., max_length=RANK_MAX_ROWS)
+    k: int = Field(10, ge=1)
+    # Students are ranked by their probability of this risk level.
+    risk_level: str = "High"
+
+
+class CohortRequest(BaseModel):
+    # Scores ``students`` when given, otherwise the configured student source;
+    # ``filter`` matches columns by equality (a list matches any of its values).
+    filter: Dict[str, Any] = Field(default_factory=dict)
+    students: Optional[List[Dict[str, Any]]] = Field(None, max_length=COHORT_MAX_ROWS)
+    include_proba: bool = False
+    chunk_rows: int = Field(COHORT_CHUNK_ROWS, ge=1, le=COHORT_MAX_ROWS)
+
+
+class GridAxis(BaseModel):
+    feature: str
+    # Either explicit values (labels for categorical features) or an evenly
+    # spaced numeric range of ``num`` points from ``start`` to ``stop``.
+    values: Optional[List[Any]] = Field(None, min_length=1, max_length=WHATIF_MAX_POINTS)
+    start: Optional[float] = None
+    stop: Optional[float] = None
+    num: int = Field(11, ge=1, le=WHATIF_MAX_POINTS)
+
+    @property
+    def size(self) -> int:
+        """Number of points on the axis, known without building them."""
+        return len(self.values) if self.values is not None else self.num
+
+    def points(self) -> List[Any]:
+        if self.values is not None:
+            return self.values
+        if self.start is None or self.stop is None:
+            raise ValueError(f"Axis '{self.feature}' needs either values or start and stop")
+        return np.linspace(self.start, self.stop, self.num).tolist()
+
+
+class WhatIfRequest(BaseModel):
+    student: StudentInput
+    axes: List[GridAxis] = Field(..., min_length=1, max_length=2)
+    include_proba: bool = False
 
-    for col in CATEGORICAL_FIELDS:
-        encoder = label_encoders.get(col)
-        if encoder is None:
-            continue
-        default_value = (
-            "Medium" if col == "Academic_Risk_Level" and "Medium" in encoder.classes_ else encoder.classes_[0]
-        )
 
-        if col not in df.columns or df[col].isna().all():
-            df[col] = encoder.transform([default_value])[0]
-            continue
+class ReloadRequest(BaseModel):
+    # Defaults to reloading the active version, e.g. after retraining it in place.
+    version: Optional[str] = None
 
-        df[col] = df[col].replace({None: default_value, "": default_value}).fillna(default_value)
 
+def preprocess_input(data: dict, plan=None) -> np.ndarray:
+    """Encode one record into a single-row feature matrix laid out as ``plan.columns``."""
+    plan = plan or registry.bundle().plan
+    return plan.encode_row(data)[np.newaxis, :]
+
+
+def score_rows(models: ModelBundle, X: np.ndarray):
+    """Score a feature matrix into ``(predicted_CGPA, academic_risk_level)`` pairs."""
+    predicted_cgpa, risk_labels = models.pipeline.run(X, stage_seconds.time)
+    return [(round(float(cgpa), 2), label) for cgpa, label in zip(predicted_cgpa, risk_labels)]
+
+
+def score_rows_with_proba(models: ModelBundle, X: np.ndarray):
+    """Like ``score_rows``, with a third ``{risk_level: probability}`` element per row."""
+    predicted_cgpa, risk_labels, proba = models.pipeline.run_with_proba(X, stage_seconds.time)
+    labels = models.pipeline.proba_labels
+    return [
+        (round(float(cgpa), 2), label, dict(zip(labels, np.round(p, 4).tolist())))
+        for cgpa, label, p in zip(predicted_cgpa, risk_labels, proba)
+    ]
+
+
+def score_with_cache(models: ModelBundle, X: np.ndarray, include_proba: bool = False):
+    """Score a feature matrix, reusing cached results and caching the rest."""
+    # Results with and without probabilities are cached under separate keys.
+    revision, scorer = (models.revision + "+proba", score_rows_with_proba) if include_proba else (models.revision, score_rows)
+    keys = [prediction_cache.key(revision, row) for row in X[:, models.plan.key_index]]
+    cached = [prediction_cache.get(key) for key in keys]
+    misses = [i for i, hit in enumerate(cached) if hit is None]
+
+    if misses:
+        for i, result in zip(misses, scorer(models, X[misses])):
+            cached[i] = result
+            prediction_cache.put(keys[i], result)
+    return cached
+
+
+def result_fields(result) -> dict:
+    """Response fields of one scored row; probabilities only when they were requested."""
+    fields = {"predicted_CGPA": result[0], "academic_risk_level": result[1]}
+    if len(result) > 2:
+        fields["risk_probabilities"] = result[2]
+    return fields
+
+
+def explain_rows(models: ModelBundle, X: np.ndarray) -> List[dict]:
+    """Per-feature contributions for each row; raises ValueError when the models are not forests."""
+    explainer = explain.explainer_for(models)
+    with stage_seconds.time("explain"):
+        return explainer.explain(X)
+
+
+def validate_rows(students: List[Dict[str, Any]]):
+    """Validate raw records one by one into ``(rows, positions, errors)``."""
+    valid_rows = []
+    valid_positions = []
+    errors = []
+    for index, raw in enumerate(students):
         try:
-            df[col] = encoder.transform(df[col].astype(str))
-        except ValueError as e:
-            raise ValueError(
-                f"Unknown value for '{col}': '{df[col].values[0]}'. "
-                f"Expected one of: {list(encoder.classes_)}"
-            ) from e
-
-    df.fillna(0, inplace=True)
-
-    # Coerce any remaining object columns to numeric-safe values to satisfy XGBoost
-    for col in df.columns:
-        if df[col].dtype == object:
-            df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0)
-
-    expected_cols = set(expected_gpa_features + expected_dropout_features)
-    for col in expected_cols:
-        if col not in df.columns:
-            df[col] = 0
-        df[col] = df[col].fillna(0)
+            valid_rows.append(StudentInput.model_validate(raw).model_dump())
+            valid_positions.append(index)
+        except ValidationError as ve:
+            errors.append({"index": index, "detail": ve.errors(include_url=False, include_context=False)})
+    return valid_rows, valid_positions, errors
 
-    return df
+
+micro_batcher = (
+    MicroBatcher(score_rows, MICRO_BATCH_MAX_SIZE, MICRO_BATCH_MAX_WAIT_MS) if MICRO_BATCH_ENABLED else None
+)
+
+
+@app.middleware("http")
+async def record_request_time(request: Request, call_next):
+    request.state.started = time.perf_counter()
+    response = await call_next(request)
+    route = request.scope.get("route")
+    request_seconds.labels(route.path if route is not None else "unmatched").observe(
+        time.perf_counter() - request.state.started
+    )
+    return response
 
 
 @app.get("/")
 def root():
+    models = registry.bundle()
     return {
         "message": "API is running",
-        "expected_gpa_features": expected_gpa_features,
-        "expected_dropout_features": expected_dropout_features,
+        "expected_gpa_features": models.gpa_features,
+        "expected_dropout_features": models.dropout_features,
     }
 
 
-@app.post("/predict")
-def predict_student(input_data: StudentInput):
-    """Predict student CGPA and academic risk level."""
-    try:
-        data_dict = input_data.model_dump()
-        logger.info("Prediction request: %s", data_dict)
+@app.get("/models/memory")
+def models_memory():
+    """Resident size of every loaded model artifact."""
+    return registry.memory_report()
+
+
+@app.get("/admin/models")
+def models_status():
+    """Active and available model versions, bundles still draining, and the last reload."""
+    return registry.status()
+
+
+@app.post("/admin/models/reload", status_code=202)
+def reload_models(request: ReloadRequest):
+    """Load a model version in the background and swap it in once it is warm."""
+    version = request.version or registry.active_version
+    if version not in registry.available_versions():
+        raise HTTPException(status_code=404, detail=f"Unknown model version: '{version}'")
+    if not registry.reload_in_background(version):
+        raise HTTPException(status_code=409, detail="A model reload is already in progress")
+    return {"status": "loading", "version": version}
+
+
+@app.get("/cache/stats")
+def cache_stats():
+    """Hit, miss and eviction counters of the prediction cache."""
+    return prediction_cache.stats()
+
+
+@app.get("/batcher/stats")
+def batcher_stats():
+    """Queue depth and batch-size histograms of the /predict micro-batcher."""
+    if micro_batcher is None:
+        return {"enabled": False}
+    return {"enabled": True, **micro_batcher.stats()}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Prometheus text exposition of latency histograms, cache and batcher counters."""
+    cache = prediction_cache.stats()
+    lines = stage_seconds.render() + request_seconds.render()
+    for name in ("hits", "misses", "evictions", "expirations", "invalidations"):
+        lines += render_scalar(f"ml_prediction_cache_{name}_total", f"Prediction cache {name}.", "counter", {(): cache[name]})
+    lines += render_scalar("ml_prediction_cache_entries", "Entries in the prediction cache.", "gauge", {(): cache["size"]})
+    if micro_batcher is not None:
+        lines += render_histogram(
+            "ml_micro_batch_size", "Rows scored per micro-batch.", {(): micro_batcher.batch_sizes}
+        )
+        lines += render_histogram(
+            "ml_micro_batch_queue_wait_seconds", "Time rows waited to be batched.", {(): micro_batcher.queue_wait_seconds}
+        )
+        lines += render_scalar(
+            "ml_micro_batch_queue_depth", "Rows waiting to be batched.", "gauge", {(): micro_batcher.stats()["queue_depth"]}
+        )
+    lines += render_scalar("ml_process_resident_memory_bytes", "Resident set size.", "gauge", {(): process_rss_bytes()})
+    return PlainTextResponse("\n".join(lines) + "\n", media_type="text/plain; version=0.0.4")
 
-        try:
-            df = preprocess_input(data_dict)
-        except ValueError as ve:
-            raise HTTPException(status_code=400, detail=str(ve))
 
-        X_gpa = df.reindex(columns=expected_gpa_features, fill_value=0)
-        X_gpa = X_gpa.astype(float)
-        logger.info("GPA features used: %s", X_gpa.to_dict(orient="list"))
-        predicted_cgpa = gpa_model.predict(X_gpa)[0]
+def log_request(data_dict: dict) -> None:
+    if LOG_PAYLOADS:
+        logger.debug("Prediction request: %s", data_dict)
 
-        # Ensure dropout model receives the CGPA the GPA model just predicted
-        if "predicted_CGPA" in expected_dropout_features:
-            df["predicted_CGPA"] = predicted_cgpa
 
-        X_dropout = df.reindex(columns=expected_dropout_features, fill_value=0)
-        X_dropout = X_dropout.astype(float)
-        logger.info("Dropout features used: %s", X_dropout.to_dict(orient="list"))
+def log_encoded(models: ModelBundle, x: np.ndarray) -> None:
+    if LOG_PAYLOADS:
+        logger.debug("Encoded features: %s", dict(zip(models.plan.columns, x.tolist())))
 
-        dropout_pred_raw = dropout_model.predict(X_dropout)[0]
 
-        # Decode dropout risk label if encoder is available
-        if "Academic_Risk_Level" in label_encoders:
+def predict_profiled(input_data: StudentInput, include_proba: bool = False, explain: bool = False):
+    """Run the direct prediction path under the sampling profiler and attach its top stacks.
+
+    It takes the same flags as /predict, so the profile is of the response the caller asked for.
+    """
+    with SamplingProfiler() as profiler:
+        response = predict_student_sync(input_data, include_proba, explain)
+    stacks = profiler.top()
+    logger.info("Profile of /predict (%.1f ms):\n%s", profiler.elapsed * 1000, "\n".join(stacks))
+    return {**response, "profile": {"elapsed_ms": profiler.elapsed * 1000, "stacks": stacks}}
+
+
+@app.post("/predict")
+async def predict_student(
+    input_data: StudentInput,
+    request: Request,
+    include_proba: bool = Query(False, description="Also return the calibrated risk-level probabilities."),
+    explain: bool = Query(False, description="Also return per-feature contributions to both predictions."),
+):
+    """Predict student CGPA and academic risk level."""
+    # Everything before the handler runs: body read, JSON parse, pydantic validation.
+    stage_seconds.labels("validation").observe(time.perf_counter() - request.state.started)
+
+    if PROFILING_ENABLED and request.headers.get("x-profile") == "1":
+        return await run_in_threadpool(predict_profiled, input_data, include_proba, explain)
+    if micro_batcher is None or include_proba or explain:
+        return await run_in_threadpool(predict_student_sync, input_data, include_proba, explain)
+
+    try:
+        with registry.lease() as models:
+            data_dict = input_data.model_dump()
+            log_request(data_dict)
             try:
-                dropout_label = label_encoders["Academic_Risk_Level"].inverse_transform(
-                    [int(dropout_pred_raw)]
-                )[0]
-            except Exception:
-                dropout_label = str(dropout_pred_raw)
-        else:
-            dropout_label = str(dropout_pred_raw)
+                with stage_seconds.time("preprocess"):
+                    X = preprocess_input(data_dict, models.plan)
+            except ValueError as ve:
+                raise HTTPException(status_code=400, detail=str(ve))
+            log_encoded(models, X[0])
+
+            cache_key = prediction_cache.key(models.revision, X[0, models.plan.key_index])
+            result = prediction_cache.get(cache_key)
+            if result is None:
+                result = await micro_batcher.submit(models, X[0])
+                prediction_cache.put(cache_key, result)
+            if FEATURE_STORE_WRITE_THROUGH:
+                remember(models, input_data.Enrollment_No, X[0], result)
+        return {"predicted_CGPA": result[0], "academic_risk_level": result[1], "model_version": models.version}
 
-        return {
-            "predicted_CGPA": round(float(predicted_cgpa), 2),
-            "academic_risk_level": dropout_label,
-        }
+    except HTTPException:
+        raise
+    except Exception as general_error:
+        logger.exception("Prediction failed")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Unexpected server error: {general_error}",
+        )
+
+
+def predict_student_sync(input_data: StudentInput, include_proba: bool = False, explain: bool = False):
+    """Score one request directly, without the micro-batcher."""
+    try:
+        with registry.lease() as models:
+            data_dict = input_data.model_dump()
+            log_request(data_dict)
+            try:
+                with stage_seconds.time("preprocess"):
+                    X = preprocess_input(data_dict, models.plan)
+            except ValueError as ve:
+                raise HTTPException(status_code=400, detail=str(ve))
+            log_encoded(models, X[0])
+
+            result = score_with_cache(models, X, include_proba)[0]
+            if FEATURE_STORE_WRITE_THROUGH:
+                remember(models, input_data.Enrollment_No, X[0], result)
+            response = {**result_fields(result), "model_version": models.version}
+            if explain:
+                try:
+                    response["explanation"] = explain_rows(models, X)[0]
+                except ValueError as ve:
+                    raise HTTPException(status_code=400, detail=str(ve))
+
+        return response
 
     except HTTPException:
         raise
@@ -217,3 +428,338 @@ def predict_student(input_data: StudentInput):
             status_code=500,
             detail=f"Unexpected server error: {general_error}",
         )
+
+
+@app.post("/predict/batch")
+def predict_batch(request: BatchPredictionRequest):
+    """Predict CGPA and academic risk level for a whole cohort in one call."""
+    with stage_seconds.time("validation"):
+        valid_rows, valid_positions, errors = validate_rows(request.students)
+
+    results = []
+    model_version = registry.active_version
+    if valid_rows:
+        try:
+            with registry.lease() as models:
+                model_version = models.version
+                with stage_seconds.time("preprocess"):
+                    X, encode_errors = models.plan.encode_rows(valid_rows)
+                for pos, message in encode_errors.items():
+                    errors.append({"index": valid_positions[pos], "detail": message})
+                scored_positions = [p for i, p in enumerate(valid_positions) if i not in encode_errors]
+
+                if len(X):
+                    results = [
+                        {"index": index, **result_fields(result)}
+                        for index, result in zip(scored_positions, score_with_cache(models, X, request.include_proba))
+                    ]
+                    if request.explain:
+                        try:
+                            explanations = explain_rows(models, X)
+                        except ValueError as ve:
+                            raise HTTPException(status_code=400, detail=str(ve))
+                        for result, explanation in zip(results, explanations):
+                            result["explanation"] = explanation
+        except HTTPException:
+            raise
+        except Exception as general_error:
+            logger.exception("Batch prediction failed")
+            raise HTTPException(
+                status_code=500,
+                detail=f"Unexpected server error: {general_error}",
+            )
+
+    errors.sort(key=lambda e: e["index"])
+    return {"model_version": model_version, "results": results, "errors": errors}
+
+
+@app.post("/predict/rank")
+def predict_rank(request: RankRequest):
+    """The ``k`` students most likely to be at ``risk_level``, highest probability first."""
+    with stage_seconds.time("validation"):
+        valid_rows, valid_positions, errors = validate_rows(request.students)
+
+    ranked = []
+    scored = 0
+    model_version = registry.active_version
+    with registry.lease() as models:
+        model_version = models.version
+        labels = models.pipeline.proba_labels or []
+        if request.risk_level not in labels:
+            raise HTTPException(status_code=400, detail=f"Unknown risk level: '{request.risk_level}'")
+
+        if valid_rows:
+            try:
+                with stage_seconds.time("preprocess"):
+                    X, encode_errors = models.plan.encode_rows(valid_rows)
+                for pos, message in encode_errors.items():
+                    errors.append({"index": valid_positions[pos], "detail": message})
+                scored_rows = [row for i, row in enumerate(valid_rows) if i not in encode_errors]
+                scored_positions = [p for i, p in enumerate(valid_positions) if i not in encode_errors]
+                scored = len(X)
+
+                if scored:
+                    predicted_cgpa, risk_labels, proba = models.pipeline.run_with_proba(X, stage_seconds.time)
+                    with stage_seconds.time("rank"):
+                        p = proba[:, labels.index(request.risk_level)]
+                        k = min(request.k, scored)
+                        # Partial selection is O(n); only the k selected rows get sorted.
+                        top = np.argpartition(-p, k - 1)[:k]
+                        top = top[np.argsort(-p[top], kind="stable")]
+                    for rank, i in enumerate(top.tolist(), start=1):
+                        student = scored_rows[i]
+                        ranked.append({
+                            "rank": rank,
+                            "index": scored_positions[i],
+                            "Enrollment_No": student.get("Enrollment_No"),
+                            "Student_Name": student.get("Student_Name"),
+                            "probability": round(float(p[i]), 4),
+                            "predicted_CGPA": round(float(predicted_cgpa[i]), 2),
+                            "academic_risk_level": risk_labels[i],
+                        })
+            except Exception as general_error:
+                logger.exception("Rank prediction failed")
+                raise HTTPException(
+                    status_code=500,
+                    detail=f"Unexpected server error: {general_error}",
+                )
+
+    errors.sort(key=lambda e: e["index"])
+    return {
+        "model_version": model_version,
+        "risk_level": request.risk_level,
+        "scored": scored,
+        "ranked": ranked,
+        "errors": errors,
+    }
+
+
+@app.post("/predict/arrow")
+async def predict_arrow(
+    request: Request,
+    include_proba: bool = Query(False, description="Also return proba_<level> columns."),
+):
+    """Score a cohort sent as an Arrow IPC stream of StudentInput columns, answering in the same format.
+
+    The response has one row per input row, in input order: the id columns,
+    ``predicted_CGPA``, ``academic_risk_level`` and ``error`` (null when the
+    row scored). Rows are validated column by column; no per-row objects are built.
+    """
+    if pyarrow is None:
+        raise HTTPException(status_code=501, detail="Arrow input requires pyarrow on the server")
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if content_type != ARROW_STREAM_MEDIA_TYPE:
+        raise HTTPException(status_code=415, detail=f"Expected Content-Type: {ARROW_STREAM_MEDIA_TYPE}")
+    body = await request.body()
+    return await run_in_threadpool(score_arrow, body, include_proba)
+
+
+def score_arrow(body: bytes, include_proba: bool) -> Response:
+    with stage_seconds.time("validation"):
+        try:
+            df = read_stream(body)
+        except ValueError as ve:
+            raise HTTPException(status_code=400, detail=str(ve))
+        if len(df) > ARROW_MAX_ROWS:
+            raise HTTPException(status_code=413, detail=f"At most {ARROW_MAX_ROWS} rows per request")
+        missing = [col for col in REQUIRED_FIELDS if col not in df.columns]
+        if missing:
+            raise HTTPException(status_code=400, detail=f"Missing required columns: {missing}")
+        not_numeric = [col for col in NUMERIC_FIELDS if col in df.columns and not is_numeric_column(df, col)]
+        if not_numeric:
+            raise HTTPException(status_code=400, detail=f"Columns must be numeric: {not_numeric}")
+        fill_defaults(df)
+
+    try:
+        with registry.lease() as models:
+            # A null in a required column fails the row, as it would on /predict/batch.
+            out = score_frame(models, df, ID_COLUMNS, include_proba, required=REQUIRED_FIELDS)
+            model_version = models.version
+    except Exception as general_error:
+        logger.exception("Arrow prediction failed")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Unexpected server error: {general_error}",
+        )
+
+    with stage_seconds.time("serialize"):
+        content = write_stream(out)
+    return Response(content, media_type=ARROW_STREAM_MEDIA_TYPE, headers={"X-Model-Version": model_version})
+
+
+def ndjson(obj) -> bytes:
+    return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY) + b"\n"
+
+
+@app.post("/cohort/score")
+def score_cohort(request: CohortRequest):
+    """Score a whole cohort in vectorized chunks and stream the results as NDJSON.
+
+    Lines carry a ``type``: one ``job`` line first, a ``result`` line per
+    student, a ``progress`` line after every chunk, and a final ``done`` or
+    ``failed`` line. The job id is also sent in the ``X-Job-Id`` header.
+    """
+    if request.students is not None:
+        students = pd.DataFrame.from_records(request.students)
+        for col in NUMERIC_FIELDS:
+            # Junk in a numeric field becomes a null, which rejects the row below.
+            if col in students.columns:
+                students[col] = pd.to_numeric(students[col], errors="coerce")
+        source = FrameSource(fill_defaults(students))
+    else:
+        try:
+            source = default_source()
+        except Exception as e:
+            logger.exception("Cohort source unavailable")
+            raise HTTPException(status_code=503, detail=f"Student source unavailable: {e}")
+    try:
+        total = source.count(request.filter)
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+
+    job = cohort_jobs.start(total)
+    return StreamingResponse(
+        stream_cohort(job, source, request), media_type="application/x-ndjson", headers={"X-Job-Id": job.id}
+    )
+
+
+def stream_cohort(job, source, request: CohortRequest):
+    """NDJSON lines of one cohort job; any error, wherever it happens, ends it as ``failed``."""
+    try:
+        with registry.lease() as models:
+            yield ndjson({"type": "job", "model_version": models.version, **job.progress()})
+            chunks = run_job(
+                job, models, source, request.filter, request.chunk_rows, request.include_proba, REQUIRED_FIELDS
+            )
+            # closing() marks the job cancelled right away if the client disconnects.
+            with closing(chunks):
+                for scored in chunks:
+                    with stage_seconds.time("serialize"):
+                        lines = [ndjson({"type": "result", **row}) for row in scored.to_dict(orient="records")]
+                        lines.append(ndjson({"type": "progress", **job.progress()}))
+                    yield b"".join(lines)
+    except Exception as e:
+        logger.exception("Cohort job %s failed", job.id)
+        job.fail(e)
+    yield ndjson({"type": job.state, **job.progress()})
+
+
+@app.get("/cohort/jobs")
+def cohort_job_list():
+    """Progress of running and recent cohort jobs, newest first."""
+    return cohort_jobs.list()
+
+
+@app.get("/cohort/jobs/{job_id}")
+def cohort_job_status(job_id: str):
+    job = cohort_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: '{job_id}'")
+    return job.progress()
+
+
+def remember(models: ModelBundle, enrollment_no: Optional[str], x: np.ndarray, result) -> Optional[int]:
+    """Upsert a scored row into the feature store, if there is one and the row has an id."""
+    store = feature_store.store_for(models)
+    if store is None or not enrollment_no:
+        return None
+    with stage_seconds.time("feature_store"):
+        return store.upsert(enrollment_no, x, result[0], result[1])
+
+
+def open_store(models: ModelBundle) -> "feature_store.FeatureStore":
+    store = feature_store.store_for(models)
+    if store is None:
+        raise HTTPException(
+            status_code=503,
+            detail=f"No feature store for model version '{models.version}'; run: python feature_store.py build",
+        )
+    return store
+
+
+@app.get("/students/{enrollment_no}/prediction")
+def stored_prediction(
+    enrollment_no: str,
+    rescore: bool = Query(False, description="Re-run the models on the stored features and update the outputs."),
+):
+    """A student's prediction from the feature store, looked up by Enrollment_No without encoding."""
+    with registry.lease() as models:
+        store = open_store(models)
+        row = store.lookup(enrollment_no)
+        if row is None:
+            raise HTTPException(status_code=404, detail=f"Unknown Enrollment_No: '{enrollment_no}'")
+        if rescore:
+            predicted_cgpa, risk_labels = models.pipeline.run(store.features[row : row + 1], stage_seconds.time)
+            store.set_outputs(row, predicted_cgpa[0], risk_labels[0])
+        return {"Enrollment_No": enrollment_no, **store.outputs(row), "model_version": models.version}
+
+
+@app.put("/students/{enrollment_no}")
+def update_student(enrollment_no: str, input_data: StudentInput):
+    """Re-encode and re-score a changed student record and store it under ``enrollment_no``."""
+    with registry.lease() as models:
+        store = open_store(models)
+        try:
+            with stage_seconds.time("preprocess"):
+                X = preprocess_input(input_data.model_dump(), models.plan)
+        except ValueError as ve:
+            raise HTTPException(status_code=400, detail=str(ve))
+        result = score_rows(models, X)[0]
+        with stage_seconds.time("feature_store"):
+            store.upsert(enrollment_no, X[0], result[0], result[1])
+        return {"Enrollment_No": enrollment_no, **result_fields(result), "model_version": models.version}
+
+
+@app.get("/feature-store/stats")
+def feature_store_stats():
+    """Size of the active version's feature store."""
+    with registry.lease() as models:
+        return open_store(models).stats()
+
+
+@app.post("/predict/what-if")
+def predict_what_if(request: WhatIfRequest):
+    """CGPA and risk surface of one student over a grid of one or two varied features.
+
+    The whole grid is built as one matrix and scored in a single batch;
+    outputs are nested lists indexed like ``axes`` (first axis outermost).
+    """
+    # Checked before any axis is built, so an oversized grid costs nothing.
+    points = math.prod(axis.size for axis in request.axes)
+    if points > WHATIF_MAX_POINTS:
+        raise HTTPException(status_code=400, detail=f"Grid has {points} points; the limit is {WHATIF_MAX_POINTS}")
+    if len({axis.feature for axis in request.axes}) != len(request.axes):
+        raise HTTPException(status_code=400, detail="Each feature may appear on one axis only")
+    try:
+        axes = [(axis.feature, axis.points()) for axis in request.axes]
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+
+    with registry.lease() as models:
+        try:
+            with stage_seconds.time("preprocess"):
+                base = preprocess_input(request.student.model_dump(), models.plan)
+                X, shape = build_grid(models.plan, base[0], axes)
+        except ValueError as ve:
+            raise HTTPException(status_code=400, detail=str(ve))
+
+        X = np.vstack([base, X])
+        if request.include_proba:
+            predicted_cgpa, risk_labels, proba = models.pipeline.run_with_proba(X, stage_seconds.time)
+        else:
+            predicted_cgpa, risk_labels = models.pipeline.run(X, stage_seconds.time)
+
+        response = {
+            "model_version": models.version,
+            "baseline": {"predicted_CGPA": round(float(predicted_cgpa[0]), 2), "academic_risk_level": risk_labels[0]},
+            "axes": [{"feature": feature, "values": values} for feature, values in axes],
+            "shape": list(shape),
+            "predicted_CGPA": np.round(predicted_cgpa[1:], 2).reshape(shape).tolist(),
+            "academic_risk_level": np.array(risk_labels[1:], dtype=object).reshape(shape).tolist(),
+        }
+        if request.include_proba:
+            response["risk_probabilities"] = {
+                label: np.round(proba[1:, i], 4).reshape(shape).tolist()
+                for i, label in enumerate(models.pipeline.proba_labels)
+            }
+    return response
@@ -0,0 +1,508 @@
+import itertools
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+
+import joblib
+import numpy as np
+
+from config import INFERENCE_ENGINE, MODEL_ARTIFACT_FORMAT, MODEL_VERSION
+from feature_plan import FeaturePlan
+from forest_engine import flatten
+from pipeline import InferencePipeline
+
+MODEL_DIR = os.path.join(os.path.dirname(__file__), "models")
+GPA_MODEL_FILE = "gpa_prediction_model.pkl"
+DROP_MODEL_FILE = "dropout_risk_model.pkl"
+ENCODER_FILE = "label_encoder.pkl"
+CALIBRATOR_FILE = "risk_calibrator.pkl"
+
+# Uncompressed copies written by train_models; their arrays can be memory-mapped.
+MMAP_SUFFIX = ".mmap.pkl"
+
+# The unversioned artifacts sitting directly in MODEL_DIR. Other versions live
+# in MODEL_DIR/<version>/ with the same file names.
+DEFAULT_VERSION = "current"
+
+# Optional file in MODEL_DIR naming the version to serve; watched for changes.
+ACTIVE_FILE = "ACTIVE"
+
+# Synthetic rows scored by a freshly loaded version before it takes traffic.
+WARM_ROWS = 8
+
+logger = logging.getLogger("model_registry")
+
+ARTIFACTS = {
+    "gpa": (GPA_MODEL_FILE, "GPA model"),
+    "dropout": (DROP_MODEL_FILE, "dropout model"),
+    "encoders": (ENCODER_FILE, "label encoders"),
+    "calibrator": (CALIBRATOR_FILE, "risk probability calibrator"),
+}
+# Versions trained before these existed still load; the artifact is None.
+OPTIONAL_ARTIFACTS = {"calibrator"}
+REQUIRED_ARTIFACTS = [name for name in ARTIFACTS if name not in OPTIONAL_ARTIFACTS]
+
+# Columns train_models fits both forests on, in this order.
+FEATURES = [
+    "Attendance_Percentage",
+    "Study_Hours_Per_Week",
+    "Previous_CGPA",
+    "G1_Internal",
+    "G2_Internal",
+    "Final_Exam_Score",
+    "Age",
+    "Backlogs",
+    "Semester",
+    "Parent_Education_Level",
+    "Gender",
+    "Department",
+    "Part_Time_Work",
+]
+
+GPA_DEFAULT_FEATURES = [
+    "Student_Name",
+    "Enrollment_No",
+    "Semester",
+    "Department",
+    "Age",
+    "Gender",
+    "G1_Internal",
+    "G2_Internal",
+    "Final_Exam_Score",
+    "Attendance_Percentage",
+    "Study_Hours_Per_Week",
+    "Backlogs",
+    "Parent_Education_Level",
+    "Part_Time_Work",
+    "Previous_CGPA",
+    "Academic_Risk_Level",
+]
+
+DROPOUT_DEFAULT_FEATURES = [
+    "Student_Name",
+    "Enrollment_No",
+    "Semester",
+    "Department",
+    "Age",
+    "Gender",
+    "G1_Internal",
+    "G2_Internal",
+    "Final_Exam_Score",
+    "Attendance_Percentage",
+    "Study_Hours_Per_Week",
+    "Backlogs",
+    "Parent_Education_Level",
+    "Part_Time_Work",
+    "Previous_CGPA",
+    "predicted_CGPA",
+]
+
+
+def process_rss_bytes() -> int:
+    """Current resident set size of this process (0 where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def estimate_nbytes(obj) -> int:
+    """Bytes held by a fitted model's arrays (tree nodes and leaf values for forests)."""
+    estimators = getattr(obj, "estimators_", None)
+    if estimators is not None:
+        from sklearn.tree._tree import NODE_DTYPE
+
+        total = 0
+        for est in np.ravel(estimators):
+            tree = est.tree_
+            total += tree.capacity * NODE_DTYPE.itemsize + tree.value.nbytes
+        return total
+    if isinstance(obj, dict):
+        return sum(estimate_nbytes(v) for v in obj.values())
+    total = 0
+    for value in getattr(obj, "__dict__", {}).values():
+        if isinstance(value, np.ndarray):
+            total += value.nbytes
+    return total
+
+
+def mmap_filename(filename: str) -> str:
+    return filename[: -len(".pkl")] + MMAP_SUFFIX
+
+
+def _resolve_features(model, default: List[str]) -> List[str]:
+    names = getattr(model, "feature_names_in_", None)
+    return list(names) if names is not None and len(names) > 0 else list(default)
+
+
+class ModelBundle:
+    """One consistent set of GPA model, dropout model and encoders for a version."""
+
+    def __init__(
+        self,
+        version: str,
+        gpa_model,
+        dropout_model,
+        label_encoders: dict,
+        engine: str = "sklearn",
+        calibrator=None,
+    ):
+        for obj, name in ((gpa_model, "gpa_prediction_model"), (dropout_model, "dropout_risk_model")):
+            if not hasattr(obj, "predict"):
+                raise RuntimeError(f"Loaded '{name}' does not expose predict().")
+        if engine == "flat":
+            gpa_model, dropout_model = flatten(gpa_model), flatten(dropout_model)
+
+        self.version = version
+        # Distinguishes successive loads of the same version name (e.g. a retrained "current").
+        self.revision = version
+        self.engine = engine
+        self.inflight = 0
+        self.retired = False
+        self.gpa_model = gpa_model
+        self.dropout_model = dropout_model
+        self.label_encoders = label_encoders
+        self.gpa_features = _resolve_features(gpa_model, GPA_DEFAULT_FEATURES)
+        self.dropout_features = _resolve_features(dropout_model, DROPOUT_DEFAULT_FEATURES)
+        self.plan = FeaturePlan(label_encoders, self.gpa_features, self.dropout_features)
+        risk_encoder = label_encoders.get("Academic_Risk_Level")
+        self.calibrator = calibrator
+        self.pipeline = InferencePipeline(
+            gpa_model,
+            dropout_model,
+            self.plan,
+            None if risk_encoder is None else risk_encoder.classes_,
+            calibrator=calibrator,
+        )
+
+    def decode_risk_labels(self, raw_predictions) -> List[str]:
+        """Map encoded dropout-model outputs back to their risk labels in one pass."""
+        return self.pipeline.decode(raw_predictions)
+
+    def score(self, X: np.ndarray):
+        """Run the GPA -> dropout chain over a matrix laid out as ``plan.columns``."""
+        return self.pipeline.run(X)
+
+    def warm_up(self, rows: int = WARM_ROWS) -> None:
+        """Score a few default-valued rows so first real requests skip lazy initialisation."""
+        X = np.tile(self.plan.encode_row({}), (rows, 1))
+        X[:, self.plan.key_index] += np.arange(rows)[:, np.newaxis]
+        self.score(X)
+
+
+class ModelRegistry:
+    """Process-wide cache of model artifacts keyed by (name, version).
+
+    Each artifact is loaded at most once, on first use, no matter how many
+    entry points ask for it. Loads of different artifacts can proceed in
+    parallel; concurrent requests for the same one wait for the first load.
+
+    One version is *active* and served by default. ``activate`` loads and
+    warms a version off to the side, then swaps it in with a single
+    assignment; requests that leased the previous bundle finish on it, and it
+    is dropped once the last of them releases it.
+    """
+
+    def __init__(
+        self,
+        model_dir: str = MODEL_DIR,
+        artifact_format: str = MODEL_ARTIFACT_FORMAT,
+        engine: str = INFERENCE_ENGINE,
+    ):
+        if artifact_format not in ("compressed", "mmap"):
+            raise ValueError(f"Unknown model artifact format: {artifact_format!r}")
+        if engine not in ("sklearn", "flat"):
+            raise ValueError(f"Unknown inference engine: {engine!r}")
+        self.model_dir = model_dir
+        self.artifact_format = artifact_format
+        self.engine = engine
+        self._lock = threading.Lock()
+        self._key_locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self._artifacts: Dict[Tuple[str, str], object] = {}
+        self._rss_delta: Dict[Tuple[str, str], int] = {}
+        self._bundles: Dict[str, ModelBundle] = {}
+        self._listeners: List[Callable[[Optional[str]], None]] = []
+        self._generation = itertools.count(1)
+        self._draining: List[ModelBundle] = []
+        self._reload_lock = threading.Lock()
+        self.reload_status = {"state": "idle"}
+        self.active_version = MODEL_VERSION or self._read_active_file() or DEFAULT_VERSION
+
+    def version_dir(self, version: str = DEFAULT_VERSION) -> str:
+        if version == DEFAULT_VERSION:
+            return self.model_dir
+        return os.path.join(self.model_dir, version)
+
+    def _read_active_file(self) -> Optional[str]:
+        try:
+            with open(os.path.join(self.model_dir, ACTIVE_FILE)) as fh:
+                return fh.read().strip() or None
+        except OSError:
+            return None
+
+    def available_versions(self) -> List[str]:
+        """Versions with a complete set of artifacts on disk."""
+        candidates = [DEFAULT_VERSION]
+        if os.path.isdir(self.model_dir):
+            candidates += sorted(
+                d for d in os.listdir(self.model_dir) if os.path.isdir(os.path.join(self.model_dir, d))
+            )
+        return [
+            v
+            for v in candidates
+            if all(os.path.exists(os.path.join(self.version_dir(v), ARTIFACTS[n][0])) for n in REQUIRED_ARTIFACTS)
+        ]
+
+    def _key_lock(self, key) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def get(self, name: str, version: str = DEFAULT_VERSION):
+        """Return the artifact ``name`` (a key of ``ARTIFACTS``) for ``version``.
+
+        Once a version's bundle is built, its models are the ones it serves:
+        FlatForest copies under the flat engine.
+        """
+        key = (name, version)
+        if key in self._artifacts:
+            return self._artifacts[key]
+
+        with self._key_lock(key):
+            if key not in self._artifacts:
+                artifact, self._rss_delta[key] = self._load(name, version)
+                self._artifacts[key] = artifact
+        return self._artifacts[key]
+
+    def _load(self, name: str, version: str):
+        """Read one artifact from disk; returns it with the RSS growth the load caused."""
+        filename, label = ARTIFACTS[name]
+        path = os.path.join(self.version_dir(version), filename)
+        mmap_path = os.path.join(self.version_dir(version), mmap_filename(filename))
+        rss_before = process_rss_bytes()
+        try:
+            if self.artifact_format == "mmap" and os.path.exists(mmap_path):
+                artifact = joblib.load(mmap_path, mmap_mode="r")
+            else:
+                artifact = joblib.load(path)
+        except FileNotFoundError as e:
+            if name in OPTIONAL_ARTIFACTS:
+                return None, 0
+            raise RuntimeError(f"Missing {label} file: {path}") from e
+        return artifact, max(process_rss_bytes() - rss_before, 0)
+
+    def _new_bundle(self, version: str, gpa_model, dropout_model, label_encoders, calibrator=None) -> ModelBundle:
+        bundle = ModelBundle(version, gpa_model, dropout_model, label_encoders, self.engine, calibrator)
+        bundle.revision = f"{version}#{next(self._generation)}"
+        return bundle
+
+    def bundle(self, version: Optional[str] = None) -> ModelBundle:
+        """Return the models, encoders, resolved features and feature plan for ``version``.
+
+        ``None`` means the active version.
+        """
+        version = version or self.active_version
+        bundle = self._bundles.get(version)
+        if bundle is not None:
+            return bundle
+
+        with self._key_lock(("bundle", version)):
+            bundle = self._bundles.get(version)
+            if bundle is None:
+                bundle = self._new_bundle(
+                    version,
+                    self.get("gpa", version),
+                    self.get("dropout", version),
+                    self.get("encoders", version),
+                    self.get("calibrator", version),
+                )
+                with self._lock:
+                    self._keep_served(version, bundle)
+                self._bundles[version] = bundle
+        return bundle
+
+    def _keep_served(self, version: str, bundle: ModelBundle) -> None:
+        # Caller holds self._lock. With the flat engine the bundle holds its own
+        # node arrays; caching the flat copies in place of the sklearn forests
+        # lets those be freed instead of keeping both resident.
+        self._artifacts[("gpa", version)] = bundle.gpa_model
+        self._artifacts[("dropout", version)] = bundle.dropout_model
+
+    @contextmanager
+    def lease(self, version: Optional[str] = None):
+        """Hold a bundle for the duration of a request so a swap cannot retire it mid-flight."""
+        with self._lock:
+            bundle = self._bundles.get(version or self.active_version)
+            if bundle is not None:
+                bundle.inflight += 1
+        if bundle is None:
+            bundle = self.bundle(version)
+            with self._lock:
+                bundle.inflight += 1
+        try:
+            yield bundle
+        finally:
+            with self._lock:
+                bundle.inflight -= 1
+                if bundle.retired and bundle.inflight == 0 and bundle in self._draining:
+                    self._draining.remove(bundle)
+                    logger.info("Model revision %s drained and released", bundle.revision)
+
+    def _retire(self, bundle: ModelBundle) -> None:
+        # Caller holds self._lock.
+        bundle.retired = True
+        if bundle.inflight:
+            self._draining.append(bundle)
+        else:
+            logger.info("Model revision %s released", bundle.revision)
+
+    def activate(self, version: str, warm_rows: int = WARM_ROWS) -> ModelBundle:
+        """Load ``version`` fresh from disk, warm it up, then make it the active version."""
+        loaded = {}
+        for name in ARTIFACTS:
+            loaded[name] = self._load(name, version)
+        bundle = self._new_bundle(
+            version, loaded["gpa"][0], loaded["dropout"][0], loaded["encoders"][0], loaded["calibrator"][0]
+        )
+        if warm_rows:
+            bundle.warm_up(warm_rows)
+
+        with self._lock:
+            previous = {b for b in (self._bundles.get(self.active_version), self._bundles.get(version)) if b}
+            for name, (artifact, rss_delta) in loaded.items():
+                self._artifacts[(name, version)] = artifact
+                self._rss_delta[(name, version)] = rss_delta
+            self._keep_served(version, bundle)
+            self._bundles[version] = bundle
+            self.active_version = version
+            # Versions whose bundles this swap retires; caches keyed by their
+            # revisions must be told, or nothing ever evicts them.
+            retired = sorted({old.version for old in previous} - {version})
+            for old in previous:
+                if old.version != version:
+                    self._bundles.pop(old.version, None)
+                    for name in ARTIFACTS:
+                        self._artifacts.pop((name, old.version), None)
+                        self._rss_delta.pop((name, old.version), None)
+                self._retire(old)
+        logger.info("Activated model revision %s", bundle.revision)
+
+        for callback in self._listeners:
+            for changed in [version, *retired]:
+                callback(changed)
+        return bundle
+
+    def reload_in_background(self, version: Optional[str] = None) -> bool:
+        """Start ``activate(version)`` on a thread; False if a reload is already running."""
+        version = version or self.active_version
+        if not self._reload_lock.acquire(blocking=False):
+            return False
+        self.reload_status = {"state": "loading", "version": version, "started_at": time.time()}
+
+        def run():
+            try:
+                bundle = self.activate(version)
+                self.reload_status = {**self.reload_status, "state": "active", "revision": bundle.revision}
+            except Exception as e:
+                logger.exception("Reloading model version %s failed", version)
+                self.reload_status = {**self.reload_status, "state": "failed", "error": str(e)}
+            finally:
+                self.reload_status["finished_at"] = time.time()
+                self._reload_lock.release()
+
+        threading.Thread(target=run, name=f"model-reload-{version}", daemon=True).start()
+        return True
+
+    def artifact_mtimes(self, version: str) -> Tuple[float, ...]:
+        """Modification times of ``version``'s required artifacts; 0.0 for a missing file."""
+        mtimes = []
+        for filename, _ in (ARTIFACTS[name] for name in REQUIRED_ARTIFACTS):
+            try:
+                mtimes.append(os.path.getmtime(os.path.join(self.version_dir(version), filename)))
+            except OSError:
+                mtimes.append(0.0)
+        return tuple(mtimes)
+
+    def start_watcher(self, interval: float) -> threading.Thread:
+        """Poll the ACTIVE file and the active version's artifacts, reloading when either changes."""
+
+        def watch():
+            seen_version = self.active_version
+            seen_mtimes = self.artifact_mtimes(seen_version)
+            while True:
+                time.sleep(interval)
+                wanted = self._read_active_file() or self.active_version
+                mtimes = self.artifact_mtimes(wanted)
+                if wanted == seen_version and mtimes == seen_mtimes:
+                    continue
+                # Wait for a writer to finish before loading half-written files.
+                if 0.0 in mtimes or time.time() - max(mtimes) < interval:
+                    continue
+                if self.reload_in_background(wanted):
+                    seen_version, seen_mtimes = wanted, mtimes
+
+        thread = threading.Thread(target=watch, name="model-watcher", daemon=True)
+        thread.start()
+        return thread
+
+    def status(self) -> dict:
+        with self._lock:
+            active = self._bundles.get(self.active_version)
+            draining = [{"revision": b.revision, "inflight": b.inflight} for b in self._draining]
+        return {
+            "active_version": self.active_version,
+            "active_revision": active.revision if active else None,
+            "available_versions": self.available_versions(),
+            "draining": draining,
+            "reload": self.reload_status,
+        }
+
+    def add_invalidation_listener(self, callback: Callable[[Optional[str]], None]) -> None:
+        """Call ``callback(version)`` whenever loaded artifacts are dropped.
+
+        An activation calls it for the new version and for each version it retired.
+        """
+        self._listeners.append(callback)
+
+    def invalidate(self, version: Optional[str] = None) -> None:
+        """Forget loaded artifacts for ``version`` (or all) so the next access reloads them from disk."""
+        with self._lock:
+            for key in [k for k in self._artifacts if version is None or k[1] == version]:
+                del self._artifacts[key]
+                self._rss_delta.pop(key, None)
+            for key in [k for k in self._bundles if version is None or k == version]:
+                del self._bundles[key]
+        for callback in self._listeners:
+            callback(version)
+
+    def memory_report(self) -> dict:
+        """Per-artifact memory for everything loaded so far, plus the process RSS."""
+        models = []
+        for (name, version), artifact in sorted(self._artifacts.items()):
+            if artifact is None:
+                continue
+            entry = {
+                "name": name,
+                "version": version,
+                "type": type(artifact).__name__,
+                "array_bytes": estimate_nbytes(artifact),
+                "rss_delta_at_load_bytes": self._rss_delta.get((name, version), 0),
+            }
+            estimators = getattr(artifact, "estimators_", None)
+            if estimators is not None:
+                entry["n_estimators"] = len(estimators)
+            elif hasattr(artifact, "n_trees"):
+                entry["n_estimators"] = artifact.n_trees
+            models.append(entry)
+        return {
+            "process_rss_bytes": process_rss_bytes(),
+            "artifact_format": self.artifact_format,
+            "inference_engine": self.engine,
+            "models": models,
+        }
+
+
+registry = ModelRegistry()
@@ -0,0 +1,145 @@
+import threading
+from contextlib import nullcontext
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+
+from feature_plan import FeaturePlan
+from forest_engine import FlatForest
+
+# Per-thread buffers grow to the largest batch seen, up to this many rows;
+# bigger batches get a one-off allocation instead of pinning the memory.
+MAX_BUFFER_ROWS = 4096
+
+
+def _input_dtype(model):
+    # sklearn forests and the flat engine compare features as float32 anyway;
+    # handing them float32 saves the conversion copy inside predict. Anything
+    # else (e.g. a distilled HistGradientBoosting model) bins float64 inputs.
+    if isinstance(model, (FlatForest, RandomForestRegressor, RandomForestClassifier)):
+        return np.float32
+    return np.float64
+
+
+class InferencePipeline:
+    """The GPA -> risk chain compiled once per loaded model pair.
+
+    Column positions of both stages within ``plan.columns`` are resolved up
+    front. Each call gathers the GPA model's columns into a reusable per-thread
+    buffer, predicts, then either reuses that same buffer for the risk model
+    (when both models take the same columns, as the shipped ones do) or gathers
+    the risk columns into a second buffer and writes the predicted CGPA into
+    its slot in place. No DataFrames are built at any point.
+
+    ``run_with_proba`` also returns the risk model's class probabilities,
+    passed through ``calibrator`` when the version ships one.
+    """
+
+    def __init__(
+        self,
+        gpa_model,
+        dropout_model,
+        plan: FeaturePlan,
+        risk_classes: Optional[Sequence] = None,
+        calibrator=None,
+    ):
+        self.gpa_model = gpa_model
+        self.dropout_model = dropout_model
+        self.plan = plan
+        self.gpa_index = plan.gpa_index
+        self.dropout_index = plan.dropout_index
+        self.cgpa_slot = plan.dropout_cgpa_pos
+        self.gpa_dtype = _input_dtype(gpa_model)
+        self.dropout_dtype = _input_dtype(dropout_model)
+        self.shared_buffer = (
+            self.cgpa_slot is None
+            and self.gpa_dtype == self.dropout_dtype
+            and np.array_equal(self.gpa_index, self.dropout_index)
+        )
+        self.risk_classes = None if risk_classes is None else np.asarray(risk_classes)
+        self.calibrator = calibrator
+        # Risk label of each predict_proba column.
+        model_classes = getattr(dropout_model, "classes_", None)
+        self.proba_labels = None if model_classes is None else self.decode(model_classes)
+        self._local = threading.local()
+
+    def _buffer(self, name: str, rows: int, width: int, dtype) -> np.ndarray:
+        # Zeroed, not np.empty: np.take(..., out=) with a different dtype casts
+        # the old contents of ``out`` too, and uninitialised memory can hold NaN
+        # patterns that raise "invalid value encountered in cast" warnings.
+        if rows > MAX_BUFFER_ROWS:
+            return np.zeros((rows, width), dtype=dtype)
+        buf = getattr(self._local, name, None)
+        if buf is None or buf.shape[0] < rows:
+            buf = np.zeros((max(rows, 1), width), dtype=dtype)
+            setattr(self._local, name, buf)
+        return buf[:rows]
+
+    def decode(self, raw_predictions) -> List[str]:
+        """Map encoded risk-model outputs back to their labels."""
+        if self.risk_classes is None:
+            return [str(p) for p in raw_predictions]
+        try:
+            return self.risk_classes[np.asarray(raw_predictions).astype(int)].tolist()
+        except (IndexError, ValueError):
+            return [str(p) for p in raw_predictions]
+
+    def run(self, X: np.ndarray, stage: Optional[Callable[[str], object]] = None) -> Tuple[np.ndarray, List[str]]:
+        """Score a matrix laid out as ``plan.columns``; returns ``(predicted_cgpa, risk_labels)``.
+
+        ``stage(name)``, if given, returns a context manager wrapped around each
+        stage (``gpa_inference``, ``dropout_inference``, ``decode``) for timing.
+        """
+        predicted_cgpa, risk_labels, _ = self._run(X, stage, proba=False)
+        return predicted_cgpa, risk_labels
+
+    def run_with_proba(self, X: np.ndarray, stage=None) -> Tuple[np.ndarray, List[str], np.ndarray]:
+        """Like ``run``, plus a ``(rows, classes)`` probability matrix ordered as ``proba_labels``.
+
+        The label is still the model's own argmax, so it always agrees with ``run``;
+        the probabilities are calibrated when a calibrator is loaded.
+        """
+        return self._run(X, stage, proba=True)
+
+    def _run(self, X: np.ndarray, stage, proba: bool):
+        stage = stage or (lambda name: nullcontext())
+        rows = X.shape[0]
+
+        with stage("gpa_inference"):
+            X_gpa = self._buffer("gpa", rows, len(self.gpa_index), self.gpa_dtype)
+            np.take(X, self.gpa_index, axis=1, out=X_gpa)
+            predicted_cgpa = self.gpa_model.predict(X_gpa)
+
+        with stage("dropout_inference"):
+            if self.shared_buffer:
+                X_dropout = X_gpa
+            else:
+                X_dropout = self._buffer("dropout", rows, len(self.dropout_index), self.dropout_dtype)
+                np.take(X, self.dropout_index, axis=1, out=X_dropout)
+                if self.cgpa_slot is not None:
+                    X_dropout[:, self.cgpa_slot] = predicted_cgpa
+            if proba:
+                risk_proba = self.dropout_model.predict_proba(X_dropout)
+                dropout_raw = self.dropout_model.classes_.take(np.argmax(risk_proba, axis=1))
+            else:
+                risk_proba = None
+                dropout_raw = self.dropout_model.predict(X_dropout)
+
+        if proba and self.calibrator is not None:
+            with stage("calibrate"):
+                risk_proba = self.calibrator.transform(risk_proba)
+
+        with stage("decode"):
+            risk_labels = self.decode(dropout_raw)
+        return predicted_cgpa, risk_labels, risk_proba
+
+    def run_records(self, records: Sequence[dict], stage=None):
+        """Encode ``records`` straight into a reusable buffer and score them.
+
+        Raises ValueError for the first record with an unknown category.
+        """
+        X = self._buffer("encoded", len(records), len(self.plan.columns), np.float64)
+        for i, data in enumerate(records):
+            self.plan.encode_row(data, X[i])
+        return self.run(X, stage)
@@ -1,43 +1,10 @@
 from pydantic import BaseModel
 from fastapi import APIRouter, HTTPException
-import pandas as pd
-import os
-import joblib
+import numpy as np
 
-router = APIRouter()
-
-MODEL_DIR = os.path.join(os.path.dirname(__file__), "models")
-GPA_MODEL_FILE = "gpa_prediction_model.pkl"
-DROP_MODEL_FILE = "dropout_risk_model.pkl"
-ENCODER_FILE = "label_encoder.pkl"
-
-FEATURES = [
-    "Attendance_Percentage",
-    "Study_Hours_Per_Week",
-    "Previous_CGPA",
-    "G1_Internal",
-    "G2_Internal",
-    "Final_Exam_Score",
-    "Age",
-    "Backlogs",
-    "Semester",
-    "Parent_Education_Level",
-    "Gender",
-    "Department",
-    "Part_Time_Work",
-]
-
-CATEGORICAL_FIELDS = ["Gender", "Department", "Part_Time_Work", "Parent_Education_Level", "Semester", "Academic_Risk_Level"]
-
-reg_model = joblib.load(os.path.join(MODEL_DIR, GPA_MODEL_FILE))
-clf_model = joblib.load(os.path.join(MODEL_DIR, DROP_MODEL_FILE))
-encoders = joblib.load(os.path.join(MODEL_DIR, ENCODER_FILE))
-
-_reg_tmp = getattr(reg_model, "feature_names_in_", None)
-reg_features = list(_reg_tmp) if _reg_tmp is not None and len(_reg_tmp) > 0 else FEATURES
+from model_registry import registry
 
-_clf_tmp = getattr(clf_model, "feature_names_in_", None)
-clf_features = list(_clf_tmp) if _clf_tmp is not None and len(_clf_tmp) > 0 else FEATURES
+router = APIRouter()
 
 
 class StudentInput(BaseModel):
@@ -53,44 +20,20 @@ class StudentInput(BaseModel):
     Parent_Education_Level: str = "Graduate"
 
 
-def preprocess(data_dict):
-    df = pd.DataFrame([data_dict])
-
-    for col in CATEGORICAL_FIELDS:
-        encoder = encoders.get(col)
-        if encoder is None:
-            continue
-        if col not in df.columns:
-            df[col] = encoder.transform([encoder.classes_[0]])[0]
-        else:
-            df[col] = encoder.transform(df[col].astype(str))
-
-    for col in FEATURES:
-        if col not in df.columns:
-            df[col] = 0
-
-    return df
+def preprocess(data_dict, plan):
+    return plan.encode_row(data_dict)[np.newaxis, :]
 
 
 @router.post("/predict")
 def predict(input_data: StudentInput):
     try:
+        models = registry.bundle()
         data_dict = input_data.model_dump()
-        df = preprocess(data_dict)
-
-        X_reg = df.reindex(columns=reg_features, fill_value=0)
-        X_clf = df.reindex(columns=clf_features, fill_value=0)
-
-        predicted_cgpa = float(reg_model.predict(X_reg)[0])
-        academic_risk_raw = clf_model.predict(X_clf)[0]
+        X = preprocess(data_dict, models.plan)
 
-        if "Academic_Risk_Level" in encoders:
-            try:
-                academic_risk_label = encoders["Academic_Risk_Level"].inverse_transform([int(academic_risk_raw)])[0]
-            except Exception:
-                academic_risk_label = str(academic_risk_raw)
-        else:
-            academic_risk_label = str(academic_risk_raw)
+        predicted, labels = models.pipeline.run(X)
+        predicted_cgpa = float(predicted[0])
+        academic_risk_label = labels[0]
 
         return {
             "predicted_CGPA": round(predicted_cgpa, 2),
@@ -13,6 +13,9 @@ CATEGORICAL_COLS = [
     "Part_Time_Work"
 ]
 
+TEST_SIZE = 0.2
+RANDOM_STATE = 42
+
 def preprocess_data(df: pd.DataFrame):
     """
     Clean preprocessing for:
@@ -50,7 +53,7 @@ def preprocess_data(df: pd.DataFrame):
 
     # Train-test split
     X_train, X_test, y_reg_train, y_reg_test, y_clf_train, y_clf_test = train_test_split(
-        X, y_reg, y_clf, test_size=0.2, random_state=42
+        X, y_reg, y_clf, test_size=TEST_SIZE, random_state=RANDOM_STATE
     )
 
     return (
@@ -60,3 +63,25 @@ def preprocess_data(df: pd.DataFrame):
         encoders
     )
 
+
+def unseen_categories(df: pd.DataFrame, encoders: dict) -> dict:
+    """Values in ``df`` that the fitted encoders have never seen, per column."""
+    unseen = {}
+    for col in CATEGORICAL_COLS + ["Academic_Risk_Level"]:
+        if col in df.columns and col in encoders:
+            new = set(df[col].unique()) - set(encoders[col].classes_)
+            if new:
+                unseen[col] = sorted(map(str, new))
+    return unseen
+
+
+def apply_encoders(df: pd.DataFrame, encoders: dict):
+    """Encode ``df`` with already-fitted encoders; returns ``(X, y_reg, y_clf)``."""
+    df = df.drop(columns=[c for c in DROP_COLS if c in df.columns])
+    for col in CATEGORICAL_COLS + ["Academic_Risk_Level"]:
+        if col in df.columns:
+            df[col] = encoders[col].transform(df[col])
+    y_reg = df["predicted_CGPA"]
+    y_clf = df["Academic_Risk_Level"]
+    X = df.drop(columns=["predicted_CGPA", "Academic_Risk_Level"])
+    return X, y_reg, y_clf
@@ -0,0 +1,47 @@
+import sys
+import threading
+import time
+from collections import Counter
+from typing import List, Optional
+
+
+class SamplingProfiler:
+    """Periodically sample one thread's Python stack from a background thread.
+
+    Cheap enough to switch on for a single request: the profiled thread runs
+    untouched and the sampler only reads ``sys._current_frames()`` every
+    ``interval`` seconds. Results are collapsed stacks ("outer;inner count"),
+    the input format of most flame graph tools.
+    """
+
+    def __init__(self, thread_id: Optional[int] = None, interval: float = 0.001):
+        self.thread_id = thread_id or threading.get_ident()
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, name="sampling-profiler", daemon=True)
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{frame.f_lineno})")
+                frame = frame.f_back
+            self.samples[";".join(reversed(stack))] += 1
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.elapsed = time.perf_counter() - self._started
+
+    def top(self, limit: int = 20) -> List[str]:
+        return [f"{stack} {count}" for stack, count in self.samples.most_common(limit)]
@@ -0,0 +1,133 @@
+"""Score a student CSV of any size with the trained models.
+
+The input is streamed in chunks, each chunk is encoded with the same
+FeaturePlan the API uses and scored by both models, and the predictions are
+appended to the output as they are produced, so memory stays bounded by the
+chunk size rather than the file size.
+
+Run from the ml-service directory:
+
+    python score_csv.py students.csv predictions.csv --chunksize 50000
+    python score_csv.py students.csv predictions.parquet
+    python score_csv.py students.csv predictions.csv --workers 8
+    python score_csv.py students.csv predictions.csv --proba
+"""
+import argparse
+import contextlib
+import os
+import sys
+import time
+
+import pandas as pd
+
+from model_registry import registry
+from scoring import ID_COLUMNS, score_frame
+
+
+class CsvSink:
+    def __init__(self, path: str):
+        self.path = path
+        self.header = True
+
+    def write(self, frame: pd.DataFrame):
+        frame.to_csv(self.path, mode="w" if self.header else "a", header=self.header, index=False)
+        self.header = False
+
+    def close(self):
+        pass
+
+
+class ParquetSink:
+    def __init__(self, path: str):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise SystemExit("Parquet output requires pyarrow (pip install pyarrow).") from e
+        self._pa, self._pq = pa, pq
+        self.path = path
+        self.writer = None
+
+    def write(self, frame: pd.DataFrame):
+        pa = self._pa
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        if self.writer is None:
+            # An all-empty column in the first chunk infers as null; widen it to string.
+            schema = pa.schema(
+                [pa.field(f.name, pa.string()) if pa.types.is_null(f.type) else f for f in table.schema]
+            )
+            self.writer = self._pq.ParquetWriter(self.path, schema)
+        self.writer.write_table(table.cast(self.writer.schema))
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+def open_sink(path: str, fmt: str):
+    if fmt == "auto":
+        fmt = "parquet" if path.endswith((".parquet", ".pq")) else "csv"
+    return ParquetSink(path) if fmt == "parquet" else CsvSink(path)
+
+
+def score_csv(
+    input_path,
+    output_path,
+    chunksize=50_000,
+    fmt="auto",
+    version=None,
+    keep_columns=None,
+    workers=1,
+    include_proba=False,
+):
+    keep_columns = ID_COLUMNS if keep_columns is None else keep_columns
+    sink = open_sink(output_path, fmt)
+
+    rows = failed = 0
+    start = time.perf_counter()
+    with contextlib.ExitStack() as stack:
+        stack.callback(sink.close)
+        chunks = pd.read_csv(input_path, chunksize=chunksize)
+        if workers > 1:
+            from bulk_score import ScoringPool
+
+            pool = stack.enter_context(ScoringPool(workers, chunksize, version, keep_columns, include_proba))
+            results = pool.imap(chunks)
+        else:
+            models = registry.bundle(version)
+            results = (score_frame(models, chunk, keep_columns, include_proba) for chunk in chunks)
+
+        for scored in results:
+            sink.write(scored)
+            rows += len(scored)
+            failed += int(scored["error"].notna().sum())
+            elapsed = time.perf_counter() - start
+            print(f"\rscored {rows:,} rows ({failed:,} failed) at {rows / elapsed:,.0f} rows/s", end="", file=sys.stderr)
+    print(file=sys.stderr)
+    return rows, failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("input", help="CSV with the same columns as dataset/StudentData.csv")
+    parser.add_argument("output", help="destination .csv or .parquet file")
+    parser.add_argument("--chunksize", type=int, default=50_000, help="rows read and scored per step")
+    parser.add_argument("--format", choices=["auto", "csv", "parquet"], default="auto")
+    parser.add_argument("--model-version", default=None, help="defaults to the active version")
+    parser.add_argument("--workers", type=int, default=1, help="scoring processes; chunks are sharded across them")
+    parser.add_argument(
+        "--keep-columns",
+        default=",".join(ID_COLUMNS),
+        help="comma-separated input columns copied to the output",
+    )
+    parser.add_argument("--proba", action="store_true", help="add calibrated risk-level probability columns")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.input):
+        parser.error(f"input file not found: {args.input}")
+    keep = [c for c in args.keep_columns.split(",") if c]
+    score_csv(args.input, args.output, args.chunksize, args.format, args.model_version, keep, args.workers, args.proba)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Chunk scoring shared by score_csv, bulk_score, cohort jobs and the API.
+
+``score_frame`` encodes a DataFrame of StudentInput columns with the bundle's
+FeaturePlan and scores it column-at-a-time, reporting per-row errors instead
+of failing the whole chunk.
+"""
+import numpy as np
+import pandas as pd
+
+from model_registry import ModelBundle
+
+ID_COLUMNS = ["Enrollment_No", "Student_Name"]
+
+
+def score_frame(
+    models: ModelBundle, chunk: pd.DataFrame, keep_columns, include_proba: bool = False, required=()
+) -> pd.DataFrame:
+    """Predictions for one chunk; rows that fail to encode keep their ids and get an error.
+
+    With ``include_proba`` each risk level also gets a ``proba_<level>`` column.
+    Rows with a null in any of the ``required`` columns are rejected unscored.
+    """
+    chunk = chunk.reset_index(drop=True)
+    errors = {}
+    present = [c for c in required if c in chunk.columns]
+    if present:
+        nulls = chunk[present].isna().to_numpy()
+        rejected = nulls.any(axis=1)
+        for pos, col in zip(np.flatnonzero(rejected), nulls[rejected].argmax(axis=1)):
+            errors[int(pos)] = f"Missing value for '{present[col]}'"
+    if errors:
+        kept = np.flatnonzero(~rejected)
+        X, encode_errors = models.plan.encode_frame(chunk.iloc[kept])
+        errors.update({int(kept[pos]): message for pos, message in encode_errors.items()})
+    else:
+        X, errors = models.plan.encode_frame(chunk)
+    valid = np.ones(len(chunk), dtype=bool)
+    valid[list(errors)] = False
+
+    out = chunk[[c for c in keep_columns if c in chunk.columns]].copy()
+    cgpa = np.full(len(chunk), np.nan)
+    risk = np.full(len(chunk), None, dtype=object)
+    proba = np.full((len(chunk), len(models.pipeline.proba_labels or [])), np.nan) if include_proba else None
+    if len(X):
+        if include_proba:
+            predicted_cgpa, risk_labels, proba[valid] = models.pipeline.run_with_proba(X)
+        else:
+            predicted_cgpa, risk_labels = models.score(X)
+        cgpa[valid] = np.round(predicted_cgpa, 2)
+        risk[valid] = risk_labels
+
+    out["predicted_CGPA"] = cgpa
+    out["academic_risk_level"] = risk
+    if include_proba:
+        for i, label in enumerate(models.pipeline.proba_labels):
+            out[f"proba_{label}"] = proba[:, i]
+    out["error"] = pd.Series(errors, dtype=object).reindex(range(len(chunk))).to_numpy()
+    return out
@@ -0,0 +1,86 @@
+import os
+import shutil
+
+import joblib
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+
+import model_registry
+from model_registry import DEFAULT_VERSION, DROP_MODEL_FILE, ENCODER_FILE, GPA_MODEL_FILE, ModelRegistry
+from preprocess import preprocess_data
+from train_models import FEATURES
+
+ML_SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATASET = os.path.join(ML_SERVICE_DIR, "..", "dataset", "StudentData.csv")
+
+
+def write_models(directory: str, df: pd.DataFrame, seed: int) -> None:
+    """Fit small forests on ``df`` and save them the way train_models does."""
+    X_train, _, y_reg, _, y_clf, _, encoders = preprocess_data(df)
+    os.makedirs(directory, exist_ok=True)
+    gpa = RandomForestRegressor(n_estimators=5, max_depth=5, random_state=seed).fit(X_train[FEATURES], y_reg)
+    risk = RandomForestClassifier(n_estimators=5, max_depth=5, random_state=seed).fit(X_train[FEATURES], y_clf)
+    joblib.dump(gpa, os.path.join(directory, GPA_MODEL_FILE))
+    joblib.dump(risk, os.path.join(directory, DROP_MODEL_FILE))
+    joblib.dump(encoders, os.path.join(directory, ENCODER_FILE))
+
+
+@pytest.fixture(scope="session")
+def students() -> pd.DataFrame:
+    return pd.read_csv(DATASET, nrows=600)
+
+
+@pytest.fixture(scope="session")
+def trained_model_dir(tmp_path_factory, students) -> str:
+    """A models/ directory with the unversioned set and a second version, v2."""
+    root = str(tmp_path_factory.mktemp("models"))
+    write_models(root, students, seed=0)
+    write_models(os.path.join(root, "v2"), students, seed=1)
+    return root
+
+
+@pytest.fixture
+def model_dir(tmp_path, trained_model_dir) -> str:
+    """A private copy of the trained models, safe to modify."""
+    directory = str(tmp_path / "models")
+    shutil.copytree(trained_model_dir, directory)
+    return directory
+
+
+@pytest.fixture
+def registry(model_dir) -> ModelRegistry:
+    return ModelRegistry(model_dir=model_dir, engine="sklearn")
+
+
+@pytest.fixture
+def student() -> dict:
+    """A valid StudentInput payload."""
+    return {
+        "Semester": 4,
+        "Department": "CSE",
+        "Age": 20,
+        "Gender": "Female",
+        "Attendance_Percentage": 80,
+        "Study_Hours_Per_Week": 12,
+        "Backlogs": 0,
+        "Part_Time_Work": "No",
+        "Previous_CGPA": 7.5,
+    }
+
+
+@pytest.fixture(scope="session")
+def api(trained_model_dir):
+    """The ml_api module, imported with its shared registry pointed at the test models."""
+    model_registry.registry.model_dir = trained_model_dir
+    model_registry.registry.active_version = DEFAULT_VERSION
+    import ml_api
+
+    return ml_api
+
+
+@pytest.fixture(scope="session")
+def client(api):
+    from fastapi.testclient import TestClient
+
+    return TestClient(api.app)
@@ -0,0 +1,30 @@
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+
+from calibration import fit_replayed_oob_calibrator, oob_masks
+
+
+def test_replayed_bootstraps_match_sklearns_out_of_bag_rows():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(300, 4))
+    y = (X[:, 0] + rng.normal(scale=0.5, size=300) > 0).astype(int)
+    model = RandomForestClassifier(n_estimators=20, oob_score=True, random_state=0).fit(X, y)
+
+    masks = oob_masks(model, len(X))
+    sums = sum(est.predict_proba(X.astype(np.float32)) * m[:, None] for est, m in zip(model.estimators_, masks))
+    np.testing.assert_allclose(sums / masks.sum(axis=0)[:, None], model.oob_decision_function_)
+    np.testing.assert_array_equal(oob_masks(model, len(X), first_tree=15), masks[15:])
+
+
+def test_grown_forest_is_calibrated_from_its_new_trees_only():
+    rng = np.random.default_rng(1)
+    X = rng.normal(size=(400, 4))
+    y = (X[:, 0] > 0).astype(int)
+    model = RandomForestClassifier(n_estimators=25, random_state=0).fit(X[:200], y[:200])
+    model.set_params(warm_start=True, n_estimators=40).fit(X, y)
+
+    calibrator = fit_replayed_oob_calibrator(model, X, y, first_tree=25)
+
+    proba = calibrator.transform(model.predict_proba(X))
+    assert proba.shape == (400, 2)
+    np.testing.assert_allclose(proba.sum(axis=1), 1.0)
@@ -0,0 +1,67 @@
+import json
+import re
+
+import pytest
+
+from cohort import mongo_query
+
+NOTHING = {"_id": {"$in": []}}
+
+
+def test_stored_fields_match_by_equality_and_lists_by_any_value():
+    query = mongo_query({"Backlogs": [0, 1], "Enrollment_No": "EN001"})
+    assert query == {
+        "$and": [{"$or": [{"totalBacklogs": 0.0}, {"totalBacklogs": 1.0}]}, {"enrollmentNumber": "EN001"}]
+    }
+
+
+def test_semester_matches_the_rounded_and_clamped_gpa():
+    assert mongo_query({"Semester": 4}) == {"currentGPA": {"$gte": 3.5, "$lt": 4.5}}
+    assert mongo_query({"Semester": 8}) == {"currentGPA": {"$gte": 7.5}}
+    assert mongo_query({"Semester": 1}) == {
+        "$or": [{"currentGPA": {"$lt": 1.5}}, {"currentGPA": {"$in": [None, 0]}}]
+    }
+    assert mongo_query({"Semester": 9}) == NOTHING
+
+
+def test_department_matches_case_insensitively_with_cse_as_the_default():
+    query = mongo_query({"Department": "ECE"})
+    assert query["department"].pattern == "^ECE$" and query["department"].flags & re.IGNORECASE
+    assert mongo_query({"Department": "CSE"})["$or"][1] == {"department": {"$in": [None, ""]}}
+    # Mapped records are upper-cased, so a lower-case filter matches none of them.
+    assert mongo_query({"Department": "ece"}) == NOTHING
+
+
+def test_mapped_categories_match_what_the_record_mapping_produces():
+    assert mongo_query({"Part_Time_Work": "No"}) == {"hasPartTimeJob": {"$ne": "yes"}}
+    assert mongo_query({"Gender": "Male"})["gender"]["$not"].pattern == "^female$"
+    assert mongo_query({"Gender": "female"}) == NOTHING
+    assert mongo_query({"Backlogs": []}) == NOTHING
+
+
+@pytest.mark.parametrize(
+    "filter",
+    [
+        {"$where": "sleep(1000)"},
+        {"Student_Name": {"$regex": ".*"}},
+        {"Backlogs": [{"$gt": 0}]},
+        {"Age": "twenty"},
+        {"Semester": "third"},
+    ],
+)
+def test_unsafe_or_unknown_filters_are_rejected(filter):
+    with pytest.raises(ValueError):
+        mongo_query(filter)
+
+
+def test_stream_ends_failed_when_setup_fails_before_the_job_runs(api, client, monkeypatch):
+    def broken_lease():
+        raise RuntimeError("no models")
+
+    monkeypatch.setattr(api.registry, "lease", broken_lease)
+    response = client.post("/cohort/score", json={"students": [{"Semester": 1}]})
+
+    last = response.text.strip().splitlines()[-1]
+    job = api.cohort_jobs.get(response.headers["x-job-id"])
+    assert json.loads(last)["type"] == "failed"
+    assert job.state == "failed" and job.error == "no models"
@@ -0,0 +1,52 @@
+import os
+
+import pandas as pd
+import pytest
+
+import compress_models
+from training_data import dataset_hash
+
+
+@pytest.fixture
+def dataset(tmp_path, monkeypatch):
+    path = tmp_path / "StudentData.csv"
+    path.write_text("a,b\n1,2\n3,4\n5,6\n7,8\n")
+    monkeypatch.setattr(compress_models, "dataset_path", lambda: str(path))
+    return path
+
+
+def manifest_for(path, **overrides):
+    return {
+        "mode": "full",
+        "dataset_bytes": os.path.getsize(path),
+        "dataset_hash": dataset_hash(str(path)),
+        "dataset_rows": 4,
+        "test_rows": [1],
+        **overrides,
+    }
+
+
+def split(train_rows=(0, 2, 3), test_rows=(1,)):
+    return pd.DataFrame(index=list(train_rows)), pd.DataFrame(index=list(test_rows))
+
+
+def test_matching_training_rows_pass(dataset):
+    compress_models.check_training_rows(manifest_for(dataset), *split())
+
+
+@pytest.mark.parametrize(
+    "overrides",
+    [{"mode": "incremental"}, {"dataset_hash": "0" * 32}, {"dataset_rows": 5}, {"test_rows": [2]}],
+)
+def test_mismatched_manifest_aborts(dataset, overrides):
+    with pytest.raises(SystemExit):
+        compress_models.check_training_rows(manifest_for(dataset, **overrides), *split())
+
+
+def test_changed_dataset_or_missing_manifest_aborts(dataset):
+    manifest = manifest_for(dataset)
+    with pytest.raises(SystemExit):
+        compress_models.check_training_rows(None, *split())
+    dataset.write_text("a,b\n1,2\n3,4\n5,6\n7,9\n")
+    with pytest.raises(SystemExit):
+        compress_models.check_training_rows(manifest, *split())
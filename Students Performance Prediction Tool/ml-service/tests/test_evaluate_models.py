@@ -0,0 +1,39 @@
+import os
+
+import pytest
+
+import evaluate_models
+from training_data import write_manifest
+
+
+@pytest.fixture(autouse=True)
+def use_test_registry(registry, monkeypatch):
+    monkeypatch.setattr(evaluate_models, "registry", registry)
+
+
+def test_templates_use_the_settings_recorded_in_the_manifest(model_dir):
+    write_manifest(
+        os.path.join(model_dir, "v2"),
+        {"params": {"gpa": {"n_estimators": 7, "max_depth": 4}, "dropout": {"n_estimators": 9, "oob_score": True}}},
+    )
+
+    (gpa, risk), source = evaluate_models.model_templates("v2")
+
+    assert source == "manifest"
+    assert (gpa.n_estimators, gpa.max_depth, gpa.n_jobs) == (7, 4, 1)
+    assert (risk.n_estimators, risk.oob_score, risk.n_jobs) == (9, False, 1)
+    assert not hasattr(gpa, "estimators_")
+
+
+def test_versions_without_recorded_settings_are_labelled_as_defaults():
+    (gpa, risk), source = evaluate_models.model_templates()
+
+    assert source == "defaults"
+    assert (gpa.n_estimators, risk.n_estimators, risk.class_weight) == (200, 200, "balanced")
+
+
+def test_versions_resolve_through_the_registry(model_dir):
+    assert evaluate_models.model_dir() == model_dir
+    assert evaluate_models.model_dir("v2") == os.path.join(model_dir, "v2")
+    with pytest.raises(SystemExit):
+        evaluate_models.model_dir("missing")
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+import explain
+from model_registry import ModelRegistry
+
+
+@pytest.mark.parametrize("engine", ["sklearn", "flat"])
+def test_contributions_add_up_to_the_served_predictions(model_dir, students, engine):
+    models = ModelRegistry(model_dir=model_dir, engine=engine).bundle()
+    # Explanations are of the forests' own probabilities; the test models ship no calibrator.
+    assert models.pipeline.calibrator is None
+    X, errors = models.plan.encode_frame(students.head(50))
+    assert not errors
+    cgpa, labels, proba = models.pipeline.run_with_proba(X)
+    explainer = explain.Explainer(models)
+
+    gpa_bias, gpa_contrib, risk_bias, risk_contrib = explainer.contributions(X)
+    np.testing.assert_allclose(gpa_bias + gpa_contrib[:, :, 0].sum(axis=1), cgpa)
+    # Every risk class, not just the predicted one.
+    np.testing.assert_allclose(risk_bias + risk_contrib.sum(axis=1), proba, atol=1e-12)
+
+    explanations = explainer.explain(X)
+    assert [e["academic_risk_level"]["label"] for e in explanations] == list(labels)
+    for e, c, p in zip(explanations, cgpa, proba.max(axis=1)):
+        gpa, risk = e["predicted_CGPA"], e["academic_risk_level"]
+        assert gpa["base_value"] + sum(gpa["contributions"].values()) == pytest.approx(c, abs=1e-3)
+        assert risk["base_value"] + sum(risk["contributions"].values()) == pytest.approx(p, abs=1e-3)
+
+
+def test_activation_evicts_explainers_of_retired_revisions(registry):
+    explain.forget()
+    registry.add_invalidation_listener(explain.forget)
+    old = registry.bundle()
+    explainer = explain.explainer_for(old)
+    assert explain.explainer_for(old) is explainer
+
+    new = registry.activate("v2", warm_rows=0)
+    assert old.revision not in explain._explainers
+
+    explain.explainer_for(new)
+    registry.activate("current", warm_rows=0)
+    assert explain._explainers == {}
@@ -0,0 +1,66 @@
+import os
+
+import numpy as np
+import pytest
+
+import feature_store
+from feature_store import FeatureStore
+from model_registry import GPA_MODEL_FILE
+
+
+@pytest.fixture
+def models(registry, monkeypatch):
+    # Stores are stamped with artifact mtimes from the module's registry.
+    monkeypatch.setattr(feature_store, "registry", registry)
+    return registry.bundle()
+
+
+@pytest.fixture
+def store(tmp_path, models, students, monkeypatch):
+    monkeypatch.setattr(feature_store, "MIN_CAPACITY", 4)
+    df = students.drop_duplicates("Enrollment_No").head(3)
+    return FeatureStore.build(str(tmp_path / "store"), models, df)
+
+
+def test_build_stores_each_students_latest_prediction(store, models, students):
+    assert store.rows == 3 and store.capacity == 4
+    first = students.drop_duplicates("Enrollment_No").iloc[0]
+    X, _ = models.plan.encode_frame(first.to_frame().T)
+    cgpa, labels = models.score(X)
+    assert store.outputs(store.lookup(str(first["Enrollment_No"]))) == {
+        "predicted_CGPA": round(float(cgpa[0]), 2),
+        "academic_risk_level": labels[0],
+    }
+
+
+def test_upsert_overwrites_a_known_student(store):
+    key = next(iter(store.index))
+    row = store.lookup(key)
+    x = np.arange(len(store.columns), dtype=np.float64)
+
+    assert store.upsert(key, x, 7.5, store.risk_labels[0]) == row
+    assert store.rows == 3
+    np.testing.assert_array_equal(store.features[row], x)
+    assert store.outputs(row) == {"predicted_CGPA": 7.5, "academic_risk_level": store.risk_labels[0]}
+
+
+def test_new_students_are_appended_past_capacity_and_survive_reopen(store, models):
+    x = np.ones(len(store.columns))
+    rows = [store.upsert(f"NEW{i}", x * i, float(i), store.risk_labels[-1]) for i in range(3)]
+
+    assert rows == [3, 4, 5]
+    assert store.capacity == 8
+    store.flush()
+    reopened = FeatureStore.open(store.directory, models)
+    assert reopened.rows == 6
+    assert reopened.lookup("NEW2") == 5
+    np.testing.assert_array_equal(reopened.features[5], x * 2)
+    assert reopened.outputs(5) == {"predicted_CGPA": 2.0, "academic_risk_level": store.risk_labels[-1]}
+
+
+def test_store_is_stale_once_the_model_artifacts_change(store, registry, model_dir):
+    assert FeatureStore.open(store.directory, registry.bundle("v2")) is None
+
+    path = os.path.join(model_dir, GPA_MODEL_FILE)
+    os.utime(path, (os.path.getatime(path), os.path.getmtime(path) + 10))
+    assert FeatureStore.open(store.directory, registry.bundle()) is None
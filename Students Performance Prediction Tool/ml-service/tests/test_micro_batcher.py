@@ -0,0 +1,89 @@
+import asyncio
+import time
+
+import numpy as np
+import pytest
+
+from micro_batcher import MicroBatcher
+
+
+class RecordingScorer:
+    def __init__(self, error=None):
+        self.batches = []
+        self.error = error
+
+    def __call__(self, models, X):
+        self.batches.append((models, X.copy()))
+        if self.error is not None:
+            raise self.error
+        return [float(row[0]) * 10 for row in X]
+
+
+def submit_all(batcher, rows, models="m"):
+    async def main():
+        return await asyncio.gather(
+            *(batcher.submit(models, np.array([r])) for r in rows), return_exceptions=True
+        )
+
+    return asyncio.run(main())
+
+
+def test_full_batch_is_flushed_without_waiting_for_the_timeout():
+    scorer = RecordingScorer()
+    batcher = MicroBatcher(scorer, max_batch_size=4, max_wait_ms=10_000)
+
+    start = time.perf_counter()
+    results = submit_all(batcher, [1, 2, 3, 4])
+
+    assert time.perf_counter() - start < 5
+    assert results == [10.0, 20.0, 30.0, 40.0]
+    assert [len(X) for _, X in scorer.batches] == [4]
+
+
+def test_partial_batch_is_flushed_after_the_timeout():
+    scorer = RecordingScorer()
+    batcher = MicroBatcher(scorer, max_batch_size=100, max_wait_ms=20)
+
+    start = time.perf_counter()
+    results = submit_all(batcher, [1, 2, 3])
+
+    assert time.perf_counter() - start >= 0.02
+    assert results == [10.0, 20.0, 30.0]
+    assert [len(X) for _, X in scorer.batches] == [3]
+
+
+def test_rows_for_different_bundles_are_scored_separately():
+    scorer = RecordingScorer()
+    batcher = MicroBatcher(scorer, max_batch_size=4, max_wait_ms=50)
+
+    async def main():
+        return await asyncio.gather(
+            batcher.submit("a", np.array([1])),
+            batcher.submit("b", np.array([2])),
+            batcher.submit("a", np.array([3])),
+        )
+
+    assert asyncio.run(main()) == [10.0, 20.0, 30.0]
+    assert sorted((models, len(X)) for models, X in scorer.batches) == [("a", 2), ("b", 1)]
+
+
+def test_scoring_error_reaches_every_waiter_in_the_batch():
+    error = RuntimeError("model exploded")
+    batcher = MicroBatcher(RecordingScorer(error), max_batch_size=3, max_wait_ms=50)
+
+    results = submit_all(batcher, [1, 2, 3])
+
+    assert all(r is error for r in results)
+
+
+def test_batcher_keeps_serving_after_an_error():
+    scorer = RecordingScorer(RuntimeError("once"))
+    batcher = MicroBatcher(scorer, max_batch_size=1, max_wait_ms=1)
+
+    async def main():
+        with pytest.raises(RuntimeError):
+            await batcher.submit("m", np.array([1]))
+        scorer.error = None
+        return await batcher.submit("m", np.array([2]))
+
+    assert asyncio.run(main()) == 20.0
@@ -0,0 +1,59 @@
+import os
+
+import numpy as np
+
+from model_registry import ACTIVE_FILE, ModelRegistry
+
+
+def test_bundle_is_loaded_once_and_shared(registry):
+    assert registry.bundle() is registry.bundle()
+    assert registry.bundle("v2") is not registry.bundle()
+    assert registry.available_versions() == ["current", "v2"]
+
+
+def test_active_file_picks_the_served_version(model_dir):
+    with open(os.path.join(model_dir, ACTIVE_FILE), "w") as fh:
+        fh.write("v2\n")
+    assert ModelRegistry(model_dir=model_dir).bundle().version == "v2"
+
+
+def test_swap_retires_a_leased_bundle_only_after_its_last_request(registry):
+    old = registry.bundle()
+    with registry.lease() as leased:
+        assert leased is old
+        new = registry.activate("v2", warm_rows=2)
+
+        assert registry.active_version == "v2"
+        assert old.retired and not new.retired
+        assert [d["revision"] for d in registry.status()["draining"]] == [old.revision]
+        # The in-flight request keeps scoring on the bundle it leased.
+        X = np.tile(old.plan.encode_row({}), (2, 1))
+        assert len(leased.score(X)[0]) == 2
+
+    assert registry.status()["draining"] == []
+    with registry.lease() as leased:
+        assert leased is new
+
+
+def test_reactivating_a_version_gets_a_new_revision(registry):
+    first = registry.bundle()
+    second = registry.activate("current", warm_rows=0)
+    assert second.revision != first.revision
+    assert first.retired
+    assert registry.status()["draining"] == []
+
+
+def test_listeners_hear_about_activations_and_invalidations(registry):
+    calls = []
+    registry.add_invalidation_listener(calls.append)
+    registry.bundle()
+
+    registry.activate("v2", warm_rows=0)
+    # The new version, then the one it retired.
+    assert calls == ["v2", "current"]
+
+    calls.clear()
+    before = registry.bundle("v2")
+    registry.invalidate("v2")
+    assert calls == ["v2"]
+    assert registry.bundle("v2") is not before
@@ -0,0 +1,32 @@
+import logging
+
+import pytest
+
+from micro_batcher import MicroBatcher
+
+
+@pytest.mark.parametrize("batched", [False, True])
+def test_payloads_are_logged_with_and_without_the_micro_batcher(api, client, student, batched, monkeypatch, caplog):
+    monkeypatch.setattr(api, "LOG_PAYLOADS", True)
+    monkeypatch.setattr(api, "micro_batcher", MicroBatcher(api.score_rows, 4, 1) if batched else None)
+    api.prediction_cache.clear()
+
+    with caplog.at_level(logging.DEBUG, logger="ml_api"):
+        response = client.post("/predict", json=student)
+
+    assert response.status_code == 200
+    messages = [r.getMessage() for r in caplog.records if r.name == "ml_api"]
+    assert any(m.startswith("Prediction request:") for m in messages)
+    assert any(m.startswith("Encoded features:") for m in messages)
+
+
+def test_profiled_request_returns_what_the_endpoint_would(api, client, student, monkeypatch):
+    monkeypatch.setattr(api, "PROFILING_ENABLED", True)
+    params = {"include_proba": "true", "explain": "true"}
+
+    plain = client.post("/predict", json=student, params=params).json()
+    profiled = client.post("/predict", json=student, params=params, headers={"x-profile": "1"}).json()
+
+    assert "profile" in profiled
+    assert "risk_probabilities" in plain and "explanation" in plain
+    assert {k: v for k, v in profiled.items() if k != "profile"} == plain
@@ -0,0 +1,61 @@
+import numpy as np
+
+import prediction_cache as cache_module
+from prediction_cache import PredictionCache
+
+
+def key(i: int) -> bytes:
+    return PredictionCache.key("current#1", np.array([float(i)]))
+
+
+def test_key_depends_on_revision_and_features():
+    row = np.array([1.0, 2.0])
+    assert PredictionCache.key("current#1", row) == PredictionCache.key("current#1", row.copy())
+    assert PredictionCache.key("current#1", row) != PredictionCache.key("current#2", row)
+    assert PredictionCache.key("current#1", row) != PredictionCache.key("current#1", row + 1)
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+    cache = PredictionCache(max_entries=10, ttl_seconds=5)
+    cache.put(key(1), "result")
+
+    now[0] += 4.9
+    assert cache.get(key(1)) == "result"
+    now[0] += 0.2
+    assert cache.get(key(1)) is None
+    assert cache.expirations == 1
+    assert cache.stats()["size"] == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = PredictionCache(max_entries=2, ttl_seconds=60)
+    cache.put(key(1), 1)
+    cache.put(key(2), 2)
+    assert cache.get(key(1)) == 1  # key(2) is now the least recently used
+    cache.put(key(3), 3)
+
+    assert cache.get(key(2)) is None
+    assert cache.get(key(1)) == 1
+    assert cache.get(key(3)) == 3
+    assert cache.evictions == 1
+
+
+def test_zero_entries_disables_the_cache():
+    cache = PredictionCache(max_entries=0, ttl_seconds=60)
+    cache.put(key(1), 1)
+    assert cache.get(key(1)) is None
+    assert cache.stats()["size"] == 0
+
+
+def test_activating_a_version_clears_the_cache(registry):
+    cache = PredictionCache(max_entries=10, ttl_seconds=60)
+    registry.add_invalidation_listener(cache.clear)
+    models = registry.bundle()
+    cache.put(PredictionCache.key(models.revision, np.zeros(3)), "stale")
+
+    registry.activate("current", warm_rows=0)
+
+    assert cache.stats()["size"] == 0
+    assert cache.invalidations == 1
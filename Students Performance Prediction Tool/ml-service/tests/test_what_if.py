@@ -0,0 +1,45 @@
+import pytest
+
+from config import WHATIF_MAX_POINTS
+
+
+def what_if(client, student, *axes):
+    return client.post("/predict/what-if", json={"student": student, "axes": list(axes)})
+
+
+def test_grid_is_scored_with_one_row_per_point(client, student):
+    response = what_if(
+        client,
+        student,
+        {"feature": "Attendance_Percentage", "start": 50, "stop": 100, "num": 3},
+        {"feature": "Gender", "values": ["Male", "Female"]},
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert body["shape"] == [3, 2]
+    assert len(body["predicted_CGPA"]) == 3 and len(body["predicted_CGPA"][0]) == 2
+
+
+def test_axis_longer_than_the_limit_is_rejected_by_validation(client, student):
+    response = what_if(client, student, {"feature": "Age", "start": 18, "stop": 25, "num": 200_000_000})
+    assert response.status_code == 422
+
+
+def test_oversized_grid_is_rejected_before_any_axis_is_built(api, client, student, monkeypatch):
+    def fail(self):
+        raise AssertionError("axis points built for an oversized grid")
+
+    monkeypatch.setattr(api.GridAxis, "points", fail)
+    response = what_if(
+        client,
+        student,
+        {"feature": "Age", "start": 18, "stop": 25, "num": WHATIF_MAX_POINTS},
+        {"feature": "Backlogs", "start": 0, "stop": 5, "num": 2},
+    )
+    assert response.status_code == 400
+    assert str(WHATIF_MAX_POINTS * 2) in response.json()["detail"]
+
+
+@pytest.mark.parametrize("axis", [{"feature": "Age", "values": [20]}, {"feature": "Age", "start": 18, "stop": 25}])
+def test_axis_size_is_known_without_building_points(api, axis):
+    assert api.GridAxis(**axis).size == (1 if "values" in axis else 11)
@@ -1,46 +1,89 @@
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import joblib
 from sklearn.ensemble import RandomForestRegressor, RandomForestClassifier
 
-from .load_data import load_dataset
-from .preprocess import preprocess_data
-
-MODEL_DIR = os.path.join(os.path.dirname(__file__), "models")
-GPA_MODEL_FILE = "gpa_prediction_model.pkl"
-DROP_MODEL_FILE = "dropout_risk_model.pkl"
-ENCODER_FILE = "label_encoder.pkl"
-
-FEATURES = [
-    "Attendance_Percentage",
-    "Study_Hours_Per_Week",
-    "Previous_CGPA",
-    "G1_Internal",
-    "G2_Internal",
-    "Final_Exam_Score",
-    "Age",
-    "Backlogs",
-    "Semester",
-    "Parent_Education_Level",
-    "Gender",
-    "Department",
-    "Part_Time_Work",
-]
-
-
-def train_models():
-    df = load_dataset()
-    if df is None:
-        raise RuntimeError("Dataset could not be loaded; aborting training.")
-
-    (
-        X_train,
-        X_test,
-        y_reg_train,
-        y_reg_test,
-        y_clf_train,
-        y_clf_test,
-        encoders,
-    ) = preprocess_data(df)
+from calibration import brier_score, fit_oob_calibrator
+from evaluate_models import compute_metrics
+# Artifact names and locations come from the loader, so writer and reader cannot disagree.
+from model_registry import (
+    ACTIVE_FILE,
+    CALIBRATOR_FILE,
+    DROP_MODEL_FILE,
+    ENCODER_FILE,
+    FEATURES,
+    GPA_MODEL_FILE,
+    MODEL_DIR,
+    mmap_filename,
+)
+from training_data import PhaseTimer, dataset_hash, dataset_path, load_splits, write_manifest
+
+
+def save_model(model, filename, output_dir=MODEL_DIR):
+    """Write the compressed artifact plus an uncompressed copy that joblib can memory-map."""
+    joblib.dump(model, os.path.join(output_dir, filename), compress=3)
+    joblib.dump(model, os.path.join(output_dir, mmap_filename(filename)))
+
+
+def _fit(model, X, y, timer, phase):
+    with timer.phase(phase):
+        model.fit(X, y)
+    # n_jobs only pays off when fitting; for the API's small batches the
+    # thread dispatch costs more than the prediction, so serve single-threaded.
+    model.n_jobs = None
+    return model
+
+
+def model_params(model) -> dict:
+    """The model's constructor parameters that survive a JSON round trip."""
+    return {k: v for k, v in model.get_params().items() if v is None or isinstance(v, (str, int, float, bool))}
+
+
+def build_manifest(mode, path, rows, gpa_model, dropout_model, encoders, fit_seconds, metrics, test_rows):
+    """What a set of artifacts was trained on, so later runs can train only on newer rows.
+
+    ``test_rows`` are the dataset row positions held out for evaluation; later
+    incremental runs keep them held out instead of re-splitting. ``params``
+    lets evaluate_models rebuild the recipe without unpickling the forests.
+    """
+    size = os.path.getsize(path)
+    return {
+        "mode": mode,
+        "trained_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "dataset": os.path.basename(path),
+        "dataset_bytes": size,
+        "dataset_hash": dataset_hash(path, size),
+        "dataset_rows": rows,
+        "n_estimators": {"gpa": len(gpa_model.estimators_), "dropout": len(dropout_model.estimators_)},
+        "params": {"gpa": model_params(gpa_model), "dropout": model_params(dropout_model)},
+        "fit_seconds": fit_seconds,
+        "categories": {col: [str(c) for c in enc.classes_] for col, enc in encoders.items()},
+        "metrics": {k: v for k, v in metrics.items() if k != "classification_report"},
+        "test_rows": sorted(int(i) for i in test_rows),
+    }
+
+
+def train_models(version=None, activate=False, n_jobs=-1, use_cache=True):
+    """Train both models; with ``version`` they go to models/<version>/ instead of models/.
+
+    ``activate`` then points models/ACTIVE at the new version, which a running
+    API with ML_MODEL_WATCH_INTERVAL set picks up without a restart.
+    """
+    output_dir = MODEL_DIR if version is None else os.path.join(MODEL_DIR, version)
+    timer = PhaseTimer()
+
+    with timer.phase("load_preprocess"):
+        (
+            X_train,
+            X_test,
+            y_reg_train,
+            y_reg_test,
+            y_clf_train,
+            y_clf_test,
+            encoders,
+        ) = load_splits(use_cache=use_cache)[0]
 
     missing = [f for f in FEATURES if f not in X_train.columns]
     if missing:
@@ -48,26 +91,79 @@ def train_models():
 
     X_train_feat = X_train[FEATURES].copy()
 
-    os.makedirs(MODEL_DIR, exist_ok=True)
+    os.makedirs(output_dir, exist_ok=True)
 
     # Train GPA regression model (stronger estimator)
-    gpa_model = RandomForestRegressor(random_state=42, n_estimators=200)
-    gpa_model.fit(X_train_feat, y_reg_train)
-    joblib.dump(gpa_model, os.path.join(MODEL_DIR, GPA_MODEL_FILE), compress=3)
-    print("GPA prediction model saved.")
+    gpa_model = RandomForestRegressor(random_state=42, n_estimators=200, n_jobs=n_jobs)
+    # Train dropout risk classifier (stronger estimator). The out-of-bag
+    # probabilities calibrate its predict_proba without holding rows back.
+    dropout_model = RandomForestClassifier(
+        random_state=42, n_estimators=200, class_weight='balanced', n_jobs=n_jobs, oob_score=True
+    )
+
+    # The two models are independent, so fit them side by side; tree building
+    # releases the GIL, and each forest also spreads its trees over n_jobs threads.
+    with timer.phase("fit (wall)"), ThreadPoolExecutor(max_workers=2) as executor:
+        gpa_future = executor.submit(_fit, gpa_model, X_train_feat, y_reg_train, timer, "fit_gpa")
+        dropout_future = executor.submit(_fit, dropout_model, X_train_feat, y_clf_train, timer, "fit_dropout")
+        gpa_model, dropout_model = gpa_future.result(), dropout_future.result()
 
-    # Train dropout risk classifier (stronger estimator)
-    dropout_model = RandomForestClassifier(random_state=42, n_estimators=200, class_weight='balanced')
-    dropout_model.fit(X_train_feat, y_clf_train)
-    joblib.dump(dropout_model, os.path.join(MODEL_DIR, DROP_MODEL_FILE), compress=3)
-    print("Dropout risk model saved.")
+    with timer.phase("calibrate"):
+        calibrator = fit_oob_calibrator(dropout_model, y_clf_train)
 
-    # Save all encoders (including Academic_Risk_Level)
-    joblib.dump(encoders, os.path.join(MODEL_DIR, ENCODER_FILE))
-    print("Label encoders saved.")
+    with timer.phase("save"):
+        save_model(gpa_model, GPA_MODEL_FILE, output_dir)
+        print("GPA prediction model saved.")
+        save_model(dropout_model, DROP_MODEL_FILE, output_dir)
+        print("Dropout risk model saved.")
+        joblib.dump(calibrator, os.path.join(output_dir, CALIBRATOR_FILE))
+        print("Risk probability calibrator saved.")
+
+        # Save all encoders (including Academic_Risk_Level)
+        joblib.dump(encoders, os.path.join(output_dir, ENCODER_FILE))
+        print("Label encoders saved.")
+
+    with timer.phase("evaluate"):
+        metrics = compute_metrics(gpa_model, dropout_model, X_test, y_reg_test, y_clf_test)
+        raw_proba = dropout_model.predict_proba(X_test[FEATURES])
+        metrics["brier_raw"] = brier_score(raw_proba, y_clf_test, dropout_model.classes_)
+        metrics["brier_calibrated"] = brier_score(
+            calibrator.transform(raw_proba), y_clf_test, dropout_model.classes_
+        )
+    print(f"Risk Brier score on test set: {metrics['brier_raw']:.4f} raw, {metrics['brier_calibrated']:.4f} calibrated")
+    path = dataset_path()
+    write_manifest(
+        output_dir,
+        build_manifest(
+            "full",
+            path,
+            len(X_train) + len(X_test),
+            gpa_model,
+            dropout_model,
+            encoders,
+            timer.phases["fit (wall)"],
+            metrics,
+            # load_dataset's RangeIndex survives preprocess_data, so labels are row positions.
+            X_test.index,
+        ),
+    )
+
+    if version is not None and activate:
+        with open(os.path.join(MODEL_DIR, ACTIVE_FILE), "w") as fh:
+            fh.write(version + "\n")
+        print(f"Model version {version} marked active.")
 
     print("Training completed successfully.")
+    print(timer.report("Training time"))
 
 
 if __name__ == "__main__":
-    train_models()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Train the GPA and dropout risk models.")
+    parser.add_argument("--version", help="write to models/<version>/ instead of models/")
+    parser.add_argument("--activate", action="store_true", help="point models/ACTIVE at --version")
+    parser.add_argument("--n-jobs", type=int, default=-1, help="threads per forest (-1: all cores)")
+    parser.add_argument("--no-cache", action="store_true", help="re-read and re-encode the dataset")
+    args = parser.parse_args()
+    train_models(args.version, args.activate, args.n_jobs, not args.no_cache)
@@ -0,0 +1,88 @@
+"""Preprocessed training data, cached on disk by dataset content.
+
+Parsing the CSV and fitting the label encoders is the same work on every
+retrain and evaluation run as long as the dataset does not change, so the
+output of ``preprocess_data`` is stored under .cache/training/, keyed by a
+hash of the dataset file, and reused until the file's contents change.
+"""
+import json
+import os
+import time
+from contextlib import contextmanager
+
+import joblib
+
+from load_data import DATASET_DIR, dataset_hash, load_dataset
+from preprocess import preprocess_data
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "training")
+
+# Bump when preprocess_data changes its output so stale splits are not reused.
+CACHE_FORMAT = 2
+
+# Written next to the model artifacts; records what data they were trained on.
+MANIFEST_FILE = "training_manifest.json"
+
+
+def dataset_path(filename: str = "StudentData.csv") -> str:
+    return os.path.join(DATASET_DIR, filename)
+
+
+def read_manifest(model_dir: str):
+    try:
+        with open(os.path.join(model_dir, MANIFEST_FILE)) as fh:
+            return json.load(fh)
+    except FileNotFoundError:
+        return None
+
+
+def write_manifest(model_dir: str, manifest: dict) -> None:
+    with open(os.path.join(model_dir, MANIFEST_FILE), "w") as fh:
+        json.dump(manifest, fh, indent=2)
+
+
+def load_splits(filename: str = "StudentData.csv", cache_dir: str = CACHE_DIR, use_cache: bool = True):
+    """Return ``preprocess_data``'s train/test splits and encoders, and whether they came from cache."""
+    path = dataset_path(filename)
+    if not os.path.exists(path):
+        raise RuntimeError(f"Dataset not found: {path}")
+
+    cache_path = os.path.join(cache_dir, f"{dataset_hash(path)}-v{CACHE_FORMAT}.joblib")
+    if use_cache and os.path.exists(cache_path):
+        return joblib.load(cache_path), True
+
+    df = load_dataset(filename)
+    if df is None:
+        raise RuntimeError("Dataset could not be loaded; aborting training.")
+    splits = preprocess_data(df)
+    if use_cache:
+        os.makedirs(cache_dir, exist_ok=True)
+        # Write then rename so a concurrent reader never sees a partial file.
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        joblib.dump(splits, tmp_path)
+        os.replace(tmp_path, cache_path)
+    return splits, False
+
+
+class PhaseTimer:
+    """Wall-clock time per named phase, printed as a table by ``report``."""
+
+    def __init__(self):
+        self.phases = {}
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+
+    def report(self, title: str = "Timing") -> str:
+        total = time.perf_counter() - self._start
+        width = max([len(n) for n in self.phases] + [len("total")])
+        lines = [f"{title}:"]
+        lines += [f"  {name:<{width}}  {seconds:8.3f}s" for name, seconds in self.phases.items()]
+        lines.append(f"  {'total':<{width}}  {total:8.3f}s")
+        return "\n".join(lines)
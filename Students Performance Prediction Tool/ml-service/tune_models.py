@@ -0,0 +1,211 @@
+"""Search forest hyperparameters for accuracy against serving cost.
+
+Runs sklearn's successive-halving random search (cross-validated, all cores)
+over tree count, depth, max_features and min_samples_leaf for the GPA
+regressor and the risk classifier. Each round trains the surviving candidates
+on three times as many rows as the last, so most of the budget goes to the
+promising ones. The search and everything chosen from it use the training
+split only: ``--validation`` of it is held back, the search runs on the
+rest, and the best ``--top`` distinct candidates are refitted on the rest and
+measured on the held-back rows, for single-row predict latency (p50, with the
+configured ML_INFERENCE_ENGINE) and for pickled size. The report lists the
+candidates that no other candidate beats on all three at once (the Pareto
+frontier). It also names the cheapest model whose validation error is within
+``--budget`` of the best. Test-split errors are reported next to each
+candidate but never used to choose, so they are not optimistic.
+
+Run from the ml-service directory:
+
+    python tune_models.py --candidates 60 --budget 0.01 --output tuning_report.json
+    python tune_models.py --model risk --validation 0.25
+"""
+import argparse
+import json
+import pickle
+import time
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.metrics import accuracy_score, mean_absolute_error
+from sklearn.model_selection import HalvingRandomSearchCV, train_test_split
+
+from config import INFERENCE_ENGINE
+from forest_engine import flatten
+from train_models import FEATURES
+from training_data import PhaseTimer, load_splits
+
+PARAM_SPACE = {
+    "n_estimators": [25, 50, 100, 200, 400],
+    "max_depth": [None, 8, 12, 16, 24],
+    "max_features": [1.0, 0.5, "sqrt"],
+    "min_samples_leaf": [1, 2, 4, 8],
+}
+
+# (estimator, CV scoring, held-out error as "lower is better", error name)
+TARGETS = {
+    "gpa": (
+        lambda: RandomForestRegressor(random_state=42),
+        "neg_mean_absolute_error",
+        mean_absolute_error,
+        "mae",
+    ),
+    "risk": (
+        lambda: RandomForestClassifier(random_state=42, class_weight="balanced"),
+        "accuracy",
+        lambda y, p: 1.0 - accuracy_score(y, p),
+        "error_rate",
+    ),
+}
+
+
+def predict_latency_ms(model, X, repeats: int = 200) -> float:
+    """p50 wall time of a one-row predict, after a warm-up call."""
+    model = flatten(model) if INFERENCE_ENGINE == "flat" else model
+    rows = X[np.random.default_rng(0).integers(0, len(X), size=repeats)]
+    model.predict(rows[:1])
+    samples = np.empty(repeats)
+    for i in range(repeats):
+        start = time.perf_counter()
+        model.predict(rows[i : i + 1])
+        samples[i] = time.perf_counter() - start
+    return float(np.median(samples) * 1e3)
+
+
+def pareto_front(rows, keys):
+    """Rows no other row matches or beats on every key while beating it on at least one."""
+    front = []
+    for row in rows:
+        dominated = any(
+            all(o[k] <= row[k] for k in keys) and any(o[k] < row[k] for k in keys) for o in rows if o is not row
+        )
+        if not dominated:
+            front.append(row)
+    return front
+
+
+def top_candidates(search, limit: int):
+    """Best distinct parameter sets, ranked by their score at the largest resource they reached."""
+    results = search.cv_results_
+    best = {}
+    for i, params in enumerate(results["params"]):
+        key = json.dumps(params, sort_keys=True, default=str)
+        entry = (results["n_resources"][i], results["mean_test_score"][i], params)
+        if key not in best or entry[0] > best[key][0]:
+            best[key] = entry
+    ranked = sorted(best.values(), key=lambda e: (-e[0], -e[1]))
+    return [params for _, _, params in ranked[:limit]]
+
+
+def tune(target, X_train, y_train, X_val, y_val, X_test, y_test, candidates, top, cv, n_jobs, timer):
+    """Search on ``X_train`` and measure the top candidates on ``X_val``; ``X_test`` is only reported."""
+    make_model, scoring, error_fn, error_name = TARGETS[target]
+    search = HalvingRandomSearchCV(
+        make_model(),
+        PARAM_SPACE,
+        n_candidates=candidates,
+        factor=3,
+        cv=cv,
+        scoring=scoring,
+        n_jobs=n_jobs,
+        random_state=42,
+        refit=False,
+    )
+    with timer.phase(f"{target}_search"):
+        search.fit(X_train, y_train)
+
+    rows = []
+    X_val_array = np.ascontiguousarray(X_val, dtype=np.float64)
+    X_test_array = np.ascontiguousarray(X_test, dtype=np.float64)
+    with timer.phase(f"{target}_measure"):
+        for params in top_candidates(search, top):
+            model = make_model().set_params(**params, n_jobs=n_jobs)
+            started = time.perf_counter()
+            model.fit(X_train.to_numpy(), y_train)
+            fit_seconds = time.perf_counter() - started
+            model.set_params(n_jobs=None)
+            rows.append(
+                {
+                    "params": {k: params[k] for k in PARAM_SPACE},
+                    error_name: float(error_fn(y_val, model.predict(X_val_array))),
+                    f"test_{error_name}": float(error_fn(y_test, model.predict(X_test_array))),
+                    "latency_ms": predict_latency_ms(model, X_val_array),
+                    "size_bytes": len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL)),
+                    "n_nodes": int(sum(est.tree_.node_count for est in model.estimators_)),
+                    "fit_seconds": fit_seconds,
+                }
+            )
+    return rows, error_name, search.n_iterations_
+
+
+def report(target, rows, error_name, budget):
+    """Frontier and pick by validation error; the test error is printed alongside only."""
+    front = sorted(pareto_front(rows, (error_name, "latency_ms", "size_bytes")), key=lambda r: r["latency_ms"])
+    best_error = min(r[error_name] for r in rows)
+    within = [r for r in rows if r[error_name] <= best_error + budget]
+    pick = min(within, key=lambda r: (r["latency_ms"], r["size_bytes"]))
+
+    print(f"\n{target}: Pareto frontier ({len(front)} of {len(rows)} candidates)")
+    print(f"  {'val ' + error_name:>14}  {'test ' + error_name:>15}  {'p50 ms':>7}  {'size MiB':>8}  params")
+    for r in front:
+        print(
+            f"  {r[error_name]:>14.4f}  {r['test_' + error_name]:>15.4f}  {r['latency_ms']:>7.3f}  "
+            f"{r['size_bytes'] / 2**20:>8.2f}  {r['params']}"
+        )
+    print(f"  cheapest within {budget} of best validation {error_name} ({best_error:.4f}): {pick['params']}")
+    print(f"  its test {error_name}: {pick['test_' + error_name]:.4f}")
+    return {"candidates": rows, "pareto_front": front, "recommended": pick}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", choices=["gpa", "risk", "both"], default="both")
+    parser.add_argument("--candidates", type=int, default=60, help="parameter sets in the first halving round")
+    parser.add_argument("--top", type=int, default=12, help="candidates refitted and measured for the report")
+    parser.add_argument("--cv", type=int, default=3)
+    parser.add_argument("--n-jobs", type=int, default=-1)
+    parser.add_argument("--budget", type=float, default=0.01, help="allowed error above the best candidate's")
+    parser.add_argument(
+        "--validation", type=float, default=0.2, help="share of the training split held back to choose candidates"
+    )
+    parser.add_argument("--output", help="write the full report as JSON")
+    args = parser.parse_args(argv)
+
+    timer = PhaseTimer()
+    with timer.phase("load_preprocess"):
+        X_train, X_test, y_reg_train, y_reg_test, y_clf_train, y_clf_test, _ = load_splits()[0]
+    X_train, X_test = X_train[FEATURES], X_test[FEATURES]
+    # One validation split for both models, stratified so every risk level is represented.
+    fit_rows, val_rows = train_test_split(
+        np.arange(len(X_train)), test_size=args.validation, random_state=42, stratify=y_clf_train
+    )
+    labels = {"gpa": (np.asarray(y_reg_train), y_reg_test), "risk": (np.asarray(y_clf_train), y_clf_test)}
+
+    results = {"inference_engine": INFERENCE_ENGINE, "param_space": PARAM_SPACE, "validation": args.validation}
+    for target in ["gpa", "risk"] if args.model == "both" else [args.model]:
+        y_train, y_test = labels[target]
+        rows, error_name, iterations = tune(
+            target,
+            X_train.iloc[fit_rows],
+            y_train[fit_rows],
+            X_train.iloc[val_rows],
+            y_train[val_rows],
+            X_test,
+            y_test,
+            args.candidates,
+            args.top,
+            args.cv,
+            args.n_jobs,
+            timer,
+        )
+        results[target] = {"halving_iterations": int(iterations), **report(target, rows, error_name, args.budget)}
+
+    print(timer.report("\nTuning time"))
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump(results, fh, indent=2)
+        print(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""Perturbation grids for what-if analysis of one student."""
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+from feature_plan import ID_FIELDS, FeaturePlan
+
+# Columns that are never perturbed: ids, and the GPA stage's own output.
+FIXED_COLUMNS = set(ID_FIELDS) | {"predicted_CGPA"}
+
+
+def axis_codes(plan: FeaturePlan, feature: str, values: Sequence) -> Tuple[int, np.ndarray]:
+    """Column position of ``feature`` and ``values`` encoded for it; raises ValueError if either is unusable."""
+    if feature in plan.categorical:
+        slot, lookup, _, classes = plan.categorical[feature]
+        unknown = [v for v in values if str(v) not in lookup]
+        if unknown:
+            raise ValueError(f"Unknown values for '{feature}': {unknown}. Expected one of: {classes}")
+        return slot, np.array([lookup[str(v)] for v in values], dtype=np.float64)
+    numeric = {col: slot for slot, col in plan.numeric if col not in FIXED_COLUMNS}
+    if feature not in numeric:
+        raise ValueError(f"'{feature}' is not a feature that can be varied")
+    try:
+        return numeric[feature], np.asarray(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        raise ValueError(f"Values for '{feature}' must be numeric")
+
+
+def build_grid(plan: FeaturePlan, base: np.ndarray, axes: List[Tuple[str, Sequence]]) -> Tuple[np.ndarray, tuple]:
+    """One row per point of the Cartesian product of ``axes``, every other column taken from ``base``.
+
+    Rows are in C order over the axes, so the scores reshape to ``shape``.
+    """
+    encoded = [axis_codes(plan, feature, values) for feature, values in axes]
+    shape = tuple(len(codes) for _, codes in encoded)
+    X = np.tile(base, (int(np.prod(shape)), 1))
+    mesh = np.meshgrid(*(codes for _, codes in encoded), indexing="ij")
+    for (slot, _), grid in zip(encoded, mesh):
+        X[:, slot] = grid.ravel()
+    return X, shape